@@ -0,0 +1,86 @@
+"""
+Benchmark: splitting and parsing the DDL script.
+
+Times Tables/Table/ddl_parser.parse_statements against the former RE_STMTS
+regex splitting of creation.py on create_tables.sql repeated --copies times.
+The parser is checked against Benchmarks/ddl_corpus.sql by
+tests/test_ddl_parser.py.
+
+    python Benchmarks/bench_ddl_parser.py --copies 2000
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+# Ensure project root is on sys.path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Tables.Table.ddl_parser import parse_statements
+from Tables.Table.schema import DDL_PATH
+
+# What creation.py used before ddl_parser.py
+RE_STMTS = re.compile(
+    r'(?is)'  # DOTALL + IGNORECASE
+    r'('      # capture group for statements
+    r'\b(?:CREATE\s+(?:OR\s+REPLACE\s+)?TABLE|ALTER\s+TABLE|INSERT\s+INTO)\b.*?;'
+    r')'
+)
+RE_NAME = re.compile(
+    r'^\s*(?:CREATE\s+(?:OR\s+REPLACE\s+)?TABLE|ALTER\s+TABLE|INSERT\s+INTO)\s+"?(?P<name>[^"\s(]+)"?',
+    re.IGNORECASE
+)
+
+
+def legacy_parse(sql_text: str) -> list:
+    """(first keyword, table) of every statement found by RE_STMTS."""
+    result = []
+    for m in RE_STMTS.finditer(sql_text):
+        stmt = m.group(1).strip()
+        name = RE_NAME.match(stmt)
+        result.append((stmt.split()[0].upper(), name.group('name') if name else None))
+    return result
+
+
+def measure(func, sql_text: str, repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(sql_text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DDL statement parsing")
+    parser.add_argument('--copies', type=int, default=2000,
+                        help="Times create_tables.sql is repeated")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs per implementation, the best one is kept")
+    args = parser.parse_args()
+
+    with open(DDL_PATH, 'r', encoding='utf-8') as f:
+        sql_text = f.read() * args.copies
+    print(f"Script: {len(sql_text) / 1e6:.1f} MB ({args.copies} x create_tables.sql)")
+
+    new, new_s = measure(parse_statements, sql_text, args.repeat)
+    print(f"parse_statements : {new_s:8.2f}s  {len(sql_text) / 1e6 / new_s:8.1f} MB/s  {len(new)} statements")
+    old, old_s = measure(legacy_parse, sql_text, args.repeat)
+    print(f"legacy RE_STMTS  : {old_s:8.2f}s  {len(sql_text) / 1e6 / old_s:8.1f} MB/s  {len(old)} statements")
+    print(f"ratio x{old_s / new_s:.2f} (parse_statements also extracts columns and references)")
+
+    # Both must agree on the statements of the real DDL
+    same = [(kind.split()[0], table) for kind, table in
+            ((st.kind, st.table) for st in new)] == old
+    print(f"identical statements/tables: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
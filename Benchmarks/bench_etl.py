@@ -0,0 +1,256 @@
+"""
+Benchmark: offline end-to-end run of the ETL stages on synthetic BeeOne data.
+
+Synthetic extractions (Benchmarks/synthetic.py) are stored in a SQLite file
+standing for SQL Server, then every stage runs the real ETL code against
+SQLite stand-ins (Benchmarks/standins.py):
+
+* extract:   Flows/ETL/extract.read_queries with --workers threads, frames
+             compacted as extract_data does (--no-compact to skip)
+* transform: Flows/ETL/transform.transform_frame per table
+* dates:     Flows/ETL/load.convert_dates_to_snowflake_format per table
+* load:      Flows/ETL/load.prepare_frame + the load strategy (Parquet staging,
+             PUT, COPY INTO) per table, as load_chunks does
+
+Each stage reports seconds, rows/s, MB/s (in-memory size of its input) and
+peak RSS, per table and in total. The JSON report records the commit so runs
+of different commits can be compared:
+
+    python Benchmarks/bench_etl.py --scale 0.1
+    python Benchmarks/bench_etl.py --scale 0.1 --compare State/benchmarks/etl_<commit>_0.1.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import contextlib
+from datetime import datetime
+
+# Ensure project root is on sys.path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pandas as pd
+
+from Benchmarks.synthetic import generate_all
+from Benchmarks.standins import source_engine, write_sources, SqliteWarehouse
+from Flows.ETL.extract import read_queries
+from Flows.ETL.transform import transform_frame
+from Flows.ETL.load import convert_dates_to_snowflake_format, prepare_frame
+from Flows.ETL.strategies import choose_strategy
+from Flows.ETL.staging import DEFAULT_STAGING
+from Flows.ETL.instrumentation import rss_bytes
+from Flows.ETL.state import state_path
+from Flows.ETL.dtypes import DEFAULT_COMPACT_DTYPES
+from Tables.Table.schema import DDL_PATH
+
+STAGES = ('extract', 'transform', 'dates', 'load')
+SCHEMA = 'BENCH'
+
+
+class PeakRSS:
+    """Sample the resident set size in a background thread while the block runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        if self.peak is None:
+            # Neither /proc nor psutil: process-wide maximum only
+            import resource
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+            return self
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, rss_bytes())
+
+
+def _frame_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _metrics(seconds: float, rows: int, mb: float, peak_rss: int) -> dict:
+    return {
+        'seconds': round(seconds, 4),
+        'rows': int(rows),
+        'mb': round(mb, 2),
+        'rows_per_s': round(rows / seconds) if seconds else None,
+        'mb_per_s': round(mb / seconds, 2) if seconds else None,
+        'peak_rss_mb': round(peak_rss / 1e6, 1),
+    }
+
+
+def measure(func, rows: int, mb: float):
+    """(result, metrics) of func() with its stdout discarded."""
+    with PeakRSS() as rss, open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+    return result, _metrics(elapsed, rows, mb, rss.peak)
+
+
+def _total(tables: dict, seconds: float = None) -> dict:
+    seconds = sum(t['seconds'] for t in tables.values()) if seconds is None else seconds
+    rows = sum(t['rows'] for t in tables.values())
+    mb = sum(t['mb'] for t in tables.values())
+    peak = max((t['peak_rss_mb'] for t in tables.values()), default=0) * 1e6
+    return _metrics(seconds, rows, mb, peak)
+
+
+def load_frame(warehouse, df: pd.DataFrame, source: str, strategy: str) -> int:
+    """What load_chunks does for one frame, on the stand-in warehouse."""
+    df.attrs['table'] = source
+    df.attrs['source'] = source
+    df = prepare_frame(df)
+    load = choose_strategy(warehouse, SCHEMA, source, 'full', strategy == 'replace', None, source,
+                           DEFAULT_STAGING)
+    load.begin()
+    try:
+        load.write(df)
+        load.finish()
+    except Exception:
+        load.abort()
+        raise
+    return load.rows
+
+
+def run(scale: float, seed: int, workers: int, strategy: str, workdir: str, compact: bool = True) -> dict:
+    stages = {stage: {} for stage in STAGES}
+
+    started = time.perf_counter()
+    frames = generate_all(scale, seed)
+    engine = source_engine(os.path.join(workdir, 'source.db'))
+    queries = write_sources(engine, frames)
+    del frames
+    print(f"Synthetic source: {len(queries)} tables in {time.perf_counter() - started:.1f}s")
+
+    # Extract: all queries at once, like extract_data
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        raw = read_queries(engine, queries, max_workers=workers,
+                           compact=DEFAULT_COMPACT_DTYPES if compact else None)
+        wall = time.perf_counter() - started
+    engine.dispose()
+    for name, df in raw.items():
+        stages['extract'][name] = _metrics(df.attrs['extract_seconds'], len(df), _frame_mb(df), rss.peak)
+    stages['extract']['_total'] = _total(stages['extract'], wall)
+
+    warehouse = SqliteWarehouse(os.path.join(workdir, 'warehouse.db'), os.path.join(workdir, 'stages'))
+    with open(DDL_PATH, 'r', encoding='utf-8') as f:
+        warehouse.create_tables(f.read())
+
+    for name in list(raw):
+        df = raw.pop(name)
+        clean, stages['transform'][name] = measure(lambda: transform_frame(name, df), len(df), _frame_mb(df))
+        del df
+        rows, mb = len(clean), _frame_mb(clean)
+        copy = clean.copy()
+        _, stages['dates'][name] = measure(lambda: convert_dates_to_snowflake_format(copy, name), rows, mb)
+        del copy
+        loaded, stages['load'][name] = measure(lambda: load_frame(warehouse, clean, name, strategy), rows, mb)
+        if warehouse.row_count(name) != loaded:
+            raise RuntimeError(f"{name}: {loaded} rows loaded, {warehouse.row_count(name)} in the warehouse")
+        del clean
+        print(f"  {name:<22} {rows:>9} rows  load {stages['load'][name]['seconds']:7.2f}s")
+
+    for stage in ('transform', 'dates', 'load'):
+        stages[stage]['_total'] = _total(stages[stage])
+    warehouse.close()
+    return stages
+
+
+def git_revision() -> dict:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=project_root, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', 'HEAD') or None,
+                'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+    except OSError:
+        return {'commit': None, 'dirty': None}
+
+
+def print_report(report: dict, baseline: dict = None):
+    print(f"\n{'stage':<10} {'seconds':>9} {'rows/s':>11} {'MB/s':>8} {'peak RSS MB':>12}"
+          + (f" {'vs baseline':>12}" if baseline else ""))
+    for stage in STAGES:
+        total = report['stages'][stage]['_total']
+        line = (f"{stage:<10} {total['seconds']:>9.2f} {total['rows_per_s'] or 0:>11} "
+                f"{total['mb_per_s'] or 0:>8} {total['peak_rss_mb']:>12}")
+        if baseline and stage in baseline.get('stages', {}):
+            before = baseline['stages'][stage]['_total']['seconds']
+            line += f" {(total['seconds'] - before) / before * 100 if before else 0:>+11.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end ETL benchmark")
+    parser.add_argument('--scale', type=float, default=0.1,
+                        help="Fraction of the BASE_ROWS of Benchmarks/synthetic.py")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4, help="Extraction threads")
+    parser.add_argument('--strategy', choices=('swap', 'replace'), default='swap',
+                        help="Full load strategy (etl.create_or_replace: replace)")
+    parser.add_argument('--no-compact', action='store_true', help="Keep the dtypes read_sql returns")
+    parser.add_argument('--output', default=state_path('benchmarks'),
+                        help="Directory of the JSON reports (default: benchmarks/ of ETL_STATE_DIR)")
+    parser.add_argument('--compare', help="Earlier JSON report to compare the stage totals with")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_etl_')
+    try:
+        stages = run(args.scale, args.seed, args.workers, args.strategy, workdir, not args.no_compact)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    revision = git_revision()
+    report = {
+        **revision,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'scale': args.scale,
+        'seed': args.seed,
+        'workers': args.workers,
+        'strategy': args.strategy,
+        'compact': not args.no_compact,
+        'stages': stages,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"etl_{(revision['commit'] or 'nocommit')[:10]}_{args.scale:g}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Baseline: {baseline.get('commit', '?')[:10]} (scale {baseline.get('scale')})")
+    print_report(report, baseline)
+    print(f"\nReport: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: null normalization before a Snowflake load.
+
+Compares the former string round-trip cleaning of load_data with
+Flows/ETL/nulls.normalize_nulls on a FACT_POINTAGE-shaped frame.
+
+    python Benchmarks/bench_nulls.py --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+# Ensure project root is on sys.path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from Flows.ETL.nulls import normalize_nulls, EXACT_NULL_TOKENS
+
+
+def fact_pointage_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic frame with the columns and null patterns of FACT_POINTAGE."""
+    rng = np.random.default_rng(seed)
+
+    def floats(null_ratio=0.3):
+        values = rng.gamma(2.0, 50.0, rows)
+        values[rng.random(rows) < null_ratio] = np.nan
+        values[rng.random(rows) < 0.001] = np.inf
+        return values
+
+    fermes = np.array(['Ferme A', 'Ferme B', 'Ferme C', 'Ferme D', 'NULL', ''], dtype=object)
+    operations = np.array([f"OPER {i}" for i in range(200)] + ['nan', 'N/A'], dtype=object)
+
+    return pd.DataFrame({
+        'DATE_POINTAGE': pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.integers(0, 1500, rows), unit='D'),
+        'ID_PARCELLE': rng.integers(1, 5000, rows).astype('float64'),
+        'ID_PERSONNEL': rng.integers(1, 20000, rows),
+        'ID_OPERATION': rng.integers(1, 200, rows),
+        'COST_ANALYTIQUE_DIRECT': floats(),
+        'HJ_DIRECT': floats(),
+        'HJ_HS25': floats(0.9),
+        'HJ_HS50': floats(0.9),
+        'HJ_HS100': floats(0.9),
+        'HJ_HSNM': floats(0.9),
+        'COUT_HSCU': floats(0.9),
+        'HSCU': floats(0.9),
+        'ID_CENTRE_COUT': floats(0.7),
+        'COST_ANALYTIQUE_INDIRECT': floats(0.7),
+        'HJ_INDIRECT': floats(0.7),
+        'TYPE_AFFECTATION': rng.choice(np.array(['Parcelle', 'Centre'], dtype=object), rows),
+        'PAIE_GENEREE': np.full(rows, None, dtype=object),
+        'CAMPAGNE': rng.integers(1, 10, rows),
+        'SBI': np.full(rows, None, dtype=object),
+        'COST_ANALYTIQUE': floats(0.0),
+        'COST_PAIE': np.zeros(rows),
+        'FERME': rng.choice(fermes, rows),
+        'OPER_LISTE': rng.choice(operations, rows),
+        'OUVRIER': rng.integers(1, 20000, rows),
+    })
+
+
+def legacy_clean(df: pd.DataFrame) -> pd.DataFrame:
+    """The cleaning load_data used before Flows/ETL/nulls.py (without its prints)."""
+    df = df.copy()
+    df_temp = df.astype(str)
+    nan_patterns = EXACT_NULL_TOKENS
+    for pattern in nan_patterns:
+        df_temp = df_temp.replace(pattern, None)
+    for col in df_temp.columns:
+        if df_temp[col].dtype == 'object':
+            mask = df_temp[col].astype(str).str.lower().str.match(r'^(nan|nat|none|null|na|n/a)$', na=False)
+            df_temp.loc[mask, col] = None
+    for pattern in nan_patterns:
+        df_temp = df_temp.replace(pattern, None)
+    for col in df.columns:
+        original_dtype = df[col].dtype
+        if 'float' in str(original_dtype) or 'int' in str(original_dtype):
+            df.loc[:, col] = pd.to_numeric(df_temp[col], errors='coerce')
+            df.loc[:, col] = df[col].where(pd.notnull(df[col]) & np.isfinite(df[col]), None)
+        else:
+            if df[col].dtype != 'object':
+                df[col] = df[col].astype('object')
+            df.loc[:, col] = df_temp[col]
+            df.loc[:, col] = df[col].where(pd.notnull(df[col]), None)
+    return df.where(pd.notnull(df), None)
+
+
+def measure(func, df: pd.DataFrame):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark null normalization")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help="Only time the new implementation")
+    args = parser.parse_args()
+
+    df = fact_pointage_frame(args.rows)
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"Frame: {df.shape[0]} rows x {df.shape[1]} columns ({frame_mb:.1f} MB)")
+
+    new, new_s, new_peak = measure(lambda d: normalize_nulls(d.copy()), df)
+    print(f"normalize_nulls : {new_s:8.2f}s  peak {new_peak / 1e6:8.1f} MB")
+    if args.skip_legacy:
+        return
+
+    old, old_s, old_peak = measure(legacy_clean, df)
+    print(f"legacy cleaning : {old_s:8.2f}s  peak {old_peak / 1e6:8.1f} MB")
+    print(f"speedup x{old_s / new_s:.1f}, peak memory x{old_peak / new_peak:.1f} lower")
+
+    # Both implementations must null out exactly the same cells
+    same = (old.isna().to_numpy() == new.isna().to_numpy()).all()
+    print(f"identical null masks: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+-- Tricky statements for Tables/Table/ddl_parser.py, checked by tests/test_ddl_parser.py.
+-- Every "-- expect: KIND | TABLE | COLUMNS" line gives, in order, the kind,
+-- table and number of columns of one statement of this file.
+
+-- expect: CREATE TABLE | dim_notes | 3
+CREATE OR REPLACE TABLE dim_notes (
+    id_note NUMBER(10,0) PRIMARY KEY,   -- a comment; with a semicolon
+    texte VARCHAR(500) DEFAULT 'a;b',   /* block comment; CREATE TABLE fake (x INT); */
+    montant NUMBER(12, 2)
+);
+
+-- expect: CREATE TABLE | Quoted;Name | 2
+CREATE TABLE IF NOT EXISTS "Quoted;Name" (
+    "Col ""A""" VARCHAR(10),
+    b INT
+);
+
+-- expect: INSERT | dim_notes | 0
+INSERT INTO dim_notes (id_note, texte) VALUES (1, 'it''s; fine'), (2, 'back\'slash;');
+
+-- expect: ALTER TABLE | BEE.CLIENT1.dim_notes | 0
+ALTER TABLE BEE.CLIENT1.dim_notes ADD COLUMN commentaire VARCHAR(100);
+
+-- expect: CREATE FUNCTION | add_one | 0
+CREATE OR REPLACE FUNCTION add_one(x NUMBER)
+RETURNS NUMBER
+LANGUAGE JAVASCRIPT
+AS $$
+    var y = X + 1; return y;
+$$;
+
+-- expect: CREATE VIEW | v_notes | 0
+CREATE OR REPLACE SECURE VIEW v_notes AS SELECT id_note, texte FROM dim_notes WHERE texte <> ';';
+
+-- expect: CREATE TABLE | fact_notes | 3
+create temporary table fact_notes (
+    id_fact int,
+    id_note number(10,0) references dim_notes(id_note),
+    constraint fk_note foreign key (id_note) references dim_notes(id_note),
+    date_note date
+)
+
+;
+
+-- expect: CREATE TABLE | raw$$notes | 3
+CREATE TABLE raw$$notes (
+    id_raw NUMBER(38, 0) DEFAULT COALESCE(NULLIF(0, 1), 2),
+    "Payload, (raw)" VARIANT,
+    id_note NUMBER References dim_notes (id_note)
+);
+
+-- expect: MERGE | dim_notes | 0
+MERGE INTO dim_notes t USING (SELECT 3 AS id_note) s ON t.id_note = s.id_note
+WHEN NOT MATCHED THEN INSERT (id_note) VALUES (s.id_note);
+
+-- expect: DROP TABLE | fact_notes | 0
+DROP TABLE IF EXISTS fact_notes;
+
+-- expect: USE | None | 0
+USE SCHEMA CLIENT1;
+
+-- expect: GRANT | None | 0
+GRANT SELECT ON ALL TABLES IN SCHEMA CLIENT1 TO ROLE REPORTING
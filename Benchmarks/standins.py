@@ -0,0 +1,165 @@
+"""
+SQLite stand-ins for SQL Server and Snowflake in the offline benchmarks.
+
+* source_engine(): SQLAlchemy engine on a SQLite file holding one table per
+  query of Tables/Queries/queries.py (the synthetic extraction results);
+  DATE/DATETIME columns are returned as datetimes like pyodbc does.
+* SqliteWarehouse: connection object accepted by Flows/ETL/strategies.py.
+  It runs the statements the load strategies and ParquetStager emit (stages,
+  PUT, COPY INTO from Parquet, TRUNCATE, LIKE copies, SWAP) on a SQLite file,
+  staged files being copied to a local directory.
+"""
+import os
+import re
+import glob
+import shutil
+import sqlite3
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine
+
+from Tables.Table.ddl_parser import parse_statements
+
+RE_STAGE = re.compile(r'^CREATE TEMPORARY STAGE (\S+)', re.IGNORECASE)
+RE_PUT = re.compile(r"^PUT 'file://([^']+)' @(\S+)", re.IGNORECASE)
+RE_COPY = re.compile(r'^COPY INTO (\S+) FROM @(\S+)', re.IGNORECASE)
+RE_TRUNCATE = re.compile(r'^TRUNCATE TABLE (\S+)', re.IGNORECASE)
+RE_LIKE = re.compile(r'^CREATE OR REPLACE (?:TEMPORARY )?TABLE (\S+) LIKE (\S+)', re.IGNORECASE)
+RE_SWAP = re.compile(r'^ALTER TABLE (\S+) SWAP WITH (\S+)', re.IGNORECASE)
+RE_DROP = re.compile(r'^DROP (TABLE|STAGE) IF EXISTS (\S+)', re.IGNORECASE)
+
+
+def _to_datetime(value: bytes):
+    return datetime.fromisoformat(value.decode())
+
+
+def _to_date(value: bytes):
+    return date.fromisoformat(value.decode()[:10])
+
+
+sqlite3.register_converter('DATETIME', _to_datetime)
+sqlite3.register_converter('TIMESTAMP', _to_datetime)
+sqlite3.register_converter('DATE', _to_date)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(sep=' '))
+sqlite3.register_adapter(pd.Timestamp, lambda d: d.isoformat(sep=' '))
+
+
+def source_engine(path: str):
+    """SQL Server stand-in; threads share the file like pooled ODBC connections."""
+    return create_engine(
+        f"sqlite:///{path}",
+        connect_args={'detect_types': sqlite3.PARSE_DECLTYPES, 'check_same_thread': False},
+    )
+
+
+def write_sources(engine, frames: dict) -> dict:
+    """Store the extraction frames and return the matching {name: query}."""
+    for name, df in frames.items():
+        df.to_sql(name, engine, index=False, if_exists='replace', chunksize=50_000)
+    return {name: f"SELECT * FROM {name}" for name in frames}
+
+
+def _name(qualified: str) -> str:
+    """SCHEMA.TABLE -> TABLE (SQLite has a single schema)."""
+    return qualified.split('.')[-1].strip('"')
+
+
+class _Cursor:
+    def __init__(self, warehouse):
+        self.warehouse = warehouse
+
+    def execute(self, sql: str, params=None):
+        self.warehouse.statements += 1
+        self.warehouse.run(' '.join(sql.split()))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class SqliteWarehouse:
+    def __init__(self, path: str, stage_dir: str):
+        """
+        Args:
+            path: SQLite file standing for the Snowflake schema
+            stage_dir: Directory standing for the internal stages
+        """
+        self.db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self.stage_dir = stage_dir
+        self.statements = 0
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def close(self):
+        self.db.close()
+
+    def create_tables(self, sql_text: str) -> list:
+        """Create the CREATE TABLE statements of `sql_text` (types kept as declared)."""
+        created = []
+        for st in parse_statements(sql_text):
+            if st.kind != 'CREATE TABLE' or not st.columns:
+                continue
+            table = _name(st.table).upper()
+            columns = ', '.join(f'"{name.upper()}" {sql_type}' for name, sql_type in st.columns.items())
+            self.db.execute(f'DROP TABLE IF EXISTS "{table}"')
+            self.db.execute(f'CREATE TABLE "{table}" ({columns})')
+            created.append(table)
+        self.db.commit()
+        return created
+
+    def row_count(self, table: str) -> int:
+        return self.db.execute(f'SELECT COUNT(*) FROM "{_name(table).upper()}"').fetchone()[0]
+
+    def _stage(self, name: str) -> str:
+        return os.path.join(self.stage_dir, _name(name).upper())
+
+    def _copy_into(self, table: str, stage: str):
+        table = _name(table).upper()
+        columns = {row[1].upper(): row[1] for row in self.db.execute(f'PRAGMA table_info("{table}")')}
+        for path in sorted(glob.glob(os.path.join(self._stage(stage), '*.parquet'))):
+            df = pq.read_table(path).to_pandas()
+            # MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE: unmatched file columns are ignored
+            df = df[[c for c in df.columns if c.upper() in columns]]
+            names = ', '.join(f'"{columns[c.upper()]}"' for c in df.columns)
+            marks = ', '.join('?' for _ in df.columns)
+            rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+            self.db.executemany(f'INSERT INTO "{table}" ({names}) VALUES ({marks})', rows)
+            os.remove(path)  # PURGE = TRUE
+        self.db.commit()
+
+    def run(self, sql: str):
+        if m := RE_STAGE.match(sql):
+            os.makedirs(self._stage(m.group(1)), exist_ok=True)
+        elif m := RE_PUT.match(sql):
+            for path in glob.glob(m.group(1)):
+                shutil.copy(path, self._stage(m.group(2)))
+        elif m := RE_COPY.match(sql):
+            self._copy_into(m.group(1), m.group(2))
+        elif m := RE_TRUNCATE.match(sql):
+            self.db.execute(f'DELETE FROM "{_name(m.group(1)).upper()}"')
+            self.db.commit()
+        elif m := RE_LIKE.match(sql):
+            copy, table = _name(m.group(1)).upper(), _name(m.group(2)).upper()
+            self.db.execute(f'DROP TABLE IF EXISTS "{copy}"')
+            self.db.execute(f'CREATE TABLE "{copy}" AS SELECT * FROM "{table}" WHERE 0')
+            self.db.commit()
+        elif m := RE_SWAP.match(sql):
+            a, b = _name(m.group(1)).upper(), _name(m.group(2)).upper()
+            self.db.execute(f'ALTER TABLE "{a}" RENAME TO "{a}__SWAP"')
+            self.db.execute(f'ALTER TABLE "{b}" RENAME TO "{a}"')
+            self.db.execute(f'ALTER TABLE "{a}__SWAP" RENAME TO "{b}"')
+            self.db.commit()
+        elif m := RE_DROP.match(sql):
+            if m.group(1).upper() == 'STAGE':
+                shutil.rmtree(self._stage(m.group(2)), ignore_errors=True)
+            else:
+                self.db.execute(f'DROP TABLE IF EXISTS "{_name(m.group(2)).upper()}"')
+                self.db.commit()
+        else:
+            raise NotImplementedError(f"Statement not supported by the SQLite warehouse: {sql[:80]}")
@@ -0,0 +1,103 @@
+"""
+Synthetic BeeOne extractions for the offline benchmarks.
+
+One frame per query of Tables/Queries/queries.py, with the columns and types
+its table declares in Tables/Table/create_tables.sql and the value patterns
+of the SQL Server source: nullable keys, sparse measures, low-cardinality
+labels mixed with null tokens ('NULL', '', 'nan'), a few duplicate rows.
+
+    frames = generate_all(scale=0.1)      # {'FACT_POINTAGE': DataFrame, ...}
+
+Row counts are BASE_ROWS x scale (at least 10 rows per table).
+"""
+import numpy as np
+import pandas as pd
+
+from Tables.Queries.queries import QUERIES
+from Tables.Table.schema import column_types, base_type
+
+# Rows per table at scale 1, roughly a large client
+BASE_ROWS = {
+    'COMPTES_ANALYTIQUES': 5_000,
+    'COMPTES_BUDGETAIRES': 3_000,
+    'PRODUCTION_BEEONE': 300_000,
+    'PROFIL_DE_PRODUCTION': 20_000,
+    'COUTS_BEEONE': 500_000,
+    'BUDGET': 400_000,
+    'COMPTES_PL': 500,
+    'VERSIONS_BUDGET': 50,
+    'DIM_PERSONNEL': 20_000,
+    'DIM_OPERATION': 2_000,
+    'DIM_PARCELLE': 5_000,
+    'DIM_FERME': 200_000,
+    'DIM_CAMPAGNE': 50,
+    'DIM_CENTRE': 1_000,
+    'FACT_POINTAGE': 1_000_000,
+}
+
+NULL_TOKENS = np.array(['NULL', '', 'nan', 'None'], dtype=object)
+DUPLICATE_RATIO = 0.01
+DATE_RANGE = (pd.Timestamp('2021-01-01'), pd.Timestamp('2025-12-31'))
+
+
+def _ints(rng, rows: int, null_ratio: float, high: int = 100_000):
+    values = rng.integers(1, high, rows).astype('float64')
+    values[rng.random(rows) < null_ratio] = np.nan
+    # SQL Server integers without nulls come back as int64
+    return values if null_ratio else values.astype('int64')
+
+
+def _floats(rng, rows: int, null_ratio: float):
+    values = rng.gamma(2.0, 50.0, rows).round(4)
+    values[rng.random(rows) < null_ratio] = np.nan
+    return values
+
+
+def _strings(rng, rows: int, name: str, null_ratio: float, cardinality: int):
+    vocabulary = np.array([f"{name.title()} {i}" for i in range(cardinality)], dtype=object)
+    values = rng.choice(vocabulary, rows)
+    nulls = rng.random(rows) < null_ratio
+    values[nulls] = rng.choice(NULL_TOKENS, int(nulls.sum()))
+    return values
+
+
+def _dates(rng, rows: int, null_ratio: float):
+    span = (DATE_RANGE[1] - DATE_RANGE[0]).days
+    values = DATE_RANGE[0] + pd.to_timedelta(rng.integers(0, span, rows), unit='D')
+    values = pd.Series(values).where(rng.random(rows) >= null_ratio)
+    return values.to_numpy()
+
+
+def generate(source: str, rows: int, seed: int = 42) -> pd.DataFrame:
+    """Frame shaped like the extraction of `source`, columns named as SQL Server returns them."""
+    rng = np.random.default_rng([seed, sum(map(ord, source))])
+    columns = {}
+    for i, (name, sql_type) in enumerate(column_types(source).items()):
+        base = base_type(sql_type)
+        if base == 'NUMBER' and ',' in sql_type and not sql_type.rstrip(')').endswith(',0'):
+            columns[name] = _floats(rng, rows, 0.2)
+        elif base in ('NUMBER', 'INT', 'INTEGER', 'BIGINT'):
+            # The first column is usually the key: never null, high cardinality
+            columns[name] = _ints(rng, rows, 0.0 if i == 0 else 0.1, rows * 10 if i == 0 else 100_000)
+        elif base in ('FLOAT', 'DOUBLE', 'REAL', 'DECIMAL'):
+            columns[name] = _floats(rng, rows, 0.3)
+        elif base in ('DATE', 'DATETIME') or base.startswith('TIMESTAMP'):
+            columns[name] = _dates(rng, rows, 0.05)
+        elif base == 'BOOLEAN':
+            columns[name] = rng.random(rows) < 0.5
+        else:
+            columns[name] = _strings(rng, rows, name, 0.1, 200)
+    df = pd.DataFrame({name.lower(): values for name, values in columns.items()})
+
+    duplicates = int(rows * DUPLICATE_RATIO)
+    if duplicates:
+        df = pd.concat([df, df.sample(duplicates, random_state=seed)], ignore_index=True)
+    return df
+
+
+def generate_all(scale: float = 1.0, seed: int = 42, sources=None) -> dict:
+    """{query name: frame} for every query (or `sources`) at `scale`."""
+    return {
+        source: generate(source, max(10, int(BASE_ROWS.get(source, 10_000) * scale)), seed)
+        for source in (sources or QUERIES)
+    }
@@ -12,6 +12,7 @@ CONFIG_VERSION = "1.0"
 DEFAULTS = {
     "client_id": "cl2",
     "client_name": "Client2",
+    "id_client": None,      # ID_CLIENT from BEE_MASTER.PUBLIC.CLIENT_DATABASES, written on every loaded row
     "source_db": {
         "driver": "{ODBC Driver 17 for SQL Server}",
         "server": "DESKTOP-AGUMSPH",
@@ -34,6 +35,21 @@ DEFAULTS = {
         "create_or_replace": False,
         "date_format":       "%Y-%m-%d",
         "max_workers":       8,
+        "load_concurrency":  4,
+        "staging": {
+            "file_rows":   500000,
+            "parallel":    8,
+            "compression": "snappy",
+        },
+        "extract_cache": {
+            "enabled":   True,
+            "ttl_hours": 12,
+            "max_mb":    2048,
+        },
+        "compact_dtypes": {
+            "enabled":            True,
+            "max_category_ratio": 0.5,
+        },
     },
     "etl_flow":    "../../Flows/ETL/flow_prefect.py",
     "queries_path": "../../Tables/Queries/queries.py",
@@ -67,6 +83,11 @@ def choose(field_label, default, secret=False):
         print("Please enter 1 or 2.")
 
 
+def _id_client(value):
+    """ID_CLIENT as an int, None when left empty."""
+    return int(value) if value not in (None, "", "None") else None
+
+
 def load_config(path: Path):
     with open(path, "r") as f:
         return yaml.safe_load(f)
@@ -94,6 +115,7 @@ def interactive_create():
     # Client identifiers
     cfg["client_id"]   = choose("Client ID",   DEFAULTS["client_id"])
     cfg["client_name"] = choose("Client Name", DEFAULTS["client_name"])
+    cfg["id_client"]   = _id_client(choose("ID_CLIENT (BEE_MASTER mapping)", DEFAULTS["id_client"]))
 
     # Source DB settings
     sd = DEFAULTS["source_db"]
@@ -124,6 +146,21 @@ def interactive_create():
         "create_or_replace": choose("Create or replace? (y/n)", 'y' if et["create_or_replace"] else 'n').lower().startswith('y'),
         "date_format":       choose("Date format",             et["date_format"]),
         "max_workers":       int(choose("Max workers",           et["max_workers"])),
+        "load_concurrency":  int(choose("Concurrent table loads", et["load_concurrency"])),
+        "staging": {
+            "file_rows":   int(choose("Rows per Parquet file",   et["staging"]["file_rows"])),
+            "parallel":    int(choose("Parallel PUT threads",    et["staging"]["parallel"])),
+            "compression": choose("Parquet compression",         et["staging"]["compression"]),
+        },
+        "extract_cache": {
+            "enabled":   choose("Cache extractions? (y/n)", 'y' if et["extract_cache"]["enabled"] else 'n').lower().startswith('y'),
+            "ttl_hours": float(choose("Extract cache TTL (hours)", et["extract_cache"]["ttl_hours"])),
+            "max_mb":    int(choose("Extract cache size (MB)",     et["extract_cache"]["max_mb"])),
+        },
+        "compact_dtypes": {
+            "enabled":            choose("Compact extracted dtypes? (y/n)", 'y' if et["compact_dtypes"]["enabled"] else 'n').lower().startswith('y'),
+            "max_category_ratio": float(choose("Max distinct/rows ratio for categoricals", et["compact_dtypes"]["max_category_ratio"])),
+        },
     }
 
     # Paths
@@ -138,6 +175,7 @@ def interactive_update(old: dict):
     # Client identifiers
     new["client_id"]   = choose("Client ID",   old.get("client_id", DEFAULTS["client_id"]))
     new["client_name"] = choose("Client Name", old.get("client_name", DEFAULTS["client_name"]))
+    new["id_client"]   = _id_client(choose("ID_CLIENT (BEE_MASTER mapping)", old.get("id_client", DEFAULTS["id_client"])))
 
     # Source DB
     sd = old.get("source_db", DEFAULTS["source_db"])
@@ -168,6 +206,24 @@ def interactive_update(old: dict):
         "create_or_replace": choose("Create or replace? (y/n)", 'y' if et.get("create_or_replace") else 'n').lower().startswith('y'),
         "date_format":       choose("Date format",             et.get("date_format", DEFAULTS["etl"]["date_format"])),
         "max_workers":       int(choose("Max workers",           et.get("max_workers", DEFAULTS["etl"]["max_workers"]))),
+        "load_concurrency":  int(choose("Concurrent table loads", et.get("load_concurrency", DEFAULTS["etl"]["load_concurrency"]))),
+    }
+    st = {**DEFAULTS["etl"]["staging"], **(et.get("staging") or {})}
+    new["etl"]["staging"] = {
+        "file_rows":   int(choose("Rows per Parquet file",   st["file_rows"])),
+        "parallel":    int(choose("Parallel PUT threads",    st["parallel"])),
+        "compression": choose("Parquet compression",         st["compression"]),
+    }
+    xc = {**DEFAULTS["etl"]["extract_cache"], **(et.get("extract_cache") or {})}
+    new["etl"]["extract_cache"] = {
+        "enabled":   choose("Cache extractions? (y/n)", 'y' if xc["enabled"] else 'n').lower().startswith('y'),
+        "ttl_hours": float(choose("Extract cache TTL (hours)", xc["ttl_hours"])),
+        "max_mb":    int(choose("Extract cache size (MB)",     xc["max_mb"])),
+    }
+    cd = {**DEFAULTS["etl"]["compact_dtypes"], **(et.get("compact_dtypes") or {})}
+    new["etl"]["compact_dtypes"] = {
+        "enabled":            choose("Compact extracted dtypes? (y/n)", 'y' if cd["enabled"] else 'n').lower().startswith('y'),
+        "max_category_ratio": float(choose("Max distinct/rows ratio for categoricals", cd["max_category_ratio"])),
     }
 
     # Paths
@@ -1,10 +1,11 @@
 import os
-import re
+import sys
+import time
 import yaml
 import argparse
-import snowflake.connector
 import logging
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ────────────────────────────────────────────────────────────────────────────────
 # Logging configuration
@@ -17,23 +18,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ────────────────────────────────────────────────────────────────────────────────
-# Paths & Regex patterns
+# Paths
 # ────────────────────────────────────────────────────────────────────────────────
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir, os.pardir))
 DDL_PATH = os.path.join(ROOT_DIR, "Tables", "Table", "create_tables.sql")
 
-RE_STMTS = re.compile(
-    r'(?is)'  # DOTALL + IGNORECASE
-    r'('      # capture group for statements
-    r'\b(?:CREATE\s+(?:OR\s+REPLACE\s+)?TABLE|ALTER\s+TABLE|INSERT\s+INTO)\b.*?;'
-    r')'
-)
-RE_CREATE = re.compile(r'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?TABLE', re.IGNORECASE)
-RE_NAME = re.compile(
-    r'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+"?(?P<name>[^"\s(]+)"?',
-    re.IGNORECASE
-)
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+from Flows.ETL.connections import params_pool
+from Flows.Creation.introspection import SchemaCache
+from Flows.Creation.migration import declared_columns, diff_table
+from Tables.Table.ddl_parser import parse_statements
 
 # ────────────────────────────────────────────────────────────────────────────────
 # Helpers
@@ -43,7 +39,7 @@ def list_clients():
     if not os.path.isdir(path):
         raise FileNotFoundError(f"Clients folder not found at {path}")
     return sorted(d for d in os.listdir(path)
-                  if os.path.isdir(os.path.join(path, d)))
+                  if os.path.isfile(os.path.join(path, d, "config.yml")))
 
 
 def load_config(client_name):
@@ -55,7 +51,7 @@ def load_config(client_name):
 
 
 def extract_statements(sql_text):
-    stmts = [m.group(1).strip() for m in RE_STMTS.finditer(sql_text)]
+    stmts = parse_statements(sql_text)
     logger.info(f"🔍 Extracted {len(stmts)} statements from {DDL_PATH}")
     return stmts
 
@@ -67,27 +63,69 @@ def read_statements():
         return extract_statements(f.read())
 
 
-def extract_table_name(stmt):
-    m = RE_NAME.match(stmt)
-    return m.group('name') if m else None
-
-
-def table_exists(conn, schema, table):
-    query = (
-        "SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES "
-        f"WHERE TABLE_SCHEMA = '{schema.upper()}' "
-        f"AND TABLE_NAME = '{table.upper()}'"
-    )
-    cur = conn.cursor()
-    try:
-        cur.execute(query)
-        return cur.fetchone()[0] > 0
-    finally:
-        cur.close()
+def statement_waves(statements):
+    """
+    Group statements into waves that can run concurrently: a statement only
+    depends on tables created in earlier waves (its REFERENCES, or the table an
+    ALTER/INSERT targets), and statements on the same table keep their order.
+    `statements` may contain None for statements that are not run.
+    Returns a list of waves, each a list of (index, statement).
+    """
+    level_of = {}
+    waves = []
+    for i, stmt in enumerate(statements, start=1):
+        if stmt is None:
+            continue
+        table = (stmt.table or '').upper()
+        if stmt.kind == 'CREATE TABLE':
+            deps = {ref.upper() for ref in stmt.references} - {table}
+        else:
+            deps = {table}
+        level = max((level_of[d] + 1 for d in deps if d in level_of), default=0)
+        if table in level_of:
+            level = max(level, level_of[table] + 1)
+        if table:
+            level_of[table] = level
+        while len(waves) <= level:
+            waves.append([])
+        waves[level].append((i, stmt))
+    return waves
+
+
+def _run_async(conn, jobs):
+    """
+    Submit every (index, sql) of `jobs` with execute_async, then wait for all.
+    Returns {index: exception or None}.
+    """
+    submitted, results = {}, {}
+    for i, sql in jobs:
+        cur = conn.cursor()
+        try:
+            cur.execute_async(sql)
+            submitted[i] = cur.sfqid
+        except Exception as e:
+            results[i] = e
+        finally:
+            cur.close()
+    for i, qid in submitted.items():
+        try:
+            while conn.is_still_running(conn.get_query_status_throw_if_error(qid)):
+                time.sleep(0.2)
+            results[i] = None
+        except Exception as e:
+            results[i] = e
+    return results
 
 
-def apply_statements(conn, schema, statements, replace_existing=False, dry_run=False):
-    summary = Counter(created=0, skipped=0, altered=0, inserted=0, errors=0)
+def apply_statements(conn, schema, statements, replace_existing=False, dry_run=False, parallel=True,
+                     migrate=False):
+    """
+    Apply the DDL statements to `schema`. With `parallel`, independent
+    statements (see statement_waves) are submitted together with async queries.
+    With `migrate`, existing tables are altered in place to match the DDL
+    (Flows/Creation/migration.py) instead of being skipped as they are.
+    """
+    summary = Counter(created=0, skipped=0, migrated=0, altered=0, inserted=0, errors=0)
 
     # switch to target schema
     c = conn.cursor()
@@ -95,43 +133,76 @@ def apply_statements(conn, schema, statements, replace_existing=False, dry_run=F
     c.close()
     logger.info(f"Using schema: {schema}")
 
+    # One INFORMATION_SCHEMA query for every existence / column check below
+    cache = SchemaCache(conn).load([schema])
+    logger.info(f"🔎 {len(cache.tables(schema))} existing tables in {schema}")
+
+    # Decide what to run for each statement
+    planned = {}
+    all_statements = list(statements)
     for i, stmt in enumerate(statements, start=1):
-        kind = stmt.split()[0].upper()
-        table = extract_table_name(stmt)
-        try:
-            if RE_CREATE.match(stmt):
-                if table and not replace_existing and table_exists(conn, schema, table):
-                    logger.info(f"[{i}] ⏩ Skipping existing table {table}")
-                    summary['skipped'] += 1
-                else:
-                    sql = stmt
-                    if not replace_existing:
-                        sql = stmt.replace(
-                            "CREATE OR REPLACE TABLE",
-                            "CREATE TABLE IF NOT EXISTS"
-                        )
-                    if not dry_run:
-                        conn.cursor().execute(sql)
-                    logger.info(f"[{i}] ✅ Created table {table}")
-                    summary['created'] += 1
-
-            elif kind == 'ALTER':
-                if not dry_run:
-                    conn.cursor().execute(stmt)
-                logger.info(f"[{i}] 🔧 Executed ALTER TABLE")
-                summary['altered'] += 1
-
-            elif kind == 'INSERT':
-                if not dry_run:
-                    conn.cursor().execute(stmt)
-                logger.info(f"[{i}] ➕ Executed INSERT")
-                summary['inserted'] += 1
-
-            else:
-                logger.debug(f"[{i}] 🚧 Unsupported statement, skipping: {stmt[:30]}…")
-        except Exception as e:
-            logger.error(f"[{i}] ❌ Error on {kind}: {e}")
-            summary['errors'] += 1
+        table = stmt.table
+        if stmt.kind == 'CREATE TABLE':
+            if table and not replace_existing and cache.table_exists(schema, table):
+                logger.info(f"[{i}] ⏩ Skipping existing table {table}")
+                summary['skipped'] += 1
+                declared = declared_columns(stmt)
+                if not migrate:
+                    missing, _ = cache.column_diff(schema, table, declared)
+                    if missing:
+                        logger.warning(f"[{i}] ⚠️ {table} lacks DDL columns: {missing} (use --migrate)")
+                    continue
+                migrations, warnings = diff_table(cache, schema, table, declared)
+                for warning in warnings:
+                    logger.warning(f"[{i}] ⚠️ {warning}")
+                for sql in migrations:
+                    all_statements.extend(parse_statements(sql))
+                    planned[len(all_statements)] = ('migrated', sql, f"🛠️ {sql}")
+                continue
+            sql = stmt.text
+            if not replace_existing:
+                sql = sql.replace(
+                    "CREATE OR REPLACE TABLE",
+                    "CREATE TABLE IF NOT EXISTS"
+                )
+            planned[i] = ('created', sql, f"✅ Created table {table}")
+        elif stmt.kind == 'ALTER TABLE':
+            planned[i] = ('altered', stmt.text, "🔧 Executed ALTER TABLE")
+        elif stmt.kind == 'INSERT':
+            planned[i] = ('inserted', stmt.text, "➕ Executed INSERT")
+        else:
+            logger.debug(f"[{i}] 🚧 Unsupported {stmt.kind} statement, skipping: {stmt.text[:30]}…")
+
+    waves = statement_waves([stmt if i in planned else None for i, stmt in enumerate(all_statements, start=1)])
+    for w, wave in enumerate(waves, start=1):
+        jobs = [(i, planned[i][1]) for i, _ in wave if i in planned]
+        if not jobs:
+            continue
+        if dry_run:
+            results = {i: None for i, _ in jobs}
+        elif parallel:
+            logger.info(f"🌊 Wave {w}: {len(jobs)} statement(s)")
+            results = _run_async(conn, jobs)
+        else:
+            results = {}
+            for i, sql in jobs:
+                try:
+                    conn.cursor().execute(sql)
+                    results[i] = None
+                except Exception as e:
+                    results[i] = e
+        for i, _ in jobs:
+            counter, _, message = planned[i]
+            stmt = all_statements[i - 1]
+            error = results[i]
+            if error is not None:
+                logger.error(f"[{i}] ❌ Error on {stmt.kind}: {error}")
+                summary['errors'] += 1
+                continue
+            if counter == 'created' and not dry_run and stmt.table:
+                cache.mark_created(schema, stmt.table, stmt.columns)
+            logger.info(f"[{i}] {message}")
+            summary[counter] += 1
 
     return summary
 
@@ -151,6 +222,17 @@ def parse_args():
                         help='Force DROP & REPLACE all tables')
     parser.add_argument('--dry-run', action='store_true',
                         help="Show SQL without executing")
+    parser.add_argument('--migrate', action='store_true',
+                        help='ALTER existing tables in place to match the DDL (add / widen columns)')
+    batch = parser.add_mutually_exclusive_group()
+    batch.add_argument('--all', action='store_true',
+                       help='Provision every client of Clients/ (non-interactive)')
+    batch.add_argument('--clients', nargs='+', choices=clients, metavar='CLIENT',
+                       help='Provision these clients (non-interactive)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Clients provisioned concurrently in batch mode')
+    parser.add_argument('--serial', action='store_true',
+                        help='Run statements one by one instead of async waves')
     return parser.parse_args()
 
 
@@ -170,9 +252,100 @@ def prompt_for_schema(default_schema):
     return raw or default_schema
 
 
+def provision_client(client, schema=None, replace_existing=False, dry_run=False, parallel=True,
+                     migrate=False):
+    """Apply the DDL to one client's schema; returns the summary with timing and status."""
+    started = time.perf_counter()
+    cfg = load_config(client)['snowflake']
+    schema = schema or cfg.get('schema')
+    statements = read_statements()
+    pool = params_pool({
+        'user': cfg['user'],
+        'password': cfg['password'],
+        'account': cfg['account'],
+        'warehouse': cfg['warehouse'],
+        'database': cfg['database'],
+        'role': cfg.get('role', 'SYSADMIN'),
+    }, max_size=1, name=client, shared=False)  # clients may share credentials: own session, closed below
+    try:
+        with pool.connection() as conn:
+            summary = apply_statements(
+                conn,
+                schema,
+                statements,
+                replace_existing=replace_existing,
+                dry_run=dry_run,
+                parallel=parallel,
+                migrate=migrate
+            )
+    finally:
+        pool.close()
+        logger.info(f"Connection closed ({client}).")
+    return {
+        'client': client,
+        'schema': schema,
+        'status': 'failed' if summary['errors'] else 'success',
+        'duration_s': round(time.perf_counter() - started, 1),
+        **summary,
+    }
+
+
+def provision_clients(clients, replace_existing=False, dry_run=False, parallel=True, workers=4,
+                      migrate=False):
+    """Provision several clients concurrently (one session per client)."""
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='provision') as executor:
+        futures = {
+            executor.submit(provision_client, client, None, replace_existing, dry_run, parallel, migrate): client
+            for client in clients
+        }
+        for future in as_completed(futures):
+            client = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"❌ {client}: {e}")
+                results.append({'client': client, 'schema': None, 'status': 'failed',
+                                'duration_s': 0.0, 'error': str(e)})
+    return sorted(results, key=lambda r: r['client'])
+
+
+def log_summary(result):
+    logger.info(f"---- Summary {result['client']} ({result['schema']}) ----")
+    logger.info(f"Created : {result['created']}")
+    logger.info(f"Skipped : {result['skipped']}")
+    logger.info(f"Migrated: {result['migrated']}")
+    logger.info(f"Altered : {result['altered']}")
+    logger.info(f"Inserted: {result['inserted']}")
+    logger.info(f"Errors  : {result['errors']}")
+    logger.info(f"Duration: {result['duration_s']}s")
+
+
+def log_batch_summary(results):
+    logger.info("---- Batch summary ----")
+    logger.info(f"{'CLIENT':<20} {'SCHEMA':<15} {'STATUS':<8} {'CREATED':>7} {'SKIPPED':>7} {'MIGRATED':>8} "
+                f"{'ALTERED':>7} {'INSERTED':>8} {'ERRORS':>6} {'TIME':>7}")
+    for r in results:
+        if 'error' in r:
+            logger.info(f"{r['client']:<20} {'-':<15} {'failed':<8} {r['error']}")
+            continue
+        logger.info(f"{r['client']:<20} {r['schema']:<15} {r['status']:<8} {r['created']:>7} {r['skipped']:>7} {r['migrated']:>8} "
+                    f"{r['altered']:>7} {r['inserted']:>8} {r['errors']:>6} {r['duration_s']:>6}s")
+
+
 def main():
     args = parse_args()
     clients = list_clients()
+    parallel = not args.serial
+
+    # batch mode: no prompt, target schema from each config
+    if args.all or args.clients:
+        selected = clients if args.all else args.clients
+        results = provision_clients(selected, args.replace, args.dry_run, parallel, args.workers, args.migrate)
+        log_batch_summary(results)
+        if any(r['status'] == 'failed' for r in results):
+            sys.exit(1)
+        return
 
     # determine client
     if args.client:
@@ -188,38 +361,9 @@ def main():
     if not args.schema:
         schema = prompt_for_schema(schema)
 
-    replace_flag = args.replace
-    dry_run_flag = args.dry_run
-
-    # execute
-    statements = read_statements()
-    conn = snowflake.connector.connect(
-        user=cfg['user'],
-        password=cfg['password'],
-        account=cfg['account'],
-        warehouse=cfg['warehouse'],
-        database=cfg['database'],
-        role=cfg.get('role', 'SYSADMIN')
-    )
-    try:
-        summary = apply_statements(
-            conn,
-            schema,
-            statements,
-            replace_existing=replace_flag,
-            dry_run=dry_run_flag
-        )
-    finally:
-        conn.close()
-        logger.info("Connection closed.")
-
-    # final report
-    logger.info("---- Summary ----")
-    logger.info(f"Created : {summary['created']}")
-    logger.info(f"Skipped : {summary['skipped']}")
-    logger.info(f"Altered : {summary['altered']}")
-    logger.info(f"Inserted: {summary['inserted']}")
-    logger.info(f"Errors  : {summary['errors']}")
+    # execute + final report
+    result = provision_client(client, schema, args.replace, args.dry_run, parallel, args.migrate)
+    log_summary(result)
 
 if __name__ == '__main__':
     main()
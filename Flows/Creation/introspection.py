@@ -0,0 +1,117 @@
+"""
+Schema introspection cache shared by creation.py, Merge.py and MASTER&id_client.py.
+
+One INFORMATION_SCHEMA query loads every table and column of the requested
+schemas; existence, column and type checks are then answered locally:
+
+    cache = SchemaCache(conn, 'BEE_CENTRAL').load(['CLIENT1'])
+    cache.table_exists('CLIENT1', 'DIM_FERME')
+    cache.columns('CLIENT1', 'DIM_FERME')        # ['ID_FERME', 'NOM_FERME', ...]
+
+Names are matched upper-cased, as Snowflake stores unquoted identifiers.
+"""
+from collections import namedtuple
+
+Column = namedtuple('Column', 'name data_type char_length precision scale nullable default')
+TableInfo = namedtuple('TableInfo', 'row_count last_altered clustering_key')
+
+
+def _in_list(values) -> str:
+    return ", ".join(f"'{str(v).upper()}'" for v in values) or "''"
+
+
+class SchemaCache:
+    def __init__(self, conn, database: str = None):
+        """
+        Args:
+            conn: Snowflake connection
+            database: Database to introspect, the connection's current one by default
+        """
+        self.conn = conn
+        self.database = database
+        self.queries = 0
+        self._tables = {}
+        self._columns = {}
+
+    @property
+    def _info_schema(self):
+        return f"{self.database}.INFORMATION_SCHEMA" if self.database else "INFORMATION_SCHEMA"
+
+    def load(self, schemas, tables=None):
+        """Fetch all tables and columns of `schemas` (optionally only `tables`) in one query."""
+        filters = f"t.TABLE_SCHEMA IN ({_in_list(schemas)})"
+        if tables:
+            filters += f" AND t.TABLE_NAME IN ({_in_list(tables)})"
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"""
+                SELECT t.TABLE_SCHEMA, t.TABLE_NAME, t.ROW_COUNT, t.LAST_ALTERED, t.CLUSTERING_KEY,
+                       c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH,
+                       c.NUMERIC_PRECISION, c.NUMERIC_SCALE, c.IS_NULLABLE, c.COLUMN_DEFAULT
+                  FROM {self._info_schema}.TABLES t
+                  LEFT JOIN {self._info_schema}.COLUMNS c
+                    ON c.TABLE_SCHEMA = t.TABLE_SCHEMA
+                   AND c.TABLE_NAME   = t.TABLE_NAME
+                 WHERE {filters}
+                 ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME, c.ORDINAL_POSITION
+            """)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+        self.queries += 1
+
+        # Forget what was cached for the reloaded scope (dropped tables included)
+        schemas_up = {s.upper() for s in schemas}
+        tables_up = {t.upper() for t in tables} if tables else None
+        for key in [k for k in self._tables if k[0] in schemas_up and (tables_up is None or k[1] in tables_up)]:
+            del self._tables[key]
+            self._columns.pop(key, None)
+        for (schema, table, row_count, last_altered, clustering_key,
+             name, data_type, length, precision, scale, nullable, default) in rows:
+            key = (schema.upper(), table.upper())
+            self._tables[key] = TableInfo(row_count, last_altered, clustering_key)
+            columns = self._columns.setdefault(key, {})
+            if name is not None:
+                columns[name.upper()] = Column(name, data_type, length, precision, scale,
+                                               nullable == 'YES', default)
+        return self
+
+    def table_exists(self, schema: str, table: str) -> bool:
+        return (schema.upper(), table.upper()) in self._tables
+
+    def tables(self, schema: str) -> list:
+        return [t for s, t in self._tables if s == schema.upper()]
+
+    def table_info(self, schema: str, table: str):
+        """TableInfo(row_count, last_altered, clustering_key), None if the table is unknown."""
+        return self._tables.get((schema.upper(), table.upper()))
+
+    def columns(self, schema: str, table: str) -> list:
+        """Column names in ordinal order, empty if the table is unknown."""
+        return [c.name for c in self._columns.get((schema.upper(), table.upper()), {}).values()]
+
+    def column(self, schema: str, table: str, column: str):
+        """Column metadata, None if the column does not exist."""
+        return self._columns.get((schema.upper(), table.upper()), {}).get(column.upper())
+
+    def has_column(self, schema: str, table: str, column: str) -> bool:
+        return self.column(schema, table, column) is not None
+
+    def column_diff(self, schema: str, table: str, expected) -> tuple:
+        """(columns of `expected` missing from the table, table columns not in `expected`)."""
+        expected = [c.upper() for c in expected]
+        actual = self._columns.get((schema.upper(), table.upper()), {})
+        return [c for c in expected if c not in actual], [c for c in actual if c not in expected]
+
+    def mark_created(self, schema: str, table: str, columns=()):
+        """Record a table created since load() without querying again."""
+        key = (schema.upper(), table.upper())
+        self._tables.setdefault(key, TableInfo(0, None, None))
+        cols = self._columns.setdefault(key, {})
+        for name in columns:
+            cols.setdefault(name.upper(), Column(name.upper(), None, None, None, None, True, None))
+
+    def mark_column(self, schema: str, table: str, column: str, data_type: str = None, default=None):
+        """Record a column added since load()."""
+        cols = self._columns.setdefault((schema.upper(), table.upper()), {})
+        cols[column.upper()] = Column(column.upper(), data_type, None, None, None, True, default)
@@ -0,0 +1,114 @@
+"""
+In-place migrations from Tables/Table/create_tables.sql to an existing schema.
+
+The declared column model (Tables/Table/schema.py) is diffed against the live
+columns (introspection.SchemaCache) and turned into the minimal statements
+Snowflake can apply without reloading data:
+
+* declared columns missing from the table  -> ALTER TABLE t ADD COLUMN "C" TYPE, ...
+* a VARCHAR made longer                     -> ALTER TABLE t ALTER COLUMN "C" SET DATA TYPE VARCHAR(n), ...
+* a NUMBER given more precision (same scale)-> ALTER TABLE t ALTER COLUMN "C" SET DATA TYPE NUMBER(p,s), ...
+
+At most one ADD and one ALTER COLUMN statement is emitted per table.
+Declared column names are the names Snowflake stores (quoted names as written,
+unquoted ones upper-cased, see declared_columns()) and are always emitted quoted.
+
+Other type changes (narrowing, NUMBER -> VARCHAR...) cannot be done in place
+and are only reported; extra live columns are never dropped.
+"""
+from Tables.Table.schema import base_type
+
+MAX_VARCHAR = 16777216
+
+NUMBER_TYPES = {'NUMBER', 'DECIMAL', 'NUMERIC', 'INT', 'INTEGER', 'BIGINT', 'SMALLINT', 'TINYINT', 'BYTEINT'}
+TEXT_TYPES = {'VARCHAR', 'CHAR', 'CHARACTER', 'STRING', 'TEXT'}
+FLOAT_TYPES = {'FLOAT', 'FLOAT4', 'FLOAT8', 'DOUBLE', 'REAL', 'DOUBLE PRECISION'}
+TYPE_ALIASES = {'DATETIME': 'TIMESTAMP_NTZ', 'TIMESTAMP': 'TIMESTAMP_NTZ'}
+
+
+def _args(sql_type: str) -> list:
+    if '(' not in sql_type:
+        return []
+    return [int(a) for a in sql_type.split('(', 1)[1].rstrip(')').split(',') if a.strip()]
+
+
+def normalize_declared(sql_type: str) -> tuple:
+    """('NUMBER', p, s), ('TEXT', n), ('FLOAT',), ... for a type of the DDL."""
+    base = base_type(sql_type)
+    args = _args(sql_type)
+    if base in NUMBER_TYPES:
+        if base not in ('NUMBER', 'DECIMAL', 'NUMERIC'):
+            return ('NUMBER', 38, 0)
+        return ('NUMBER', args[0] if args else 38, args[1] if len(args) > 1 else 0)
+    if base in TEXT_TYPES:
+        default = 1 if base in ('CHAR', 'CHARACTER') else MAX_VARCHAR
+        return ('TEXT', args[0] if args else default)
+    if base in FLOAT_TYPES:
+        return ('FLOAT',)
+    return (TYPE_ALIASES.get(base, base),)
+
+
+def normalize_live(column) -> tuple:
+    """Same shape as normalize_declared() for an introspection.Column."""
+    data_type = (column.data_type or '').upper()
+    if data_type in NUMBER_TYPES:
+        return ('NUMBER', column.precision or 38, column.scale or 0)
+    if data_type in TEXT_TYPES:
+        return ('TEXT', column.char_length or MAX_VARCHAR)
+    if data_type in FLOAT_TYPES:
+        return ('FLOAT',)
+    return (TYPE_ALIASES.get(data_type, data_type),)
+
+
+def _sql_type(normalized: tuple) -> str:
+    if normalized[0] == 'NUMBER':
+        return f"NUMBER({normalized[1]},{normalized[2]})"
+    if normalized[0] == 'TEXT':
+        return f"VARCHAR({normalized[1]})"
+    return normalized[0]
+
+
+def declared_columns(stmt) -> dict:
+    """{COLUMN: TYPE} of a parsed CREATE TABLE, named as Snowflake stores the columns."""
+    return {name if name in stmt.quoted else name.upper(): sql_type
+            for name, sql_type in stmt.columns.items()}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def diff_table(cache, schema: str, table: str, declared: dict) -> tuple:
+    """
+    Statements migrating an existing `table` to its `declared` {COLUMN: TYPE}
+    (see declared_columns()), and warnings for the differences that cannot be
+    applied in place.
+    """
+    adds, widens, warnings = [], [], []
+    for name, sql_type in declared.items():
+        live = cache.column(schema, table, name)
+        if live is None:
+            adds.append(f"{_quote(name)} {sql_type}")
+            continue
+        if live.data_type is None:
+            # Column recorded by mark_created/mark_column, type unknown
+            continue
+        want, have = normalize_declared(sql_type), normalize_live(live)
+        if want == have:
+            continue
+        widen_text = want[0] == have[0] == 'TEXT' and want[1] > have[1]
+        widen_number = want[0] == have[0] == 'NUMBER' and want[2] == have[2] and want[1] > have[1]
+        if widen_text or widen_number:
+            widens.append(f"COLUMN {_quote(name)} SET DATA TYPE {_sql_type(want)}")
+        elif want[0] == have[0] == 'TEXT' or (want[0] == have[0] == 'NUMBER' and want[2] == have[2]):
+            # Live column already wider than declared: nothing to do
+            continue
+        else:
+            warnings.append(f"{table}.{name}: {_sql_type(have)} -> {_sql_type(want)} needs a reload")
+
+    statements = []
+    if adds:
+        statements.append(f"ALTER TABLE {table} ADD COLUMN {', '.join(adds)}")
+    if widens:
+        statements.append(f"ALTER TABLE {table} ALTER {', '.join(widens)}")
+    return statements, warnings
@@ -0,0 +1,206 @@
+"""
+Snowflake connection pooling shared by the ETL flow, creation.py and Merge.py,
+and per-warehouse concurrency slots.
+
+A pool hands out at most `max_size` live connections and keeps returned ones
+open for the next checkout, so a flow run logs in once per concurrent worker
+instead of once per table:
+
+    pool = client_pool('Client1')
+    with pool.connection() as conn:
+        conn.cursor().execute("SELECT 1")
+    pool.close()
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+import snowflake.connector
+from snowflake.connector.errors import OperationalError
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+_SLOTS = {}
+
+
+class SnowflakePool:
+    def __init__(self, factory, max_size: int = 4, name: str = 'snowflake'):
+        """
+        Args:
+            factory: Callable returning a new snowflake connection
+            max_size: Maximum number of open connections (checkouts block beyond it)
+            name: Label used in metrics and logs
+        """
+        self.factory = factory
+        self.max_size = max(1, int(max_size))
+        self.name = name
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        # Metrics
+        self.created = 0
+        self.checkouts = 0
+        self.reuses = 0
+        self.discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self):
+        """Check a connection out; hand it back with release()."""
+        started = time.perf_counter()
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool '{self.name}' is closed")
+                if self._idle:
+                    conn, reused = self._idle.pop(), True
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, reused = None, False
+                    break
+                self._cond.wait()
+
+        if conn is None:
+            try:
+                conn = self.factory()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        waited = time.perf_counter() - started
+        with self._cond:
+            self.checkouts += 1
+            if reused:
+                self.reuses += 1
+            else:
+                self.created += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        with self._cond:
+            if broken or self._closed or conn.is_closed():
+                self._size -= 1
+                self.discarded += 1
+                discard = True
+            else:
+                self._idle.append(conn)
+                discard = False
+            self._cond.notify()
+        if discard:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the `with` block."""
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except OperationalError:
+            # Network/session failures: do not hand this connection out again
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def close(self):
+        """Close idle connections; connections still checked out close on return."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'pool': self.name,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'created': self.created,
+                'checkouts': self.checkouts,
+                'reuses': self.reuses,
+                'discarded': self.discarded,
+                'checkout_ms_avg': round(1000 * self._wait_total / self.checkouts, 2) if self.checkouts else 0.0,
+                'checkout_ms_max': round(1000 * self._wait_max, 2),
+            }
+
+    def log_stats(self):
+        s = self.stats()
+        print(f"🔌 Pool {s['pool']}: {s['created']} login(s), {s['checkouts']} checkout(s), "
+              f"{s['reuses']} reuse(s), max {s['max_size']}, "
+              f"checkout avg {s['checkout_ms_avg']} ms / max {s['checkout_ms_max']} ms")
+
+
+def _get_pool(key, factory, max_size: int, name: str) -> SnowflakePool:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None or pool._closed:
+            pool = SnowflakePool(factory, max_size=max_size, name=name)
+            _POOLS[key] = pool
+        return pool
+
+
+def client_pool(client: str, max_size: int = None) -> SnowflakePool:
+    """
+    Pool of connections built from the client config (infra.config).
+    `max_size` defaults to `etl.max_workers`.
+    """
+    from infra.config import get_snowflake_conn, load_config
+
+    if max_size is None:
+        max_size = int(load_config(client).get('etl', {}).get('max_workers') or 4)
+    return _get_pool(('client', client), lambda: get_snowflake_conn(client), max_size, client)
+
+
+def params_pool(params: dict, max_size: int = 4, name: str = None, shared: bool = True) -> SnowflakePool:
+    """
+    Pool of connections opened with `snowflake.connector.connect(**params)`.
+    Shared pools are cached per connection parameters; with `shared=False`
+    the pool belongs to the caller alone, who may close it without affecting
+    other users of the same credentials.
+    """
+    name = name or f"{params.get('user')}@{params.get('account')}"
+    factory = lambda: snowflake.connector.connect(**params)
+    if not shared:
+        return SnowflakePool(factory, max_size=max_size, name=name)
+    key = ('params',) + tuple(sorted((k, str(v)) for k, v in params.items()))
+    return _get_pool(key, factory, max_size, name)
+
+
+def close_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+
+@contextmanager
+def warehouse_slot(warehouse: str, limit: int):
+    """
+    Hold one of the `limit` concurrent slots of a warehouse for the `with` block.
+    The limit is fixed by the first caller for a given warehouse in the process.
+    """
+    with _POOLS_LOCK:
+        slot = _SLOTS.get(warehouse)
+        if slot is None:
+            slot = _SLOTS[warehouse] = threading.BoundedSemaphore(max(1, int(limit)))
+    with slot:
+        yield
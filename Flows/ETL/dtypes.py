@@ -0,0 +1,240 @@
+"""
+Typed and memory-compact dtypes for extracted frames.
+
+Right after read_sql, the columns a query's table declares in
+Tables/Table/create_tables.sql are cast to their final dtype (matched
+case-insensitively): NUMBER(p,0) and integers to nullable Int64, NUMBER(p,s)
+and floats to float64, VARCHAR to string, DATE/TIMESTAMP to datetime64 and
+BOOLEAN to boolean. A column whose values do not fit keeps its read dtype and
+is left to the load path.
+
+Every column is then narrowed, in place:
+
+* low-cardinality strings (distinct values / rows <= `max_category_ratio`)
+  become categoricals;
+* integers are downcast to the smallest signed type holding their values;
+* floats become float32 only when that is lossless.
+
+Date and watermark columns are not compacted. The
+dtypes chosen for each table and its size before and after are recorded in
+State/<client>/dtypes.json. Settings come from the client config:
+
+    etl:
+      compact_dtypes:
+        enabled: true
+        max_category_ratio: 0.5
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Tables.Queries.queries import DATE_COLS, WATERMARK_COLS
+from Tables.Table.schema import column_types, date_columns, base_type, DATE_TYPES
+from Flows.ETL.state import state_path, read_json, update_json
+from Flows.ETL.staging import INTEGER_TYPES, FLOAT_TYPES, STRING_TYPES, to_text
+
+DEFAULT_COMPACT_DTYPES = {
+    'enabled': True,
+    'max_category_ratio': 0.5,
+}
+
+
+def settings_from_config(cfg: dict):
+    """Compaction settings of a client config, None when disabled."""
+    settings = {**DEFAULT_COMPACT_DTYPES, **(cfg.get('etl', {}).get('compact_dtypes') or {})}
+    return settings if settings['enabled'] else None
+
+
+def _path(client: str) -> str:
+    return state_path(client, 'dtypes.json')
+
+
+def get_dtypes(client: str) -> dict:
+    return read_json(_path(client))
+
+
+DATETIME_DTYPE = 'datetime64[ns]'
+
+
+def to_datetime(series: pd.Series) -> pd.Series:
+    """
+    Convert one column to native datetime64, whatever its source representation.
+    Numeric columns are epoch timestamps (ns, ms or s) or YYYYMMDD integers.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return pd.to_datetime(series, errors='coerce')
+
+    non_null = series.dropna()
+    if non_null.empty:
+        return pd.to_datetime(series, errors='coerce')
+    sample_value = non_null.iloc[0]
+    if sample_value <= 0:
+        # Zero or negative, no usable date
+        return pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    if sample_value > 1e15:  # Nanoseconds since epoch
+        return pd.to_datetime(series, unit='ns', errors='coerce')
+    if sample_value > 1e12:  # Milliseconds
+        return pd.to_datetime(series, unit='ms', errors='coerce')
+    if sample_value > 1e9:   # Seconds
+        return pd.to_datetime(series, unit='s', errors='coerce')
+    if 19000000 <= sample_value <= 21001231:  # YYYYMMDD format
+        return pd.to_datetime(series.astype('Int64').astype(str), format='%Y%m%d', errors='coerce')
+    return pd.to_datetime(series, errors='coerce')
+
+
+def pandas_dtype(sql_type: str):
+    """Pandas dtype for a declared Snowflake type, None when it should be inferred."""
+    base = base_type(sql_type)
+    if base == 'NUMBER':
+        # NUMBER and NUMBER(p,0) are integers, NUMBER(p,s) with s > 0 are decimals
+        scale = sql_type.rstrip(')').split(',')[1] if ',' in sql_type else '0'
+        return 'Int64' if int(scale) == 0 else 'float64'
+    if base in INTEGER_TYPES:
+        return 'Int64'
+    if base in FLOAT_TYPES:
+        return 'float64'
+    if base in STRING_TYPES:
+        return 'string'
+    if base in DATE_TYPES:
+        return DATETIME_DTYPE
+    if base == 'BOOLEAN':
+        return 'boolean'
+    return None
+
+
+def read_dtypes(source: str) -> dict:
+    """{COLUMN: pandas dtype} of the columns the table of `source` declares."""
+    dtypes = {}
+    for col, sql_type in column_types(source).items():
+        dtype = pandas_dtype(sql_type)
+        if dtype:
+            dtypes[col] = dtype
+    return dtypes
+
+
+def _has_dtype(series: pd.Series, dtype: str) -> bool:
+    """True when `series` is already of the family of `dtype` (possibly compacted)."""
+    if dtype == 'Int64':
+        return pd.api.types.is_integer_dtype(series.dtype)
+    if dtype == 'float64':
+        return pd.api.types.is_float_dtype(series.dtype)
+    if dtype == 'string':
+        return isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype))
+    if dtype == DATETIME_DTYPE:
+        return pd.api.types.is_datetime64_any_dtype(series.dtype)
+    return pd.api.types.is_bool_dtype(series.dtype)
+
+
+def _cast(series: pd.Series, dtype: str) -> pd.Series:
+    if dtype == DATETIME_DTYPE:
+        return to_datetime(series)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if dtype in ('Int64', 'float64'):
+        # Decimal and numeric strings become numbers; other text raises
+        return pd.to_numeric(series).astype(dtype)
+    if dtype == 'string':
+        # Whole floats (nullable numeric sources) are written '1234', not '1234.0'
+        return to_text(series)
+    return series.astype(dtype)
+
+
+def apply_read_dtypes(df: pd.DataFrame, source: str) -> list:
+    """
+    Cast in place the columns of `df` declared for `source` to their DDL dtype.
+    Returns the columns left as read because their values do not fit.
+    """
+    dtypes = read_dtypes(source)
+    failed = []
+    for position, col in enumerate(df.columns):
+        dtype = dtypes.get(str(col).upper())
+        if not dtype:
+            continue
+        series = df.iloc[:, position]
+        if _has_dtype(series, dtype):
+            continue
+        try:
+            df.isetitem(position, _cast(series, dtype))
+        except (ValueError, TypeError, OverflowError):
+            failed.append(col)
+    return failed
+
+
+def _kept_columns(source: str) -> set:
+    """Upper-cased columns of `source` that must keep their extracted dtype."""
+    date_cols = DATE_COLS.get(source.upper(), [])
+    if isinstance(date_cols, str):
+        date_cols = [date_cols]
+    kept = {c.upper() for c in date_columns(source)} | {c.upper() for c in date_cols}
+    if WATERMARK_COLS.get(source.upper()):
+        kept.add(WATERMARK_COLS[source.upper()].upper())
+    return kept
+
+
+def _is_text(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.StringDtype):
+        return True
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+
+def compact_series(series: pd.Series, max_category_ratio: float = 0.5) -> pd.Series:
+    """Narrowest lossless representation of one column (the series itself if none)."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        narrow = values.astype(np.float32)
+        finite = np.isfinite(values)
+        if np.array_equal(narrow[finite].astype(np.float64), values[finite]) and np.array_equal(
+                np.isnan(narrow), np.isnan(values)):
+            return series.astype(pd.Float32Dtype() if isinstance(dtype, pd.Float64Dtype) else np.float32)
+        return series
+    if _is_text(series):
+        count = series.count()
+        if count and series.nunique() <= count * max_category_ratio:
+            return series.astype('category')
+    return series
+
+
+def compact_frame(df: pd.DataFrame, source: str, max_category_ratio: float = 0.5) -> tuple:
+    """
+    Compact the columns of `df` in place (date columns of `source` excepted).
+    Returns (bytes before, bytes after), strings counted deeply.
+    """
+    before = int(df.memory_usage(index=False, deep=True).sum())
+    kept = _kept_columns(source)
+    for position, col in enumerate(df.columns):
+        if str(col).upper() in kept:
+            continue
+        series = df.iloc[:, position]
+        compacted = compact_series(series, max_category_ratio)
+        if compacted.dtype != series.dtype:
+            df.isetitem(position, compacted)
+    after = int(df.memory_usage(index=False, deep=True).sum())
+    return before, after
+
+
+def record_dtypes(client: str, frames: dict):
+    """Record the dtypes and compaction sizes of the extracted `frames` of `client`."""
+    if not frames:
+        return
+
+    def update(data):
+        for source, df in frames.items():
+            sizes = df.attrs.get('compaction') or {}
+            data[source.upper()] = {
+                'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+                'bytes_before': sizes.get('bytes_before'),
+                'bytes_after': sizes.get('bytes_after'),
+                'updated': datetime.now().isoformat(timespec='seconds'),
+            }
+        return data
+    update_json(_path(client), update)
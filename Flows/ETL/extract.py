@@ -1,25 +1,32 @@
 import os
+import time
 import yaml
 import pandas as pd
 from sqlalchemy import create_engine
 from urllib.parse import quote_plus
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from Tables.Queries.queries import DEFAULT_START_DATES
+from Flows.ETL.extract_cache import ExtractCache
+from Flows.ETL.dtypes import apply_read_dtypes, compact_frame, record_dtypes, settings_from_config
+from Flows.ETL.instrumentation import NULL_RUN, current
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def extract_data(client: str, queries: dict, start_date: str = None, end_date: str = None) -> dict:
+def _load_client_config(client: str) -> dict:
     project_root = os.environ.get('PROJECT_ROOT')
     if not project_root:
         raise EnvironmentError("PROJECT_ROOT environment variable not set")
-    
+
     config_path = os.path.join(project_root, 'Clients', client, 'config.yml')
     if not os.path.isfile(config_path):
         raise FileNotFoundError(f"Config not found: {config_path}")
 
     with open(config_path, 'r', encoding='utf-8') as f:
-        cfg = yaml.safe_load(f)
+        return yaml.safe_load(f)
 
+def _source_engine(cfg: dict, pool_size: int = 5):
     db = cfg['source_db']
     driver = db['driver'].strip('{}')
     trusted = str(db.get('trusted_connection', False)).lower() in ['yes', 'true', '1']
@@ -29,13 +36,178 @@ def extract_data(client: str, queries: dict, start_date: str = None, end_date: s
     else:
         conn_str = f"mssql+pyodbc://{db['username']}:{db['password']}@{db['server']}/{db['database']}?driver={quote_plus(driver)}"
 
-    engine = create_engine(conn_str)
-    data = {}
-    for name, sql in queries.items():
-        query = sql
-        if start_date and end_date:
-            query = sql.replace('{start_date}', start_date).replace('{end_date}', end_date)
-        logger.info(f"📤 Extracting: {name}")
-        data[name] = pd.read_sql(query, engine)
-    engine.dispose()
+    # Pool sized to the number of concurrent readers, no overflow connections
+    return create_engine(conn_str, pool_size=pool_size, max_overflow=0, pool_pre_ping=True)
+
+def _render_query(sql: str, start_date: str = None, end_date: str = None, name: str = None) -> str:
+    """
+    Substitute the {start_date}/{end_date} placeholders of a query.
+    Without an explicit start date, the query's DEFAULT_START_DATES entry is used.
+    """
+    start_date = start_date or DEFAULT_START_DATES.get(name)
+    if start_date:
+        sql = sql.replace('{start_date}', start_date)
+    if end_date:
+        sql = sql.replace('{end_date}', end_date)
+    return sql
+
+def _apply_dtypes(name: str, df: pd.DataFrame, run=NULL_RUN):
+    with run.span(name, 'dtypes', rows=len(df)):
+        failed = apply_read_dtypes(df, name)
+    if failed:
+        run.count(name, 'untyped_columns', len(failed))
+        logger.warning(f"⚠️ {name}: {failed} do not fit their declared type, kept as read")
+
+def _compact(name: str, df: pd.DataFrame, compact: dict, run=NULL_RUN):
+    with run.span(name, 'compact', rows=len(df)):
+        before, after = compact_frame(df, name, compact['max_category_ratio'])
+    df.attrs['compaction'] = {'bytes_before': before, 'bytes_after': after}
+    run.count(name, 'bytes_compacted', before - after)
+    logger.info(f"   🗜️  {name}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB after dtype compaction")
+
+def _read_query(engine, name: str, query: str, cache: ExtractCache = None, window: tuple = (None, None),
+                run=NULL_RUN, compact: dict = None):
+    logger.info(f"📤 Extracting: {name}")
+    started = time.perf_counter()
+    with run.span(name, 'extract') as span:
+        df = cache.get(name, query, *window) if cache else None
+        if df is None:
+            df = pd.read_sql(query, engine, coerce_float=True)
+            _apply_dtypes(name, df, run)
+            if compact:
+                # Before snapshotting: categoricals are stored as Parquet dictionaries
+                _compact(name, df, compact, run)
+            if cache:
+                with run.span(name, 'cache_write'):
+                    cache.put(name, query, df, *window)
+        else:
+            run.count(name, 'cache_hits')
+            # Snapshots are typed already unless written by an older version
+            _apply_dtypes(name, df, run)
+            if compact:
+                _compact(name, df, compact, run)
+        span.rows, span.bytes = len(df), run.frame_bytes(name, df)
+    elapsed = time.perf_counter() - started
+    df.attrs['extract_seconds'] = round(elapsed, 3)
+    logger.info(f"   ⏱️  {name}: {len(df)} rows in {elapsed:.2f}s")
+    return df
+
+def read_queries(engine, queries: dict, start_date: str = None, end_date: str = None,
+                 max_workers: int = 1, start_dates: dict = None, cache: ExtractCache = None,
+                 run=NULL_RUN, compact: dict = None) -> dict:
+    """
+    Run every query on `engine`, up to `max_workers` at a time.
+
+    Queries are independent, so each one runs on its own pooled connection;
+    the result dict keeps the order of `queries` and every frame carries its
+    wall time in `attrs['extract_seconds']`. `start_dates` overrides
+    `start_date` per query name (incremental watermarks). With a `cache`
+    (Flows/ETL/extract_cache.py), fresh snapshots are replayed instead of
+    querying the source and new results are snapshotted. Each query is
+    recorded as an 'extract' span of `run` (Flows/ETL/instrumentation.py).
+    Columns are cast to the dtypes their table declares in create_tables.sql.
+    With `compact` settings (Flows/ETL/dtypes.py), frames are narrowed to
+    compact dtypes and carry their sizes in `attrs['compaction']`.
+    """
+    start_dates = start_dates or {}
+    windows = {
+        name: (start_dates.get(name) or start_date or DEFAULT_START_DATES.get(name), end_date)
+        for name in queries
+    }
+    rendered = {
+        name: _render_query(sql, windows[name][0], end_date, name)
+        for name, sql in queries.items()
+    }
+    started = time.perf_counter()
+    if max_workers <= 1:
+        data = {name: _read_query(engine, name, query, cache, windows[name], run, compact)
+                for name, query in rendered.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='extract') as pool:
+            futures = {name: pool.submit(_read_query, engine, name, query, cache, windows[name], run, compact)
+                       for name, query in rendered.items()}
+            data = {name: future.result() for name, future in futures.items()}
+
+    total = time.perf_counter() - started
+    slowest = sorted(data.items(), key=lambda kv: kv[1].attrs['extract_seconds'], reverse=True)
+    logger.info(f"⏱️  Extracted {len(data)} queries in {total:.2f}s with {max_workers} worker(s)")
+    if cache:
+        logger.info(f"   💾 Extract cache: {cache.hits} replayed, {cache.misses} queried")
+    if compact:
+        sizes = [df.attrs['compaction'] for df in data.values()]
+        before = sum(s['bytes_before'] for s in sizes)
+        after = sum(s['bytes_after'] for s in sizes)
+        logger.info(f"   🗜️  Dtype compaction: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    for name, df in slowest:
+        logger.info(f"   {name:<22} {df.attrs['extract_seconds']:>8.2f}s  {len(df):>10} rows")
+    return data
+
+def extract_data(client: str, queries: dict, start_date: str = None, end_date: str = None,
+                 max_workers: int = None, start_dates: dict = None) -> dict:
+    """
+    Extract every query for `client` into DataFrames keyed by query name.
+    `max_workers` defaults to `etl.max_workers` from the client config.
+    Results go through the client's extract cache unless `etl.extract_cache`
+    is disabled; the engine only connects for queries not replayed from it.
+    Frames are compacted unless `etl.compact_dtypes` is disabled, the chosen
+    dtypes being recorded in State/<client>/dtypes.json.
+    """
+    cfg = _load_client_config(client)
+    if max_workers is None:
+        max_workers = int(cfg.get('etl', {}).get('max_workers') or 1)
+    max_workers = max(1, min(max_workers, len(queries) or 1))
+
+    engine = _source_engine(cfg, pool_size=max_workers)
+    compact = settings_from_config(cfg)
+    try:
+        data = read_queries(engine, queries, start_date, end_date, max_workers, start_dates,
+                            ExtractCache.from_config(client, cfg), current(client), compact)
+    finally:
+        engine.dispose()
+    if compact:
+        record_dtypes(client, data)
     return data
+
+def _typed_chunks(name: str, chunks, run=NULL_RUN):
+    for chunk in chunks:
+        _apply_dtypes(name, chunk, run)
+        yield chunk
+
+def extract_chunks(client: str, name: str, sql: str, chunk_size: int,
+                   start_date: str = None, end_date: str = None):
+    """
+    Stream one query as DataFrames of at most `chunk_size` rows, typed from
+    the DDL like batch extractions so every chunk has the same dtypes.
+
+    Results are read through an unbuffered (server-side) cursor so only one
+    chunk is held in memory at a time; the engine is disposed once the
+    generator is exhausted or closed. A fresh snapshot of the extract cache is
+    replayed chunk by chunk instead; otherwise the stream is snapshotted as
+    it is read.
+    """
+    cfg = _load_client_config(client)
+    run = current(client)
+    cache = ExtractCache.from_config(client, cfg)
+    query = _render_query(sql, start_date, end_date, name)
+    window = (start_date or DEFAULT_START_DATES.get(name), end_date)
+    replay = cache.iter_chunks(name, query, chunk_size, *window) if cache else None
+    if replay is not None:
+        for i, chunk in enumerate(run.timed_iter(replay, name, 'extract'), start=1):
+            logger.info(f"   📦 {name}: cached chunk {i} ({len(chunk)} rows)")
+            _apply_dtypes(name, chunk, run)
+            yield chunk
+        return
+
+    engine = _source_engine(cfg, pool_size=1)
+    logger.info(f"📤 Streaming: {name} (chunks of {chunk_size} rows)")
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_size)
+            chunks = _typed_chunks(name, pd.read_sql(query, conn, chunksize=chunk_size, coerce_float=True), run)
+            if cache:
+                chunks = cache.tee_chunks(name, query, chunks, *window)
+            for i, chunk in enumerate(run.timed_iter(chunks, name, 'extract'), start=1):
+                logger.info(f"   📦 {name}: chunk {i} ({len(chunk)} rows)")
+                yield chunk
+    finally:
+        engine.dispose()
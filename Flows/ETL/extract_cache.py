@@ -0,0 +1,194 @@
+"""
+Local Parquet cache of SQL Server extractions, so reruns replay from disk.
+
+Every query result is written to
+State/cache/<client>/<QUERY>/<window>_<sql hash>.parquet, the window being
+the {start_date}/{end_date} values the query was rendered with and the hash
+covering the rendered SQL text. A rerun within `ttl_hours` (e.g. after a
+failed load) reads the snapshot instead of querying the source again; the
+oldest snapshots are evicted once the client's cache exceeds `max_mb`.
+The flow clears a client's cache after a run where every load succeeded.
+
+Settings come from the client config:
+
+    etl:
+      extract_cache:
+        enabled: true
+        ttl_hours: 12     # snapshots older than this are ignored and evicted
+        max_mb: 2048      # per-client size limit
+"""
+import os
+import glob
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from Flows.ETL.state import state_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACT_CACHE = {
+    'enabled': True,
+    'ttl_hours': 12,
+    'max_mb': 2048,
+}
+
+
+def cache_dir(client: str) -> str:
+    return state_path('cache', client)
+
+
+def clear_cache(client: str):
+    """Remove every snapshot of `client`."""
+    shutil.rmtree(cache_dir(client), ignore_errors=True)
+
+
+def _remove(path: str):
+    # Snapshots may be evicted by several extraction threads at once
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _tmp_path(path: str) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _window(start_date: str = None, end_date: str = None) -> str:
+    return f"{start_date or 'default'}-{end_date or 'open'}"
+
+
+class ExtractCache:
+    def __init__(self, client: str, ttl_hours: float = 12, max_mb: float = 2048):
+        """
+        Args:
+            client: Client name (one cache directory per client)
+            ttl_hours: Age after which a snapshot is stale
+            max_mb: Size limit of the client's snapshots
+        """
+        self.client = client
+        self.ttl = float(ttl_hours) * 3600
+        self.max_bytes = int(float(max_mb) * 1e6)
+        self.root = cache_dir(client)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, client: str, cfg: dict):
+        """Cache of `client` from its config, None when disabled."""
+        settings = {**DEFAULT_EXTRACT_CACHE, **(cfg.get('etl', {}).get('extract_cache') or {})}
+        if not settings['enabled']:
+            return None
+        return cls(client, settings['ttl_hours'], settings['max_mb'])
+
+    def path(self, name: str, sql: str, start_date: str = None, end_date: str = None) -> str:
+        digest = hashlib.sha1(sql.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.root, name.upper(), f"{_window(start_date, end_date)}_{digest}.parquet")
+
+    def _fresh(self, path: str) -> bool:
+        return os.path.isfile(path) and time.time() - os.path.getmtime(path) <= self.ttl
+
+    def get(self, name: str, sql: str, start_date: str = None, end_date: str = None):
+        """Cached frame of this query and window, None if missing or stale."""
+        path = self.path(name, sql, start_date, end_date)
+        if not self._fresh(path):
+            self.misses += 1
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"⚠️ Unreadable snapshot {path}, querying the source: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        df.attrs['cached'] = True
+        logger.info(f"   💾 {name}: {len(df)} rows replayed from {os.path.relpath(path, self.root)}")
+        return df
+
+    def put(self, name: str, sql: str, df: pd.DataFrame, start_date: str = None, end_date: str = None):
+        """Snapshot `df`; frames Parquet cannot represent are simply not cached."""
+        path = self.path(name, sql, start_date, end_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = _tmp_path(path)
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"⚠️ {name} not cached: {e}")
+            _remove(tmp)
+            return
+        self.evict()
+
+    def iter_chunks(self, name: str, sql: str, chunk_size: int, start_date: str = None, end_date: str = None):
+        """Cached chunks of this query and window, None if missing or stale."""
+        path = self.path(name, sql, start_date, end_date)
+        if not self._fresh(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(f"   💾 {name}: replaying chunks from {os.path.relpath(path, self.root)}")
+        return (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+
+    def tee_chunks(self, name: str, sql: str, chunks, start_date: str = None, end_date: str = None):
+        """
+        Yield `chunks` unchanged while appending them to a snapshot, which is
+        only kept if the stream is consumed to the end. Chunks are cast to the
+        schema of the first one; if one cannot be, caching is abandoned.
+        """
+        path = self.path(name, sql, start_date, end_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = _tmp_path(path)
+        writer, schema = None, None
+        try:
+            for chunk in chunks:
+                if tmp is not None:
+                    try:
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                        if writer is None:
+                            schema = table.schema
+                            writer = pq.ParquetWriter(tmp, schema)
+                        writer.write_table(table.cast(schema))
+                    except Exception as e:
+                        logger.warning(f"⚠️ {name} not cached: {e}")
+                        if writer is not None:
+                            writer.close()
+                            writer = None
+                        _remove(tmp)
+                        tmp = None
+                yield chunk
+            if writer is not None:
+                writer.close()
+                writer = None
+                os.replace(tmp, path)
+                self.evict()
+        finally:
+            if writer is not None:
+                writer.close()
+            if tmp is not None:
+                _remove(tmp)
+
+    def evict(self):
+        """Drop stale snapshots, then the oldest ones until under the size limit."""
+        files = []
+        for path in glob.glob(os.path.join(self.root, '*', '*.parquet')):
+            try:
+                if not self._fresh(path):
+                    _remove(path)
+                    continue
+                files.append((os.path.getmtime(path), os.path.getsize(path), path))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+            logger.info(f"   🧹 Evicted {os.path.relpath(path, self.root)} ({size / 1e6:.1f} MB)")
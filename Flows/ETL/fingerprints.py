@@ -0,0 +1,76 @@
+"""
+Per-client, per-table content fingerprints to skip reloading unchanged tables.
+
+A fingerprint is the row count of an extracted frame plus an order-independent
+hash of its content (sum of `pd.util.hash_pandas_object` row hashes) and of its
+column names. After a successful full load it is stored with the number of
+rows written in State/<client>/fingerprints.json; when the next extraction
+gives the same fingerprint and the target still holds that many rows, the
+table's transform and load are skipped.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Flows.ETL.state import state_path, read_json, update_json
+
+
+def _path(client: str) -> str:
+    return state_path(client, 'fingerprints.json')
+
+
+def get_fingerprints(client: str) -> dict:
+    return read_json(_path(client))
+
+
+def _hash_sum(hashes) -> str:
+    # uint64 addition wraps around, which keeps the sum exact modulo 2**64
+    return f"{int(np.sum(np.asarray(hashes, dtype=np.uint64), dtype=np.uint64)):016x}"
+
+
+def compute_fingerprint(df: pd.DataFrame) -> dict:
+    """{'rows', 'hash', 'columns'} of a raw extracted frame; row order does not matter."""
+    columns = pd.Index([str(c).strip().upper() for c in df.columns])
+    return {
+        'rows': int(len(df)),
+        'hash': _hash_sum(pd.util.hash_pandas_object(df, index=False).to_numpy()),
+        'columns': _hash_sum(pd.util.hash_pandas_object(columns).to_numpy()),
+    }
+
+
+def is_unchanged(client: str, source: str, fingerprint: dict, target_rows=None) -> bool:
+    """
+    True when `fingerprint` equals the one of the last successful load of
+    `source`. With `target_rows` (current row count of the target table), the
+    target must also still hold the rows that load wrote.
+    """
+    entry = get_fingerprints(client).get(source.upper())
+    if not entry or not fingerprint:
+        return False
+    if any(entry.get(k) != fingerprint[k] for k in ('rows', 'hash', 'columns')):
+        return False
+    return target_rows is None or entry.get('loaded_rows') == target_rows
+
+
+def save_fingerprint(client: str, source: str, fingerprint: dict, loaded_rows: int = None):
+    """Record the fingerprint of a successful full load of `source`."""
+    if not fingerprint:
+        return
+
+    def update(data):
+        data[source.upper()] = dict(
+            fingerprint,
+            loaded_rows=loaded_rows,
+            updated=datetime.now().isoformat(timespec='seconds'),
+        )
+        return data
+    update_json(_path(client), update)
+
+
+def clear_fingerprint(client: str, source: str):
+    """Forget `source`, e.g. after an incremental load changed its target."""
+    def update(data):
+        data.pop(source.upper(), None)
+        return data
+    update_json(_path(client), update)
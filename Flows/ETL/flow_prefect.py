@@ -16,10 +16,19 @@ except ImportError:
     print("⚠️  questionary non disponible - mode interactif désactivé")
 
 from prefect import flow, task
-from Flows.ETL.extract import extract_data
-from Flows.ETL.transform import transform_data
-from Flows.ETL.load import load_data
+from Flows.ETL.extract import extract_data, extract_chunks
+from Flows.ETL.transform import transform_frame, transform_chunks
+from Flows.ETL.load import load_data, load_chunks, load_targets
+from Flows.ETL.connections import client_pool, warehouse_slot
+from Flows.ETL.scheduler import run_clients
+from Flows.ETL.watermarks import (
+    DEFAULT_LOOKBACK_DAYS, compute_watermark, is_incremental, save_watermark, start_date_for
+)
+from Flows.ETL.fingerprints import compute_fingerprint, is_unchanged, save_fingerprint, clear_fingerprint
+from Flows.ETL.extract_cache import clear_cache
+from Flows.ETL.instrumentation import start_run, finish_run, current
 from Tables.Queries.queries import QUERIES
+from infra.config import load_config
 
 # Table mapping based on the SQL schema structure
 TABLE_MAPPING = {
@@ -40,63 +49,261 @@ TABLE_MAPPING = {
     'FACT_POINTAGE': 'fact_pointage'
 }
 
+# Tables loaded at once per warehouse when etl.load_concurrency is not configured
+DEFAULT_LOAD_CONCURRENCY = 4
+
 @task
-def extract_task(client: str):
+def extract_task(client: str, start_dates: dict = None):
     """
-    Extract raw data for a given client in full mode (dates ignored).
+    Extract raw data for a given client.
+    `start_dates` maps query names to their incremental lower bound.
     """
-    return extract_data(client, QUERIES)
+    return extract_data(client, QUERIES, start_dates=start_dates)
 
 @task
-def transform_task(raw: dict):
+def transform_task(source_name: str, df, client: str = None):
     """
-    Clean and transform raw data into DataFrames keyed by source name.
+    Clean and transform the raw DataFrame of one source (in place).
     """
-    return transform_data(raw)
+    return transform_frame(source_name, df, current(client))
 
 @task
-def load_task(df, client: str):
+def load_task(df, client: str, pool=None, warehouse: str = None, concurrency: int = 1,
+              mode: str = 'full', watermark: str = None, fingerprint: dict = None,
+              start_date: str = None, targets=None):
     """
-    Load a DataFrame into Snowflake (full mode only).
+    Load a DataFrame into Snowflake ('full' replace, or 'incremental' replacement
+    of the rows extracted since `start_date`).
+    At most `concurrency` loads run at once on the same warehouse.
+    The table watermark and content fingerprint are recorded only once the
+    load succeeded; an incremental load forgets the fingerprint of its table.
     """
-    load_data(df, client, mode='full')
+    with warehouse_slot(warehouse or client, concurrency):
+        rows = load_data(df, client, mode=mode, pool=pool, start_date=start_date, targets=targets)
+    save_watermark(client, df.attrs['source'], watermark)
+    if mode == 'full':
+        save_fingerprint(client, df.attrs['source'], fingerprint, rows)
+    else:
+        clear_fingerprint(client, df.attrs['source'])
 
-@flow(name="ETL Flow")
-def etl_flow(client: str, mode: str = "full"):
+def _tracking_watermark(chunks, source_name: str, seen: list):
+    for chunk in chunks:
+        seen.append(compute_watermark(chunk, source_name))
+        yield chunk
+
+@task
+def stream_task(client: str, source_name: str, target_table: str, chunk_size: int, pool=None,
+                warehouse: str = None, concurrency: int = 1, mode: str = 'full', start_date: str = None,
+                targets=None):
     """
-    ETL orchestration flow: extract, transform, and load in full mode.
-    Each query automatically uses its own table name (same as query name).
+    Extract, transform and load one query chunk by chunk.
+    Peak memory is bounded by `chunk_size` rows instead of the table size.
+    """
+    seen = []
+    with warehouse_slot(warehouse or client, concurrency):
+        chunks = extract_chunks(client, source_name, QUERIES[source_name], chunk_size, start_date=start_date)
+        chunks = _tracking_watermark(transform_chunks(source_name, chunks, current(client)), source_name, seen)
+        rows = load_chunks(chunks, client, target_table, mode=mode, source=source_name, pool=pool,
+                           start_date=start_date, targets=targets)
+    save_watermark(client, source_name, max((w for w in seen if w), default=None))
+    # Chunks are never materialized together, so no fingerprint to compare with next time
+    clear_fingerprint(client, source_name)
+    return rows
+
+def plan_tables(client: str, mode: str, lookback_days: int) -> dict:
+    """
+    Per source: (load mode, extraction start date).
+
+    In incremental mode, tables with a WATERMARK_COLS entry and a stored
+    watermark are extracted from it and their window replaced; every other table (no
+    watermark column, or first run) is fully reloaded.
+    """
+    plan = {}
+    for source_name in QUERIES:
+        start_date = None
+        if mode == 'incremental' and is_incremental(source_name):
+            start_date = start_date_for(client, source_name, lookback_days)
+        plan[source_name] = ('incremental', start_date) if start_date else ('full', None)
+    return plan
+
+def _load_targets(client: str, pool):
+    """
+    TargetSchema (Flows/ETL/load.py) of every mapped table: one INFORMATION_SCHEMA
+    query and the client's ID_CLIENT, read once and shared by every load of the run.
+    """
+    tables = [TABLE_MAPPING.get(name, name.lower()) for name in QUERIES]
+    with pool.connection() as conn:
+        return load_targets(conn, load_config(client), tables)
+
+def _target_row_counts(targets, tables: list) -> dict:
+    """Current ROW_COUNT of `tables` from the run's TargetSchema, None for missing tables."""
+    counts = {}
+    for table in tables:
+        info = targets.cache.table_info(targets.schema, table)
+        counts[table] = info.row_count if info else None
+    return counts
+
+def split_unchanged(client: str, raw: dict, plan: dict, targets=None, force: bool = False) -> tuple:
+    """
+    Fingerprint the fully extracted frames of `raw` and remove the ones that
+    match their last successful load (Flows/ETL/fingerprints.py).
+    Returns (`raw` without the skipped frames, {source: fingerprint}, skipped sources).
+    Incrementally extracted frames are only a window and are never skipped.
+    Target row counts come from the run's TargetSchema `targets`, when given.
+    """
+    run = current(client)
+    fingerprints = {}
+    for name, df in raw.items():
+        if plan[name][0] == 'full':
+            with run.span(name, 'fingerprint', rows=len(df)):
+                fingerprints[name] = compute_fingerprint(df)
+    if force or not fingerprints:
+        return raw, fingerprints, []
+
+    tables = {name: TABLE_MAPPING.get(name, name.lower()) for name in fingerprints}
+    counts = _target_row_counts(targets, list(tables.values())) if targets else {}
+
+    skipped = []
+    for name, fingerprint in fingerprints.items():
+        target_rows = counts.get(tables[name])
+        if targets and target_rows is None:
+            # Target table missing: it has to be loaded
+            continue
+        if is_unchanged(client, name, fingerprint, target_rows):
+            skipped.append(name)
+            run.count(name, 'skipped_unchanged')
+            print(f"⏩ {name}: unchanged since last load ({fingerprint['rows']} rows), skipping")
+    # Drop the skipped frames from `raw` itself so no other reference keeps them alive
+    for name in skipped:
+        del raw[name]
+    return raw, fingerprints, skipped
+
+def _collect(futures: dict) -> dict:
+    """
+    Wait for submitted load tasks and count successes and failures.
     """
-    raw_data = extract_task(client)
-    clean_data = transform_task(raw_data)
-    
     successful_loads = 0
     failed_loads = 0
+
+    for (source_name, target_table), future in futures.items():
+        state = future.wait()
+        if state.is_completed():
+            rows = state.result()
+            if rows is not None:
+                print(f"   ✅ {rows} rows streamed into {target_table}")
+            successful_loads += 1
+        else:
+            error = state.result(raise_on_failure=False)
+            print(f"❌ Failed to load {source_name} -> {target_table}: {str(error)}")
+            failed_loads += 1
+
+    return {"successful": successful_loads, "failed": failed_loads}
+
+def stream_flow_tables(client: str, chunk_size: int, plan: dict, pool=None, warehouse: str = None,
+                       concurrency: int = 1, targets=None) -> dict:
+    futures = {}
+
+    for source_name in QUERIES:
+        target_table = TABLE_MAPPING.get(source_name, source_name.lower())
+        table_mode, start_date = plan[source_name]
+        print(f"🚀 Streaming {source_name} -> {target_table} in chunks of {chunk_size} ({table_mode} mode)...")
+        futures[(source_name, target_table)] = stream_task.submit(
+            client, source_name, target_table, chunk_size, pool, warehouse, concurrency,
+            table_mode, start_date, targets
+        )
+
+    return _collect(futures)
+
+def batch_flow_tables(client: str, plan: dict, pool=None, warehouse: str = None,
+                      concurrency: int = 1, force: bool = False, targets=None) -> dict:
+    start_dates = {name: start for name, (_, start) in plan.items() if start}
+    raw_data = extract_task(client, start_dates)
+    raw_data, fingerprints, skipped = split_unchanged(client, raw_data, plan, targets, force)
+    
+    futures = {}
     
-    for source_name, df in clean_data.items():
+    # One transform per table: Prefect copies dict parameters, so raw frames are
+    # popped here, from the dict extract_task returned, to be released once transformed
+    for source_name in list(raw_data):
+        df = transform_task(source_name, raw_data.pop(source_name), client)
         # Proper table mapping based on the SQL schema
         target_table = TABLE_MAPPING.get(source_name, source_name.lower())  # Default to lowercase if not found
+        table_mode, start_date = plan[source_name]
         
         df.attrs['table'] = target_table
-        print(f"🚀 Loading {source_name} -> {target_table} in full mode...")
+        df.attrs['source'] = source_name
+        since = f" since {start_date}" if start_date else ""
+        print(f"🚀 Loading {source_name} -> {target_table} in {table_mode} mode{since}...")
         
-        try:
-            load_task(df, client)
-            successful_loads += 1
-        except Exception as e:
-            print(f"❌ Failed to load {source_name} -> {target_table}: {str(e)}")
-            failed_loads += 1
-            # Continue with next table instead of stopping
-            continue
+        # Tables are independent: loads run concurrently, failures are counted per table
+        futures[(source_name, target_table)] = load_task.submit(
+            df, client, pool, warehouse, concurrency, table_mode, compute_watermark(df, source_name),
+            fingerprints.get(source_name), start_date, targets
+        )
+
+    result = _collect(futures)
+    result['skipped'] = len(skipped)
+    return result
+
+@flow(name="ETL Flow")
+def etl_flow(client: str, mode: str = "full", streaming: bool = False, force: bool = False):
+    """
+    ETL orchestration flow: extract, transform, and load.
+    Each query automatically uses its own table name (same as query name).
+
+    `mode='incremental'` only extracts the rows of watermarked tables changed
+    since their last successful load (minus `etl.incremental_lookback_days`)
+    and replaces that window of the target; other tables are fully reloaded.
+
+    With `streaming=True` every table is moved in chunks of `etl.chunk_size`
+    rows from the client config instead of being materialized in memory.
+    Otherwise fully extracted tables whose content fingerprint matches their
+    last successful load are neither transformed nor loaded, unless `force`.
+    Extractions are snapshotted locally (Flows/ETL/extract_cache.py) so a
+    rerun after failed loads replays them instead of querying SQL Server;
+    the snapshots are deleted once every load of the run succeeded.
+    Every step and Snowflake statement is timed (Flows/ETL/instrumentation.py)
+    into State/<client>/reports/ and a Prefect artifact.
+    All loads of the run share one Snowflake connection pool, and at most
+    `etl.load_concurrency` tables load at once on the client's warehouse.
+    Target tables are introspected once per run; rows are tagged with the
+    client's ID_CLIENT (config `id_client`, else BEE_MASTER.PUBLIC.CLIENT_DATABASES).
+    """
+    cfg = load_config(client)
+    etl_cfg = cfg.get('etl', {})
+    warehouse = f"{cfg['snowflake'].get('account')}/{cfg['snowflake'].get('warehouse')}"
+    concurrency = int(etl_cfg.get('load_concurrency') or DEFAULT_LOAD_CONCURRENCY)
+    lookback_days = int(etl_cfg.get('incremental_lookback_days', DEFAULT_LOOKBACK_DAYS))
+    plan = plan_tables(client, mode, lookback_days)
+    pool = client_pool(client, max_size=max(concurrency, int(etl_cfg.get('max_workers') or 1)))
+    start_run(client)
+    try:
+        targets = _load_targets(client, pool)
+        if streaming:
+            chunk_size = int(etl_cfg.get('chunk_size') or 100000)
+            result = stream_flow_tables(client, chunk_size, plan, pool, warehouse, concurrency, targets)
+        else:
+            result = batch_flow_tables(client, plan, pool, warehouse, concurrency, force, targets)
+    finally:
+        pool.log_stats()
+        pool.close()
+        report = finish_run(client)
+    successful_loads, failed_loads = result['successful'], result['failed']
+    skipped_loads = result.get('skipped', 0)
+    if not failed_loads:
+        # Snapshots only serve reruns of a failed run
+        clear_cache(client)
     
     # Summary
-    print(f"\n📈 ETL SUMMARY for {client}:")
+    print(f"\n📈 ETL SUMMARY for {client} ({mode}{', streaming' if streaming else ''}):")
     print(f"   ✅ Successful loads: {successful_loads}")
     print(f"   ❌ Failed loads: {failed_loads}")
+    print(f"   ⏩ Unchanged tables skipped: {skipped_loads}")
     print(f"   📊 Total tables processed: {successful_loads + failed_loads}")
     print(f"   📋 Each query loaded into its own table using query name")
     
-    return {"successful": successful_loads, "failed": failed_loads}
+    return {"successful": successful_loads, "failed": failed_loads, "skipped": skipped_loads,
+            "pool": pool.stats(), "report": report.get('path')}
 
 if __name__ == "__main__":
     # Set PROJECT_ROOT environment variable
@@ -119,14 +326,28 @@ if __name__ == "__main__":
             selected = clients[:1] if clients else []
         print(f"Mode automatique - utilisation de: {selected}")
 
-    mode = 'full'
-    print("Mode set to full. Update mode is disabled.")
+    mode = os.environ.get('ETL_MODE', 'full').lower()
+    if mode not in ('full', 'incremental'):
+        raise ValueError(f"Unknown ETL_MODE '{mode}' (expected 'full' or 'incremental')")
+    print(f"Mode set to {mode}.")
+    streaming = os.environ.get('ETL_STREAMING', '').lower() in ('1', 'true', 'yes')
+    force = os.environ.get('ETL_FORCE', '').lower() in ('1', 'true', 'yes')
+
+    if len(selected) > 1:
+        # Several clients: concurrent fan-out with per-source/per-warehouse limits
+        report = run_clients(selected, lambda client: etl_flow(client, mode=mode, streaming=streaming, force=force))
+        # Failed or partial clients make the run fail for cron/CI
+        sys.exit(0 if all(run['status'] == 'success' for run in report['runs']) else 1)
 
     # Execute for each client
+    failed = False
     for client in selected:
-        print(f"\n🚧 Running ETL for: {client} (full mode)")
+        print(f"\n🚧 Running ETL for: {client} ({mode} mode)")
         try:
-            result = etl_flow(client)
+            result = etl_flow(client, mode=mode, streaming=streaming, force=force)
             print(f"✅ Flow completed for {client}: {result}")
+            failed = failed or bool(result['failed'])
         except Exception as e:
             print(f"❌ Flow failed for {client}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,424 @@
+"""
+Per-run instrumentation of the ETL flow.
+
+Every step of a table (extract, transform, nulls, dates, stage, finish...) is
+recorded as a span: calls, seconds, rows, bytes and the peak resident memory
+sampled while it ran. Snowflake statements issued through an instrumented
+connection are timed per kind ('PUT', 'COPY', 'ALTER TABLE'...). At the end of
+the run the figures are written to State/<client>/reports/run_<time>.json
+and published as a Prefect markdown artifact.
+
+    run = start_run(client)
+    with run.span('FACT_POINTAGE', 'extract') as span:
+        df = ...
+        span.rows = len(df)
+    report = finish_run(client)
+
+Code that only knows the client calls current(client), a no-op recorder when
+no run is active. Frame bytes are shallow sizes (string cells are not scanned)
+except for the tables being profiled. Spans nest (load includes nulls and dates), so the seconds
+of different steps of a table do not add up.
+
+Opt-in profiling of chosen tables:
+
+    ETL_PROFILE=FACT_POINTAGE,BUDGET     # or 'all'
+    ETL_PROFILE_MODE=cprofile            # or 'tracemalloc'
+
+writes State/<client>/profiles/<TABLE>_<step>_<time>.prof (cProfile stats,
+open with pstats or snakeviz) or .txt (top allocations) for the outermost
+span of each step of those tables.
+"""
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager
+
+from Flows.ETL.state import state_path, write_json
+from Tables.Table.ddl_parser import parse_statements
+
+SAMPLE_INTERVAL = 0.02
+
+
+def rss_bytes():
+    """Current resident set size of the process, None when it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def frame_bytes(df, deep: bool = False) -> int:
+    """
+    In-memory size of `df`. Shallow by default: object columns count their
+    pointers, as `deep` scans every string cell.
+    """
+    return int(df.memory_usage(index=False, deep=deep).sum())
+
+
+def statement_kind(sql: str) -> str:
+    statements = parse_statements(sql)
+    return statements[0].kind if statements else 'EMPTY'
+
+
+class _Sampler:
+    """One daemon thread raising the `peak` of every open span."""
+
+    def __init__(self):
+        self.spans = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+
+    def _loop(self):
+        while True:
+            self.wake.wait()
+            rss = rss_bytes()
+            with self.lock:
+                for span in self.spans:
+                    span.peak = max(span.peak, rss or 0)
+                if not self.spans:
+                    self.wake.clear()
+            time.sleep(SAMPLE_INTERVAL)
+
+    def open(self, span):
+        with self.lock:
+            self.spans.add(span)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name='rss-sampler', daemon=True)
+                self.thread.start()
+        self.wake.set()
+
+    def close(self, span):
+        with self.lock:
+            self.spans.discard(span)
+
+
+_SAMPLER = _Sampler()
+
+
+class Span:
+    def __init__(self, table: str, step: str, rows: int = None, bytes: int = None):
+        self.table = table
+        self.step = step
+        self.rows = rows
+        self.bytes = bytes
+        self.seconds = 0.0
+        self.peak = 0
+        self.discard = False
+
+
+class _Profiler:
+    """ETL_PROFILE / ETL_PROFILE_MODE handling, one profile per outermost span."""
+
+    def __init__(self, client: str):
+        self.client = client
+        tables = os.environ.get('ETL_PROFILE', '').strip()
+        self.tables = {t.strip().upper() for t in tables.split(',') if t.strip()}
+        self.mode = os.environ.get('ETL_PROFILE_MODE', 'cprofile').lower()
+        self.active = threading.local()
+        self.files = []
+
+    def wanted(self, table: str) -> bool:
+        return bool(self.tables) and ('ALL' in self.tables or (table or '').upper() in self.tables)
+
+    def _path(self, table: str, step: str, ext: str) -> str:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = state_path(self.client, 'profiles', f"{table.upper()}_{step}_{stamp}.{ext}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    @contextmanager
+    def profile(self, table: str, step: str):
+        if not self.wanted(table) or getattr(self.active, 'on', False):
+            yield
+            return
+        self.active.on = True
+        try:
+            if self.mode == 'tracemalloc':
+                with self._tracemalloc(table, step):
+                    yield
+            else:
+                with self._cprofile(table, step):
+                    yield
+        finally:
+            self.active.on = False
+
+    @contextmanager
+    def _cprofile(self, table: str, step: str):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is running in this process (Python >= 3.12)
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = self._path(table, step, 'prof')
+            pstats.Stats(profiler).dump_stats(path)
+            self.files.append(path)
+
+    @contextmanager
+    def _tracemalloc(self, table: str, step: str):
+        owner = not tracemalloc.is_tracing()
+        if owner:
+            tracemalloc.start(10)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if owner:
+                tracemalloc.stop()
+            path = self._path(table, step, 'txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"{table} {step}: traced {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+                for stat in snapshot.statistics('lineno')[:25]:
+                    f.write(f"{stat}\n")
+            self.files.append(path)
+
+
+class _Cursor:
+    def __init__(self, cursor, run, table: str):
+        self._cursor = cursor
+        self._run = run
+        self._table = table
+
+    def execute(self, sql, *args, **kwargs):
+        with self._run.statement(self._table, sql):
+            return self._cursor.execute(sql, *args, **kwargs)
+
+    def execute_async(self, sql, *args, **kwargs):
+        with self._run.statement(self._table, sql):
+            return self._cursor.execute_async(sql, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection whose cursors time every statement for `table`."""
+
+    def __init__(self, conn, run, table: str):
+        self._conn = conn
+        self._run = run
+        self._table = table
+
+    def cursor(self, *args, **kwargs):
+        return _Cursor(self._conn.cursor(*args, **kwargs), self._run, self._table)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class Run:
+    def __init__(self, client: str):
+        self.client = client
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.steps = {}
+        self.statements = {}
+        self.counters = {}
+        self.profiler = _Profiler(client)
+
+    def _add(self, key, **values):
+        with self._lock:
+            entry = self.steps.setdefault(key, {'calls': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0,
+                                                'bytes': 0, 'peak_rss': 0})
+            entry['calls'] += 1
+            for name, value in values.items():
+                if name == 'peak_rss':
+                    entry[name] = max(entry[name], value)
+                elif value:
+                    entry[name] += value
+
+    @contextmanager
+    def span(self, table: str, step: str, rows: int = None, bytes: int = None):
+        """Time a step of `table`; set `.rows` / `.bytes` on the yielded span."""
+        span = Span(table, step, rows, bytes)
+        span.peak = rss_bytes() or 0
+        _SAMPLER.open(span)
+        started = time.perf_counter()
+        failed = False
+        try:
+            with self.profiler.profile(table, step):
+                yield span
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            span.seconds = time.perf_counter() - started
+            _SAMPLER.close(span)
+            span.peak = max(span.peak, rss_bytes() or 0)
+            if not span.discard:
+                self._add((table, step), seconds=span.seconds, rows=span.rows, bytes=span.bytes,
+                          peak_rss=span.peak, errors=int(failed))
+
+    @contextmanager
+    def statement(self, table: str, sql: str):
+        kind = statement_kind(sql)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                entry = self.statements.setdefault((table, kind), {'calls': 0, 'errors': 0, 'seconds': 0.0})
+                entry['calls'] += 1
+                entry['errors'] += int(failed)
+                entry['seconds'] += elapsed
+
+    def frame_bytes(self, table: str, df) -> int:
+        """Size of a frame of `table` for a span, strings counted deeply only for profiled tables."""
+        return frame_bytes(df, deep=self.profiler.wanted(table))
+
+    def count(self, table: str, name: str, n: int = 1):
+        with self._lock:
+            self.counters[(table, name)] = self.counters.get((table, name), 0) + n
+
+    def connection(self, conn, table: str):
+        return InstrumentedConnection(conn, self, table)
+
+    def timed_iter(self, iterable, table: str, step: str):
+        """Yield the frames of `iterable`, recording the time spent producing each as a span."""
+        iterator = iter(iterable)
+        while True:
+            with self.span(table, step) as span:
+                try:
+                    frame = next(iterator)
+                except StopIteration:
+                    span.discard = True
+                    return
+                span.rows, span.bytes = len(frame), self.frame_bytes(table, frame)
+            yield frame
+
+    def report(self) -> dict:
+        duration = time.perf_counter() - self._t0
+        with self._lock:
+            steps = [
+                {'table': table, 'step': step, **{k: round(v, 4) if isinstance(v, float) else v
+                                                  for k, v in entry.items()},
+                 'peak_rss_mb': round(entry['peak_rss'] / 1e6, 1),
+                 'rows_per_s': round(entry['rows'] / entry['seconds']) if entry['seconds'] else None}
+                for (table, step), entry in self.steps.items()
+            ]
+            statements = [
+                {'table': table, 'kind': kind, 'calls': e['calls'], 'errors': e['errors'],
+                 'seconds': round(e['seconds'], 4)}
+                for (table, kind), e in self.statements.items()
+            ]
+            counters = [{'table': t, 'name': n, 'value': v} for (t, n), v in self.counters.items()]
+        for step in steps:
+            del step['peak_rss']
+        return {
+            'client': self.client,
+            'started': self.started.isoformat(timespec='seconds'),
+            'duration_s': round(duration, 3),
+            'python': sys.version.split()[0],
+            'steps': sorted(steps, key=lambda s: s['seconds'], reverse=True),
+            'statements': sorted(statements, key=lambda s: s['seconds'], reverse=True),
+            'counters': counters,
+            'profiles': list(self.profiler.files),
+        }
+
+    def markdown(self, report: dict = None, limit: int = 20) -> str:
+        report = report or self.report()
+        lines = [
+            f"# ETL run {report['client']} ({report['started']}, {report['duration_s']:.1f}s)",
+            "",
+            "| Table | Step | Calls | Seconds | Rows | Rows/s | Peak RSS MB |",
+            "|---|---|---:|---:|---:|---:|---:|",
+        ]
+        for s in report['steps'][:limit]:
+            lines.append(f"| {s['table']} | {s['step']} | {s['calls']} | {s['seconds']:.2f} | {s['rows']} "
+                         f"| {s['rows_per_s'] or ''} | {s['peak_rss_mb']} |")
+        if report['statements']:
+            lines += ["", "| Table | Statement | Calls | Errors | Seconds |", "|---|---|---:|---:|---:|"]
+            for s in report['statements'][:limit]:
+                lines.append(f"| {s['table']} | {s['kind']} | {s['calls']} | {s['errors']} | {s['seconds']:.2f} |")
+        return "\n".join(lines)
+
+
+class NullRun:
+    """Recorder used outside a run: same interface, records nothing."""
+
+    @contextmanager
+    def span(self, table: str, step: str, rows: int = None, bytes: int = None):
+        yield Span(table, step, rows, bytes)
+
+    @contextmanager
+    def statement(self, table: str, sql: str):
+        yield
+
+    def frame_bytes(self, table: str, df):
+        return None
+
+    def count(self, table: str, name: str, n: int = 1):
+        pass
+
+    def connection(self, conn, table: str):
+        return conn
+
+    def timed_iter(self, iterable, table: str, step: str):
+        return iterable
+
+
+_RUNS = {}
+NULL_RUN = NullRun()
+
+
+def start_run(client: str) -> Run:
+    run = _RUNS[client] = Run(client)
+    return run
+
+
+def current(client: str):
+    """Active Run of `client`, a NullRun when there is none."""
+    return _RUNS.get(client, NULL_RUN)
+
+
+def publish_artifact(run: Run, report: dict):
+    """Markdown summary of the run as a Prefect artifact (skipped outside Prefect)."""
+    try:
+        from prefect.artifacts import create_markdown_artifact
+        key = ''.join(c if c.isalnum() else '-' for c in f"etl-run-{run.client}".lower())
+        create_markdown_artifact(key=key, markdown=run.markdown(report),
+                                 description=f"ETL instrumentation for {run.client}")
+    except Exception as e:
+        print(f"⚠️ Instrumentation artifact not published: {e}")
+
+
+def finish_run(client: str, publish: bool = True) -> dict:
+    """End the run of `client`, write its JSON report and publish the artifact."""
+    run = _RUNS.pop(client, None)
+    if run is None:
+        return {}
+    report = run.report()
+    path = state_path(client, 'reports', f"run_{run.started.strftime('%Y%m%d_%H%M%S')}.json")
+    write_json(path, report)
+    report['path'] = path
+    if publish:
+        publish_artifact(run, report)
+    slowest = report['steps'][:5]
+    print(f"⏱️  Instrumentation report: {path}")
+    for s in slowest:
+        print(f"   {s['table']:<22} {s['step']:<10} {s['seconds']:>8.2f}s  {s['rows']:>10} rows")
+    return report
@@ -7,234 +7,83 @@ project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-import pandas as pd
-import numpy as np
-from snowflake.connector.pandas_tools import write_pandas
-from snowflake.connector.errors import ProgrammingError
-from infra.config import get_snowflake_conn, load_config
-from infra.constants import TABLE_KEYS, DATE_COLS
+from collections import namedtuple
+from contextlib import contextmanager
 
-def generate_merge_sql(schema, target, temp, keys, cols):
-    cond = ' AND '.join(f"t.{k}=s.{k}" for k in keys)
-    upd = ', '.join(f"{col}=s.{col}" for col in cols if col not in keys)
-    cols_list = ','.join(cols)
-    vals = ','.join(f's.{col}' for col in cols)
-    return f"""
-MERGE INTO {schema}.{target} t
-USING {schema}.{temp} s
-ON {cond}
-WHEN MATCHED THEN UPDATE SET {upd}
-WHEN NOT MATCHED THEN INSERT ({cols_list}) VALUES ({vals});
-"""
+import pandas as pd
+from Tables.Queries.queries import DATE_COLS, WATERMARK_COLS
+from Flows.ETL.nulls import normalize_nulls
+from Flows.ETL.dtypes import to_datetime
+from Tables.Table.schema import date_columns
+from Flows.ETL.strategies import choose_strategy
+from Flows.ETL.instrumentation import NULL_RUN, current
+from Flows.Creation.introspection import SchemaCache
 
 def convert_dates_to_snowflake_format(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
     """
-    Convert various date formats to Snowflake-compatible YYYY-MM-DD format.
-    Handles large timestamp numbers and various date formats.
+    Convert the DATE/TIMESTAMP columns of a table to native datetime64.
+
+    Date columns are the ones declared as DATE/TIMESTAMP for `table_name` in
+    Tables/Table/create_tables.sql, plus the configured DATE_COLS entry.
+    Values stay datetime64 (nulls are NaT) so they are uploaded as real
+    timestamps instead of formatted strings. Columns are modified in place.
     """
-    # Get configured date columns for this table
     date_cols = DATE_COLS.get(table_name.upper(), [])
     if isinstance(date_cols, str):
         date_cols = [date_cols]
-    
-    # Create a copy to avoid modifying the original
-    df_copy = df.copy()
-    
-    # Find all potential date columns
-    potential_date_cols = set()
-    
-    # Add configured date columns
-    for col in date_cols:
-        if col in df_copy.columns:
-            potential_date_cols.add(col)
-    
-    # Add columns that look like dates
-    for col in df_copy.columns:
-        col_lower = col.lower()
-        if (col_lower.startswith('date') or 
-            'date' in col_lower or 
-            col_lower.endswith('_date') or
-            'embauche' in col_lower or
-            'sortie' in col_lower or
-            'debut' in col_lower or
-            'fin' in col_lower):
-            potential_date_cols.add(col)
-    
-    print(f"   🗓️  Converting date columns for {table_name}: {list(potential_date_cols)}")
-    
-    for col in potential_date_cols:
-        if col not in df_copy.columns:
+    wanted = {c.upper() for c in date_columns(table_name)} | {c.upper() for c in date_cols}
+
+    converted = []
+    for col in df.columns:
+        if col.upper() not in wanted:
             continue
-            
-        print(f"      🔍 Processing column: {col}")
-        
         try:
-            # Get sample value to understand format
-            non_null_values = df_copy[col].dropna()
-            if non_null_values.empty:
-                print(f"      ⚠️  Column {col} is empty, skipping")
-                df_copy[col] = None
-                continue
-                
-            sample_value = non_null_values.iloc[0]
-            print(f"      📊 Sample value: {sample_value} (type: {type(sample_value)})")
-            
-            # Additional cleaning for any remaining nan strings
-            df_copy[col] = df_copy[col].replace(['nan', 'NaN', 'NaT', 'nat', 'None', 'null'], None)
-            
-            # Convert based on the format detected
-            if pd.api.types.is_numeric_dtype(df_copy[col]):
-                # Handle numeric dates
-                if isinstance(sample_value, (int, float)) and sample_value > 0:
-                    if sample_value > 1e15:  # Very large timestamp (nanoseconds or weird format)
-                        print(f"      🔢 Very large timestamp detected, trying different conversions...")
-                        # These huge numbers might be in a special format, try different approaches
-                        try:
-                            # Try treating as nanoseconds since epoch
-                            df_copy[col] = pd.to_datetime(df_copy[col], unit='ns', errors='coerce')
-                        except:
-                            try:
-                                # Try dividing by large factor
-                                df_copy[col] = pd.to_datetime(df_copy[col] / 1000000, unit='s', errors='coerce')
-                            except:
-                                # Last resort: treat as string and convert
-                                df_copy[col] = pd.to_datetime(df_copy[col].astype(str), errors='coerce')
-                    elif sample_value > 1e12:  # Milliseconds
-                        print(f"      ⏰ Milliseconds timestamp")
-                        df_copy[col] = pd.to_datetime(df_copy[col], unit='ms', errors='coerce')
-                    elif sample_value > 1e9:  # Seconds
-                        print(f"      ⏰ Seconds timestamp")
-                        df_copy[col] = pd.to_datetime(df_copy[col], unit='s', errors='coerce')
-                    elif 19000000 <= sample_value <= 21001231:  # YYYYMMDD format
-                        print(f"      📅 YYYYMMDD format")
-                        df_copy[col] = pd.to_datetime(df_copy[col].astype(str), format='%Y%m%d', errors='coerce')
-                    else:
-                        # Try generic conversion
-                        df_copy[col] = pd.to_datetime(df_copy[col], errors='coerce')
-                else:
-                    # Zero or negative, set to null
-                    df_copy[col] = pd.NaT
-            else:
-                # String or other format
-                df_copy[col] = pd.to_datetime(df_copy[col], errors='coerce')
-            
-            # Convert to YYYY-MM-DD string format for Snowflake
-            # Important: ensure it's definitely a string, not datetime
-            df_copy[col] = df_copy[col].dt.strftime('%Y-%m-%d').astype(str)
-            
-            # Replace all possible NaT representations with None for SQL NULL
-            df_copy[col] = df_copy[col].replace(['NaT', 'NaTT', 'nat', 'nan', 'NaN', 'None', 'null'], None)
-            
-            # Additional safety check - replace any remaining nan strings
-            mask = df_copy[col].astype(str).str.lower().str.contains('nan|nat|none|null', na=False)
-            df_copy.loc[mask, col] = None
-            
-            # Count successful conversions
-            valid_dates = df_copy[col].notna().sum()
-            print(f"      ✅ Successfully converted {valid_dates}/{len(df_copy)} values in {col}")
-            
+            df[col] = to_datetime(df[col])
+            converted.append(col)
         except Exception as e:
             print(f"      ❌ Error converting {col}: {e}")
             # If conversion fails completely, leave original values
-            continue
-    
-    return df_copy
 
-def load_data(df: pd.DataFrame, client: str, mode: str='full'):
-    """
-    Load DataFrame into Snowflake table.
-    
-    Args:
-        df: DataFrame to load
-        client: Client name for configuration
-        mode: 'full' or 'incremental'
+    if converted:
+        print(f"   🗓️  Date columns for {table_name}: {converted}")
+    return df
+
+@contextmanager
+def _single_connection(client: str):
+    from infra.config import get_snowflake_conn
+
+    conn = get_snowflake_conn(client)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def prepare_frame(df: pd.DataFrame, run=NULL_RUN) -> pd.DataFrame:
     """
-    if df.empty:
-        print(f"❗ Empty DataFrame: skipping {client}")
-        return
+    Clean a transformed frame for Snowflake: drop duplicate columns,
+    normalize nulls and convert the table's date columns. The null and date
+    steps are recorded as spans of `run` (Flows/ETL/instrumentation.py).
 
+    Frames are typed from the DDL at extraction (Flows/ETL/dtypes.py), so
+    only text columns and columns that did not fit their type are cleaned;
+    the frame is modified in place.
+    """
     # Remove duplicate columns
-    df = df.loc[:, ~df.columns.duplicated()]
-    
-    # AGGRESSIVE NaN cleaning for Snowflake compatibility
-    print(f"   🧹 AGGRESSIVE NaN cleaning for Snowflake...")
-    
-    original_shape = df.shape
+    if df.columns.has_duplicates:
+        df = df.loc[:, ~df.columns.duplicated()]
     
-    # Create a proper copy to avoid SettingWithCopyWarning
-    df = df.copy()
+    # Null normalization for Snowflake compatibility (typed columns only need a null check)
+    print(f"   🧹 Normalizing nulls for Snowflake...")
     
-    # Step 1: Convert DataFrame to object type temporarily to catch all NaN representations
-    df_temp = df.astype(str)
-    
-    # Step 2: Replace all possible NaN string representations
-    nan_patterns = [
-        'nan', 'NaN', 'NAN', 'Nan',
-        'None', 'none', 'NONE', 
-        'null', 'NULL', 'Null',
-        'na', 'NA', 'N/A', 'n/a',
-        'NaT', 'nat', '<NA>', 'NaTT',
-        'inf', 'Inf', 'INF', '-inf', '-Inf', '-INF',
-        '', ' ', '  ', '   '
-    ]
-    
-    # Apply replacement multiple times to catch nested issues
-    for pattern in nan_patterns:
-        df_temp = df_temp.replace(pattern, None)
-    
-    # Additional pass for string representations
-    for col in df_temp.columns:
-        if df_temp[col].dtype == 'object':  # String columns
-            # Replace any cell that contains only variations of nan/null
-            mask = df_temp[col].astype(str).str.lower().str.match(r'^(nan|nat|none|null|na|n/a)$', na=False)
-            df_temp.loc[mask, col] = None
-    
-    # Replace string patterns
-    for pattern in nan_patterns:
-        df_temp = df_temp.replace(pattern, None)
-    
-    # Step 3: Convert back to appropriate types, ensuring NaN becomes None
-    for col in df.columns:
-        try:
-            original_dtype = df[col].dtype
-            
-            if 'float' in str(original_dtype) or 'int' in str(original_dtype):
-                # For numeric columns
-                df.loc[:, col] = pd.to_numeric(df_temp[col], errors='coerce')
-                # Convert any remaining NaN to None (using numpy.isfinite instead of pandas)
-                df.loc[:, col] = df[col].where(pd.notnull(df[col]) & np.isfinite(df[col]), None)
-            else:
-                # For non-numeric columns - convert to object first to avoid dtype incompatibility
-                if df[col].dtype != 'object':
-                    df[col] = df[col].astype('object')
-                df.loc[:, col] = df_temp[col]
-                df.loc[:, col] = df[col].where(pd.notnull(df[col]), None)
-                
-            # Count nulls after cleaning
-            null_count = df[col].isnull().sum()
-            if null_count > 0:
-                print(f"      🧹 {col}: {null_count} nulls after cleaning")
-                
-        except Exception as e:
-            print(f"      ⚠️ Warning cleaning {col}: {e}")
-            # If cleaning fails, ensure at least no NaN strings
-            df.loc[:, col] = df[col].astype(str).replace(nan_patterns, None)
+    span_name = df.attrs.get('source') or df.attrs.get('table')
+    with run.span(span_name, 'nulls', rows=len(df)):
+        df = normalize_nulls(df)
     
-    # Step 4: Final safety check - replace any remaining pandas NA with None
-    df = df.where(pd.notnull(df), None)
-    
-    # Verify no inf or nan values remain
-    total_nulls = df.isnull().sum().sum()
-    print(f"   ✅ AGGRESSIVE cleaning complete: {original_shape} -> {df.shape}")
-    print(f"      📊 Total null values: {total_nulls}")
-    
-    # Additional check for problematic values
-    for col in df.columns:
-        if df[col].dtype in ['float64', 'float32']:
-            inf_check = np.isinf(df[col].fillna(0)).any()
-            if inf_check:
-                print(f"      ⚠️ Still has inf values in {col}, replacing...")
-                df[col] = df[col].replace([np.inf, -np.inf], None)
+    null_counts = df.isna().sum()
+    for col, null_count in null_counts[null_counts > 0].items():
+        print(f"      🧹 {col}: {null_count} nulls after cleaning")
+    print(f"   ✅ Null normalization complete: {df.shape}")
+    print(f"      📊 Total null values: {int(null_counts.sum())}")
 
     # Get table name and convert dates
     tbl = df.attrs.get('table')
@@ -248,51 +97,156 @@ def load_data(df: pd.DataFrame, client: str, mode: str='full'):
         print(f"   🔍 DEBUG - DataFrame columns ({len(df.columns)}): {list(df.columns)}")
         print(f"   🔍 DEBUG - DataFrame shape: {df.shape}")
     
-    df = convert_dates_to_snowflake_format(df, tbl)
-    
-    tbl_u = tbl.upper()
-    
-    # Load configuration
+    # Date columns are declared per source query (same name as the DDL table)
+    source = df.attrs.get('source', tbl)
+    with run.span(source, 'dates', rows=len(df)):
+        return convert_dates_to_snowflake_format(df, source)
+
+def _strategy_for(conn, client: str, table: str, source: str, mode: str, start_date: str = None):
+    from infra.config import load_config
+
     cfg = load_config(client)
-    sf_cfg = cfg['snowflake']
-    schema = sf_cfg['schema']
+    schema = cfg['snowflake']['schema']
     create_replace = cfg.get('etl', {}).get('create_or_replace', False)
+    staging = cfg.get('etl', {}).get('staging') or {}
+    window = (WATERMARK_COLS.get(source.upper()), start_date)
+    return choose_strategy(conn, schema, table, mode, create_replace, window, source, staging)
 
-    conn = get_snowflake_conn(client)
+TargetSchema = namedtuple('TargetSchema', 'schema cache id_client')
+
+def client_id(conn, cfg: dict) -> int:
+    """
+    ID_CLIENT of a client: `id_client` from its config, else the ID_CLIENT of
+    its schema in BEE_MASTER.PUBLIC.CLIENT_DATABASES.
+    Raises ValueError when neither has one, rather than loading untagged rows.
+    """
+    if cfg.get('id_client') is not None:
+        return int(cfg['id_client'])
+    schema = cfg['snowflake']['schema']
     cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT DISTINCT ID_CLIENT FROM BEE_MASTER.PUBLIC.CLIENT_DATABASES WHERE UPPER(SCHEMA_NAME) = %s",
+            (schema.upper(),)
+        )
+        ids = [row[0] for row in cur.fetchall() if row[0] is not None]
+    finally:
+        cur.close()
+    if len(ids) != 1:
+        found = 'no ID_CLIENT' if not ids else f"several ID_CLIENT {ids}"
+        raise ValueError(f"{schema}: {found} in BEE_MASTER.PUBLIC.CLIENT_DATABASES, "
+                         f"set `id_client` in the client config")
+    return int(ids[0])
+
+def load_targets(conn, cfg: dict, tables: list) -> TargetSchema:
+    """
+    Metadata of the client's target `tables` (one INFORMATION_SCHEMA query)
+    and its ID_CLIENT, read once per run and shared by every load.
+    """
+    schema = cfg['snowflake']['schema']
+    return TargetSchema(schema, SchemaCache(conn).load([schema], tables), client_id(conn, cfg))
+
+def _client_tag(targets: TargetSchema, table: str):
+    """ID_CLIENT to write in `table`, None when the target table has no ID_CLIENT column."""
+    if not targets.cache.has_column(targets.schema, table, 'ID_CLIENT'):
+        print(f"   ⚠️ {targets.schema}.{table.upper()} has no ID_CLIENT column, rows are not tagged "
+              f"(run Merge/MASTER&id_client.py to add it)")
+        return None
+    return targets.id_client
+
+def load_chunks(chunks, client: str, table: str, mode: str='full', source: str=None, pool=None,
+                start_date: str=None, targets: TargetSchema=None) -> int:
+    """
+    Load DataFrames (one frame or a stream of chunks) into one Snowflake table.
 
-    temp = f"TEMP_{tbl_u}"
+    The load strategy (Flows/ETL/strategies.py) is picked from the mode:
+    full loads replace the table content, incremental loads replace the
+    target rows of the extracted window (WATERMARK_COLS >= `start_date`).
+    Every row is uploaded exactly once, all chunks on the same connection.
+    When the target has an ID_CLIENT column, rows are written with the
+    client's ID_CLIENT (see client_id()). Cleaning, staging, the final
+    COPY/SWAP/DELETE+INSERT and every Snowflake statement are recorded in
+    the client's instrumentation run.
 
-    # Stage data - ensure index is not included as extra column
-    df_to_stage = df.reset_index(drop=True)
-    write_pandas(conn, df_to_stage, temp, schema=schema, overwrite=True)
+    Args:
+        chunks: Iterable of transformed DataFrames
+        client: Client name for configuration
+        table: Target table name
+        mode: 'full' or 'incremental'
+        source: Source query name (date and watermark columns), defaults to `table`
+        pool: Optional SnowflakePool (Flows/ETL/connections.py) to borrow the
+            connection from; a dedicated connection is opened otherwise
+        start_date: 'YYYYMMDD' lower bound the rows were extracted from (incremental)
+        targets: TargetSchema of the run (load_targets()), read for this table alone if omitted
+
+    Returns:
+        Number of rows loaded.
+    """
+    # Client config (infra.config) is only needed to load, not to prepare frames
+    from infra.config import load_config
 
-    # Load logic
-    if mode == 'full':
-        if create_replace:
-            write_pandas(conn, df, tbl_u, schema=schema, overwrite=True)
-        else:
-            try:
-                # Always try to truncate and insert into existing table
-                cur.execute(f"TRUNCATE TABLE {schema}.{tbl_u}")
-                cur.execute(f"INSERT INTO {schema}.{tbl_u} SELECT * FROM {schema}.{temp}")
-            except ProgrammingError as e:
-                if "does not exist" in str(e):
-                    raise ProgrammingError(f"Table {schema}.{tbl_u} doesn't exist. Please create the table first using the provided SQL schema.")
-                else:
-                    raise e
-    else:
-        keys = TABLE_KEYS.get(tbl_u)
-        if not keys:
-            raise KeyError(f"No key for {tbl_u}")
+    source = source or table
+    cfg = load_config(client)
+    run = current(client)
+    strategy = None
+    id_client = None
+    with (pool.connection() if pool else _single_connection(client)) as conn:
+        conn = run.connection(conn, source)
         try:
-            sql = generate_merge_sql(schema, tbl_u, temp, keys, list(df.columns))
-            cur.execute(sql)
-        except ProgrammingError:
-            write_pandas(conn, df, tbl_u, schema=schema, overwrite=True)
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                chunk.attrs['table'] = table
+                chunk.attrs['source'] = source
+                chunk = prepare_frame(chunk, run)
+                if strategy is None:
+                    # Rows are tagged with the client's ID_CLIENT at write time (see Merge/MASTER&id_client.py)
+                    if targets is None:
+                        targets = load_targets(conn, cfg, [table])
+                    id_client = _client_tag(targets, table)
+                    strategy = _strategy_for(conn, client, table, source, mode, start_date)
+                    print(f"   🚚 {table.upper()}: {strategy.name} strategy")
+                    strategy.begin()
+                if id_client is not None and 'ID_CLIENT' not in chunk.columns:
+                    chunk['ID_CLIENT'] = id_client
+                with run.span(source, 'stage', rows=len(chunk)):
+                    strategy.write(chunk)
+            if strategy is None:
+                print(f"❗ Empty DataFrame: skipping {client}")
+                return 0
+            with run.span(source, 'finish', rows=strategy.rows):
+                strategy.finish()
+            run.count(source, 'staged_files', strategy.stager.files)
+            run.count(source, 'staged_bytes', strategy.stager.bytes)
+        except Exception:
+            if strategy is not None:
+                try:
+                    strategy.abort()
+                except Exception as cleanup_error:
+                    print(f"      ⚠️ Cleanup failed for {table.upper()}: {cleanup_error}")
+            raise
+    print(f"✅ Loaded {table.upper()} ({mode}, {strategy.rows} rows)")
+    return strategy.rows
 
-    # Cleanup
-    cur.execute(f"DROP TABLE IF EXISTS {schema}.{temp}")
-    cur.close()
-    conn.close()
-    print(f"✅ Loaded {tbl_u} ({mode})")
+def load_data(df: pd.DataFrame, client: str, mode: str='full', pool=None, start_date: str=None,
+              targets: TargetSchema=None):
+    """
+    Load DataFrame into Snowflake table.
+    
+    Args:
+        df: DataFrame to load (attrs 'table' and optionally 'source' set)
+        client: Client name for configuration
+        mode: 'full' or 'incremental'
+        pool: Optional SnowflakePool (Flows/ETL/connections.py) to borrow the
+            connection from; a dedicated connection is opened otherwise
+        start_date: 'YYYYMMDD' lower bound the rows were extracted from (incremental)
+        targets: TargetSchema of the run (load_targets()), read for this table alone if omitted
+
+    Returns:
+        Number of rows loaded.
+    """
+    tbl = df.attrs.get('table')
+    if not tbl:
+        raise ValueError("DataFrame must have 'table' attribute set")
+    return load_chunks([df], client, tbl, mode=mode, source=df.attrs.get('source'), pool=pool,
+                       start_date=start_date, targets=targets)
@@ -0,0 +1,74 @@
+"""
+Null normalization for frames about to be written to Snowflake.
+
+Every column is cleaned once, according to its dtype:
+
+* float columns: NaN, inf and -inf become nulls (one `np.isfinite` mask);
+* integer, boolean and datetime columns cannot hold textual nulls and are left as is;
+* object/string columns: null-like tokens ('nan', 'NULL', 'N/A', '', ...) and
+  non-finite numbers become None (one set-membership lookup).
+
+This keeps the null semantics of the former `astype(str)` + `replace` cleaning
+without materializing string copies of the whole frame.
+"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+# Tokens that were replaced by their exact spelling
+EXACT_NULL_TOKENS = [
+    'nan', 'NaN', 'NAN', 'Nan',
+    'None', 'none', 'NONE',
+    'null', 'NULL', 'Null',
+    'na', 'NA', 'N/A', 'n/a',
+    'NaT', 'nat', '<NA>', 'NaTT',
+    'inf', 'Inf', 'INF', '-inf', '-Inf', '-INF',
+    '', ' ', '  ', '   ',
+]
+
+# Tokens that were matched case-insensitively
+CASELESS_NULL_TOKENS = ['nan', 'nat', 'none', 'null', 'na', 'n/a']
+
+
+def _case_variants(word: str):
+    return {''.join(chars) for chars in product(*({c.lower(), c.upper()} for c in word))}
+
+
+NULL_TOKENS = frozenset(EXACT_NULL_TOKENS).union(*(_case_variants(w) for w in CASELESS_NULL_TOKENS))
+
+# Non-finite numbers stored in object columns (e.g. float('inf') next to strings)
+_NON_FINITE = [np.inf, -np.inf]
+
+
+def null_mask(series: pd.Series) -> np.ndarray:
+    """
+    Boolean mask of the values that must be loaded as SQL NULL.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        return ~np.isfinite(values)
+    if (pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+            or pd.api.types.is_datetime64_any_dtype(dtype)):
+        return series.isna().to_numpy()
+    return (series.isna() | series.isin(NULL_TOKENS) | series.isin(_NON_FINITE)).to_numpy()
+
+
+def normalize_nulls(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace every null-like value of `df` by a real null, column by column.
+
+    The frame is modified in place (only columns holding null-like values are
+    reassigned) and returned for chaining.
+    """
+    for col in df.columns:
+        series = df[col]
+        mask = null_mask(series)
+        if not mask.any():
+            continue
+        if series.dtype == object:
+            df[col] = series.mask(mask, None)
+        else:
+            df[col] = series.mask(mask)
+    return df
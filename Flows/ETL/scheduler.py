@@ -0,0 +1,147 @@
+"""
+Multi-client scheduler for the "all" run mode.
+
+Clients run concurrently, slowest first (according to the previous run
+durations in State/run_history.json), while never running more than
+`per_source` clients against the same SQL Server nor more than
+`per_warehouse` clients on the same Snowflake warehouse.
+"""
+import os
+import time
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import Counter
+
+from infra.config import load_config
+from Flows.ETL.state import state_path, read_json, update_json, write_json
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+HISTORY_PATH = ('run_history.json',)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name) or default)
+
+
+def resource_keys(client: str) -> tuple:
+    """(source server, snowflake warehouse) a client's flow runs against."""
+    cfg = load_config(client)
+    src = cfg.get('source_db', {})
+    sf = cfg.get('snowflake', {})
+    return f"{src.get('server')}", f"{sf.get('account')}/{sf.get('warehouse')}"
+
+
+def prioritize(clients: list, history: dict) -> list:
+    """
+    Order clients by their last run duration, slowest first.
+    Clients never run before come first since their duration is unknown.
+    """
+    def key(client):
+        last = history.get(client, {}).get('duration_s')
+        return (last is not None, -(last or 0.0))
+    return sorted(clients, key=key)
+
+
+def _run_one(run_fn, client: str) -> dict:
+    started = datetime.now()
+    t0 = time.perf_counter()
+    try:
+        result = run_fn(client)
+        failed = (result or {}).get('failed', 0)
+        status = 'partial' if failed else 'success'
+        error = None
+    except Exception as e:
+        result, status, error = None, 'failed', str(e)
+    return {
+        'client': client,
+        'status': status,
+        'started': started.isoformat(timespec='seconds'),
+        'duration_s': round(time.perf_counter() - t0, 1),
+        'result': result,
+        'error': error,
+    }
+
+
+def run_clients(clients: list, run_fn, max_parallel: int = None, per_source: int = None,
+                per_warehouse: int = None) -> dict:
+    """
+    Run `run_fn(client)` for every client and return a consolidated report.
+
+    Limits default to the ETL_MAX_PARALLEL_CLIENTS, ETL_PER_SOURCE_LIMIT and
+    ETL_PER_WAREHOUSE_LIMIT environment variables (4, 2 and 2).
+    """
+    max_parallel = max_parallel or _env_int('ETL_MAX_PARALLEL_CLIENTS', 4)
+    per_source = per_source or _env_int('ETL_PER_SOURCE_LIMIT', 2)
+    per_warehouse = per_warehouse or _env_int('ETL_PER_WAREHOUSE_LIMIT', 2)
+
+    history_file = state_path(*HISTORY_PATH)
+    history = read_json(history_file)
+    pending = prioritize(clients, history)
+    resources = {client: resource_keys(client) for client in pending}
+    print(f"🗓️  Scheduling {len(pending)} clients: {pending}")
+    print(f"   max {max_parallel} at once, {per_source} per source server, {per_warehouse} per warehouse")
+
+    running_sources, running_warehouses = Counter(), Counter()
+    runs = []
+    started = time.perf_counter()
+
+    def fits(client):
+        source, warehouse = resources[client]
+        return running_sources[source] < per_source and running_warehouses[warehouse] < per_warehouse
+
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='client') as executor:
+        futures = {}
+        while pending or futures:
+            # Start the highest-priority clients whose source and warehouse have room
+            while len(futures) < max_parallel:
+                client = next((c for c in pending if fits(c)), None)
+                if client is None:
+                    break
+                pending.remove(client)
+                source, warehouse = resources[client]
+                running_sources[source] += 1
+                running_warehouses[warehouse] += 1
+                print(f"▶️  Starting {client} (source {source}, warehouse {warehouse})")
+                futures[executor.submit(_run_one, run_fn, client)] = client
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                client = futures.pop(future)
+                source, warehouse = resources[client]
+                running_sources[source] -= 1
+                running_warehouses[warehouse] -= 1
+                run = future.result()
+                runs.append(run)
+                print(f"⏹️  {client}: {run['status']} in {run['duration_s']}s")
+
+    def record(data):
+        for run in runs:
+            data[run['client']] = {k: run[k] for k in ('status', 'started', 'duration_s')}
+        return data
+    update_json(history_file, record)
+
+    report = {
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'wall_time_s': round(time.perf_counter() - started, 1),
+        'sum_client_time_s': round(sum(r['duration_s'] for r in runs), 1),
+        'limits': {'max_parallel': max_parallel, 'per_source': per_source, 'per_warehouse': per_warehouse},
+        'counts': dict(Counter(r['status'] for r in runs)),
+        'runs': runs,
+    }
+    report_file = state_path('reports', f"all_clients_{datetime.now():%Y%m%d_%H%M%S}.json")
+    write_json(report_file, report)
+    print_report(report)
+    print(f"📝 Report written to {report_file}")
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n📈 ALL CLIENTS SUMMARY ({report['wall_time_s']}s wall, "
+          f"{report['sum_client_time_s']}s cumulated):")
+    for run in sorted(report['runs'], key=lambda r: -r['duration_s']):
+        icon = {'success': '✅', 'partial': '⚠️ ', 'failed': '❌'}[run['status']]
+        detail = run['error'] or run['result']
+        print(f"   {icon} {run['client']:<20} {run['duration_s']:>8}s  {detail}")
@@ -0,0 +1,173 @@
+"""
+Parquet staging for Snowflake loads.
+
+Each frame (or chunk) added to a ParquetStager is converted to Arrow with the
+column types declared in Tables/Table/create_tables.sql, written to compressed
+Parquet files of at most `file_rows` rows in a local work directory, and PUT to
+a temporary internal stage with `parallel` upload threads. Local files are
+deleted as soon as they are uploaded. copy_into() then loads all the staged
+files of the table with a single COPY INTO.
+
+Settings come from the client config:
+
+    etl:
+      staging:
+        file_rows: 500000     # rows per Parquet file
+        parallel: 8           # PUT upload threads
+        compression: snappy   # snappy, zstd, gzip...
+        dir: null             # local work directory (system temp by default)
+"""
+import os
+import glob
+import shutil
+import uuid
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from Tables.Table.schema import column_types, base_type
+
+DEFAULT_STAGING = {
+    'file_rows': 500000,
+    'parallel': 8,
+    'compression': 'snappy',
+    'dir': None,
+}
+
+INTEGER_TYPES = {'INT', 'INTEGER', 'BIGINT', 'SMALLINT', 'TINYINT', 'BYTEINT'}
+FLOAT_TYPES = {'FLOAT', 'FLOAT4', 'FLOAT8', 'DOUBLE', 'REAL', 'DECIMAL', 'NUMERIC'}
+STRING_TYPES = {'VARCHAR', 'CHAR', 'CHARACTER', 'STRING', 'TEXT'}
+TIMESTAMP_TYPES = {'DATETIME', 'TIMESTAMP', 'TIMESTAMP_NTZ', 'TIMESTAMP_LTZ', 'TIMESTAMP_TZ'}
+
+
+def arrow_type(sql_type: str):
+    """Arrow type for a declared Snowflake type, None when it should be inferred."""
+    base = base_type(sql_type)
+    if base == 'NUMBER':
+        # NUMBER and NUMBER(p,0) are integers, NUMBER(p,s) with s > 0 are decimals
+        scale = sql_type.rstrip(')').split(',')[1] if ',' in sql_type else '0'
+        return pa.int64() if int(scale) == 0 else pa.float64()
+    if base in INTEGER_TYPES:
+        return pa.int64()
+    if base in FLOAT_TYPES:
+        return pa.float64()
+    if base in STRING_TYPES:
+        return pa.string()
+    if base == 'DATE':
+        return pa.date32()
+    if base in TIMESTAMP_TYPES:
+        return pa.timestamp('us')
+    if base == 'BOOLEAN':
+        return pa.bool_()
+    return None
+
+
+def to_text(series: pd.Series) -> pd.Series:
+    """
+    `series` as strings. Floats holding only whole numbers (nullable numeric
+    columns as read by pyodbc) go through Int64 so 1234.0 becomes '1234',
+    as Snowflake stored them when they were uploaded as numbers.
+    """
+    if pd.api.types.is_float_dtype(series.dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if np.isfinite(values).all() and (np.abs(values) < 2 ** 63).all() and (values == np.trunc(values)).all():
+            series = series.astype('Int64')
+    return series.astype('string')
+
+
+def _to_arrow(series: pd.Series, target):
+    """Convert one column, falling back to a looser conversion when the data does not fit."""
+    if target is None:
+        try:
+            return pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array(to_text(series), type=pa.string(), from_pandas=True)
+    try:
+        if pa.types.is_date32(target) and pd.api.types.is_datetime64_any_dtype(series):
+            return pa.array(series, from_pandas=True).cast(target, safe=False)
+        return pa.array(series, type=target, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        if pa.types.is_string(target):
+            return pa.array(to_text(series), type=pa.string(), from_pandas=True)
+        # Let COPY INTO cast (or reject) the values
+        return _to_arrow(series, None)
+
+
+def to_arrow_table(df: pd.DataFrame, source: str) -> pa.Table:
+    """Arrow table of `df` typed from the DDL of `source` (columns matched case-insensitively)."""
+    declared = column_types(source)
+    arrays, names = [], []
+    for col in df.columns:
+        sql_type = declared.get(str(col).upper())
+        arrays.append(_to_arrow(df[col], arrow_type(sql_type) if sql_type else None))
+        names.append(str(col))
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+class ParquetStager:
+    def __init__(self, conn, schema: str, table: str, source: str = None, file_rows: int = None,
+                 parallel: int = None, compression: str = None, dir: str = None):
+        self.conn = conn
+        self.schema = schema
+        self.table = table.upper()
+        self.source = source or table
+        self.file_rows = int(file_rows or DEFAULT_STAGING['file_rows'])
+        self.parallel = int(parallel or DEFAULT_STAGING['parallel'])
+        self.compression = compression or DEFAULT_STAGING['compression']
+        self.workdir = tempfile.mkdtemp(prefix=f"etl_{self.table}_", dir=dir)
+        self.stage = f"{schema}.ETL_STAGE_{self.table}_{uuid.uuid4().hex[:8].upper()}"
+        self.files = 0
+        self.bytes = 0
+        self._stage_created = False
+
+    def _execute(self, sql: str):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def add(self, df: pd.DataFrame):
+        """Write `df` as Parquet files and upload them to the stage."""
+        if not self._stage_created:
+            self._execute(f"CREATE TEMPORARY STAGE {self.stage}")
+            self._stage_created = True
+
+        table = to_arrow_table(df.reset_index(drop=True), self.source)
+        batch = f"b{self.files:05d}"
+        for offset in range(0, table.num_rows, self.file_rows):
+            path = os.path.join(self.workdir, f"{batch}_{offset // self.file_rows:04d}.parquet")
+            pq.write_table(table.slice(offset, self.file_rows), path, compression=self.compression)
+            self.files += 1
+            self.bytes += os.path.getsize(path)
+        del table
+
+        pattern = os.path.join(self.workdir, f"{batch}_*.parquet").replace('\\', '/')
+        self._execute(
+            f"PUT 'file://{pattern}' @{self.stage} "
+            f"PARALLEL = {self.parallel} AUTO_COMPRESS = FALSE SOURCE_COMPRESSION = NONE OVERWRITE = TRUE"
+        )
+        for path in glob.glob(os.path.join(self.workdir, f"{batch}_*.parquet")):
+            os.remove(path)
+
+    def copy_into(self, table: str):
+        """Load every staged file into `schema.table` with one COPY INTO."""
+        if not self.files:
+            return
+        print(f"   📦 COPY {self.files} Parquet file(s), {self.bytes / 1e6:.1f} MB -> {self.schema}.{table}")
+        self._execute(
+            f"COPY INTO {self.schema}.{table} FROM @{self.stage} "
+            f"FILE_FORMAT = (TYPE = PARQUET USE_LOGICAL_TYPE = TRUE) "
+            f"MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE ON_ERROR = ABORT_STATEMENT"
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        if self._stage_created:
+            self._execute(f"DROP STAGE IF EXISTS {self.stage}")
+            self._stage_created = False
@@ -0,0 +1,49 @@
+"""
+Small JSON state store for the ETL (run history, watermarks, fingerprints...).
+
+Files live under `ETL_STATE_DIR` (default: <project root>/State) and are
+replaced atomically so a crashed run never leaves a half-written file.
+"""
+import os
+import json
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+
+_LOCK = threading.Lock()
+
+
+def state_dir() -> str:
+    return os.environ.get('ETL_STATE_DIR') or os.path.join(project_root, 'State')
+
+
+def state_path(*parts) -> str:
+    """Path of a state file, e.g. state_path('Client1', 'watermarks.json')."""
+    return os.path.join(state_dir(), *parts)
+
+
+def read_json(path: str, default=None):
+    if not os.path.isfile(path):
+        return {} if default is None else default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path: str, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True, default=str)
+    os.replace(tmp, path)
+
+
+def update_json(path: str, updater):
+    """
+    Read-modify-write a JSON file under a process-wide lock.
+    `updater` receives the current content and returns the new one.
+    """
+    with _LOCK:
+        data = updater(read_json(path))
+        write_json(path, data)
+        return data
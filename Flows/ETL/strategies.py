@@ -0,0 +1,161 @@
+"""
+Load strategies: how a table's rows reach Snowflake, each row uploaded once.
+
+* ReplaceStrategy   (full + etl.create_or_replace): truncate the target and
+                    COPY straight into it.
+* SwapStrategy      (full): COPY into a staging copy of the target, then
+                    `ALTER TABLE ... SWAP WITH` so readers never see a
+                    half-loaded or truncated table.
+* WindowStrategy    (incremental): COPY into a temporary table, then, in one
+                    transaction, delete the target rows of the extracted
+                    window (watermark column >= start date) and insert the
+                    temporary table. TABLE_KEYS are not unique for the
+                    watermarked tables, so rows cannot be merged on them.
+
+A strategy is used as begin() -> write(df) for every frame/chunk -> finish(),
+with abort() to clean up after a failure. All calls must use the same
+connection (temporary tables and stages are session-scoped).
+
+Frames are staged as typed Parquet files (Flows/ETL/staging.py) as they are
+written, and finish() loads them with a single COPY INTO.
+"""
+from snowflake.connector.errors import ProgrammingError
+
+from Flows.ETL.staging import ParquetStager
+
+
+class LoadStrategy:
+    name = 'base'
+
+    def __init__(self, conn, schema: str, table: str, source: str = None, staging: dict = None):
+        self.conn = conn
+        self.schema = schema
+        self.table = table.upper()
+        self.columns = None
+        self.rows = 0
+        self.stager = ParquetStager(conn, schema, self.table, source=source, **(staging or {}))
+
+    @property
+    def target(self):
+        return f"{self.schema}.{self.table}"
+
+    def execute(self, sql: str):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql)
+        except ProgrammingError as e:
+            if "does not exist" in str(e):
+                raise ProgrammingError(f"Table {self.target} doesn't exist. Please create the table first using the provided SQL schema.")
+            raise
+        finally:
+            cur.close()
+
+    def begin(self):
+        pass
+
+    def write(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        self.stager.add(df)
+        self.rows += len(df)
+
+    def finish(self):
+        try:
+            self._finish()
+        finally:
+            self.stager.cleanup()
+
+    def _finish(self):
+        raise NotImplementedError
+
+    def abort(self):
+        try:
+            self._abort()
+        finally:
+            self.stager.cleanup()
+
+    def _abort(self):
+        pass
+
+
+class ReplaceStrategy(LoadStrategy):
+    name = 'replace'
+
+    def _finish(self):
+        self.execute(f"TRUNCATE TABLE {self.target}")
+        self.stager.copy_into(self.table)
+
+
+class SwapStrategy(LoadStrategy):
+    name = 'swap'
+
+    @property
+    def stage(self):
+        return f"{self.schema}.STAGE_{self.table}"
+
+    def begin(self):
+        # Same columns, defaults and grants as the target, empty
+        self.execute(f"CREATE OR REPLACE TABLE {self.stage} LIKE {self.target} COPY GRANTS")
+
+    def _finish(self):
+        self.stager.copy_into(f"STAGE_{self.table}")
+        self.execute(f"ALTER TABLE {self.target} SWAP WITH {self.stage}")
+        self.execute(f"DROP TABLE IF EXISTS {self.stage}")
+
+    def _abort(self):
+        self.execute(f"DROP TABLE IF EXISTS {self.stage}")
+
+
+class WindowStrategy(LoadStrategy):
+    name = 'window'
+
+    def __init__(self, conn, schema: str, table: str, window: tuple, source: str = None,
+                 staging: dict = None):
+        """
+        Args:
+            window: (watermark column, 'YYYYMMDD' start date) of the extraction
+        """
+        super().__init__(conn, schema, table, source=source, staging=staging)
+        column, self.start_date = window or (None, None)
+        self.column = column.upper() if column else None
+
+    @property
+    def temp(self):
+        return f"TEMP_{self.table}"
+
+    def begin(self):
+        if not (self.column and self.start_date):
+            raise KeyError(f"No watermark window for {self.table}")
+        # Typed like the target so COPY INTO casts the Parquet columns the same way
+        self.execute(f"CREATE OR REPLACE TEMPORARY TABLE {self.schema}.{self.temp} LIKE {self.target}")
+
+    def _finish(self):
+        if self.rows == 0:
+            return
+        self.stager.copy_into(self.temp)
+        self.execute("BEGIN")
+        try:
+            self.execute(f"DELETE FROM {self.target} WHERE \"{self.column}\" >= TO_DATE('{self.start_date}', 'YYYYMMDD')")
+            # The temporary table was created LIKE the target: same columns, same order
+            self.execute(f"INSERT INTO {self.target} SELECT * FROM {self.schema}.{self.temp}")
+            self.execute("COMMIT")
+        except Exception:
+            self.execute("ROLLBACK")
+            raise
+        self.execute(f"DROP TABLE IF EXISTS {self.schema}.{self.temp}")
+
+    def _abort(self):
+        self.execute(f"DROP TABLE IF EXISTS {self.schema}.{self.temp}")
+
+
+def choose_strategy(conn, schema: str, table: str, mode: str = 'full', create_replace: bool = False,
+                    window: tuple = None, source: str = None, staging: dict = None) -> LoadStrategy:
+    """
+    Cheapest strategy for a load mode. Incremental loads need the `window`
+    (watermark column, start date) their rows were extracted from.
+    """
+    if mode != 'full':
+        return WindowStrategy(conn, schema, table, window, source, staging)
+    if create_replace:
+        return ReplaceStrategy(conn, schema, table, source=source, staging=staging)
+    return SwapStrategy(conn, schema, table, source=source, staging=staging)
@@ -1,15 +1,70 @@
 import pandas as pd
+import numpy as np
 import logging
 
+from Tables.Queries.queries import TABLE_KEYS
+from Flows.ETL.instrumentation import NULL_RUN
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def transform_data(raw: dict) -> dict:
+def _dedup_columns(name: str, df: pd.DataFrame) -> list:
+    """Columns hashed to find duplicate candidates: the TABLE_KEYS of `name` if present, else all."""
+    keys = [key.upper() for key in TABLE_KEYS.get(name.upper(), [])]
+    if keys and all(key in df.columns for key in keys):
+        return keys
+    return list(df.columns)
+
+def duplicate_positions(name: str, df: pd.DataFrame) -> np.ndarray:
+    """
+    Positions of the rows `df.duplicated()` would flag, without comparing every row.
+    Rows are hashed on the table keys; only rows sharing a key hash are
+    compared on all their columns, so the result is the same as a full-row
+    deduplication (a key repeated with different values is kept).
+    """
+    if len(df) < 2 or df.columns.has_duplicates:
+        return np.flatnonzero(df.duplicated().to_numpy()) if len(df) > 1 else np.array([], dtype=np.intp)
+    hashes = pd.util.hash_pandas_object(df[_dedup_columns(name, df)], index=False).to_numpy()
+    candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+    if not len(candidates):
+        return candidates
+    confirmed = df.iloc[candidates].duplicated().to_numpy()
+    return candidates[confirmed]
+
+def _transform(name: str, df: pd.DataFrame, run) -> pd.DataFrame:
+    """`df` cleaned in place."""
+    with run.span(name, 'transform', rows=len(df)):
+        df.columns = [c.strip().upper() for c in df.columns]
+        duplicates = duplicate_positions(name, df)
+        if len(duplicates):
+            df.drop(index=df.index[duplicates], inplace=True)
+            df.reset_index(drop=True, inplace=True)
+        run.count(name, 'duplicates_dropped', len(duplicates))
+    return df
+
+def transform_frame(name: str, df: pd.DataFrame, run=NULL_RUN) -> pd.DataFrame:
+    """
+    Clean one extracted frame in place: the caller's frame is modified and
+    must not be used afterwards. Only frames holding duplicates are rebuilt.
+    """
+    logger.info(f"🧹 Transforming: {name}")
+    return _transform(name, df, run)
+
+def transform_data(raw: dict, run=NULL_RUN) -> dict:
+    """
+    Transform every frame of `raw`, removing each from `raw` once transformed
+    so the raw and cleaned frames are never all held at once.
+    """
     cleaned = {}
-    for name, df in raw.items():
+    for name in list(raw):
         logger.info(f"🧹 Transforming: {name}")
-        df = df.copy()
-        df = df.drop_duplicates()
-        df.columns = [c.strip().upper() for c in df.columns]
-        cleaned[name] = df
+        cleaned[name] = _transform(name, raw.pop(name), run)
     return cleaned
+
+def transform_chunks(name: str, chunks, run=NULL_RUN):
+    """
+    Lazily transform a stream of chunks for one source.
+    Duplicates are only removed within each chunk.
+    """
+    for chunk in chunks:
+        yield transform_frame(name, chunk, run)
@@ -0,0 +1,69 @@
+"""
+Per-client, per-table high-watermarks for incremental extraction.
+
+After a successful load, the max of the table's WATERMARK_COLS column is stored
+in State/<client>/watermarks.json. The next incremental run extracts rows from
+that date minus `etl.incremental_lookback_days` (late or corrected rows) and
+replaces the target rows of that window (DELETE + INSERT in one transaction,
+as TABLE_KEYS are not unique row keys).
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from Flows.ETL.state import state_path, read_json, update_json
+from Tables.Queries.queries import WATERMARK_COLS
+
+DEFAULT_LOOKBACK_DAYS = 3
+
+
+def _path(client: str) -> str:
+    return state_path(client, 'watermarks.json')
+
+
+def get_watermarks(client: str) -> dict:
+    return read_json(_path(client))
+
+
+def is_incremental(source: str) -> bool:
+    return source.upper() in WATERMARK_COLS
+
+
+def start_date_for(client: str, source: str, lookback_days: int = DEFAULT_LOOKBACK_DAYS):
+    """
+    'YYYYMMDD' lower bound for the next extraction of `source`, or None when
+    the table has no watermark yet (first run: full window).
+    """
+    entry = get_watermarks(client).get(source.upper())
+    if not entry:
+        return None
+    since = datetime.fromisoformat(entry['watermark']) - timedelta(days=lookback_days)
+    return since.strftime('%Y%m%d')
+
+
+def compute_watermark(df: pd.DataFrame, source: str):
+    """ISO max of the watermark column of `df`, or None if it has no values."""
+    col = WATERMARK_COLS.get(source.upper())
+    if not col:
+        return None
+    matches = [c for c in df.columns if c.upper() == col.upper()]
+    if not matches or df.empty:
+        return None
+    value = pd.to_datetime(df[matches[0]], errors='coerce').max()
+    return None if pd.isna(value) else value.isoformat()
+
+
+def save_watermark(client: str, source: str, watermark: str):
+    """Record `watermark` for `source` unless an older value would replace a newer one."""
+    if not watermark:
+        return
+
+    def update(data):
+        current = data.get(source.upper(), {}).get('watermark')
+        if current is None or watermark > current:
+            data[source.upper()] = {
+                'watermark': watermark,
+                'updated': datetime.now().isoformat(timespec='seconds'),
+            }
+        return data
+    update_json(_path(client), update)
@@ -1,6 +1,15 @@
 import os
+import sys
 import snowflake.connector
 
+# Ensure project root is on sys.path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Flows.Creation.introspection import SchemaCache
+
 # ── 1️⃣ Charger la config depuis les variables d’environnement ───────────────
 SF_ACCOUNT   = os.getenv("SF_ACCOUNT",   "your_snowflake_account")
 SF_USER      = os.getenv("SF_USER",      "USER")
@@ -90,41 +99,42 @@ try:
         'FACT_POINTAGE'
     ]
 
-    # ── 8️⃣ Boucle principale : n’affecte que les schémas de mapping ──────────
+    # ── 8️⃣ Un seul scan des métadonnées pour tous les schémas mappés ─────────
+    cache = SchemaCache(conn, "BEE_CENTRAL").load(list(mapping), tables)
+
+    # ── 9️⃣ Boucle principale : n’affecte que les schémas de mapping ──────────
     for schema_name, id_client in mapping.items():
         print(f"\n🔄 Traitement de {schema_name} (ID_CLIENT={id_client})")
         for tbl in tables:
             full_name = f"BEE_CENTRAL.{schema_name}.{tbl}"
 
-            # 8.1 Vérifier si la table existe
-            cur.execute("""
-                SELECT COUNT(*) 
-                  FROM BEE_CENTRAL.INFORMATION_SCHEMA.TABLES
-                 WHERE TABLE_SCHEMA = %s
-                   AND TABLE_NAME   = %s
-            """, (schema_name, tbl))
-            if cur.fetchone()[0] == 0:
+            # 9.1 Vérifier si la table existe
+            if not cache.table_exists(schema_name, tbl):
                 print(f" • Table introuvable : {full_name} → skip")
                 continue
 
-            # 8.2 Vérifier si colonne ID_CLIENT existe
-            cur.execute("""
-                SELECT COUNT(*) 
-                  FROM BEE_CENTRAL.INFORMATION_SCHEMA.COLUMNS
-                 WHERE TABLE_SCHEMA = %s
-                   AND TABLE_NAME   = %s
-                   AND COLUMN_NAME  = 'ID_CLIENT'
-            """, (schema_name, tbl))
-            if cur.fetchone()[0] == 0:
-                # Ajouter la colonne
-                cur.execute(f"ALTER TABLE {full_name} ADD COLUMN ID_CLIENT INT")
-                print(f" ✅ Colonne ajoutée : {full_name}.ID_CLIENT")
+            # 9.2 Colonne absente : ajout avec DEFAULT, les lignes existantes
+            #     prennent la valeur sans réécriture et l'ETL la renseigne ensuite
+            if not cache.has_column(schema_name, tbl, "ID_CLIENT"):
+                cur.execute(f"ALTER TABLE {full_name} ADD COLUMN ID_CLIENT INT DEFAULT {int(id_client)}")
+                cache.mark_column(schema_name, tbl, "ID_CLIENT", "NUMBER", str(id_client))
+                print(f" ✅ Colonne ajoutée : {full_name}.ID_CLIENT (DEFAULT {id_client})")
+                continue
+
+            # 9.3 Colonne présente : ne réécrire que les lignes mal taguées. Les
+            #     micro-partitions déjà à la bonne valeur (min = max = ID_CLIENT,
+            #     sans NULL) sont éliminées par le pruning, sans être lues.
+            cur.execute(
+                f"UPDATE {full_name} SET ID_CLIENT = %s WHERE ID_CLIENT IS DISTINCT FROM %s",
+                (id_client, id_client)
+            )
+            updated = cur.rowcount or 0
+            if updated:
+                print(f" 🔄 Mis à jour {full_name} → ID_CLIENT={id_client} ({updated} lignes)")
             else:
-                print(f" ✔️ Colonne déjà présente : {full_name}.ID_CLIENT")
+                print(f" ✔️ Déjà à jour : {full_name}")
 
-            # 8.3 Mettre à jour les données
-            cur.execute(f"UPDATE {full_name} SET ID_CLIENT = %s", (id_client,))
-            print(f" 🔄 Mis à jour {full_name} → ID_CLIENT={id_client}")
+    print("\nℹ️ Renseigner `id_client` dans Clients/<client>/config.yml pour que l'ETL tague les nouvelles lignes.")
 
 finally:
     cur.close()
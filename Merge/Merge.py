@@ -1,104 +1,358 @@
 import os
-import snowflake.connector
-
-# 1 ✨ Connexion
-conn = snowflake.connector.connect(
-    account   = os.getenv("SF_ACCOUNT",   "your_snowflake_account"),
-    user      = os.getenv("SF_USER",      "USER"),
-    password  = os.getenv("SF_PASSWORD",  "your_password_account"),
-    warehouse = os.getenv("SF_WAREHOUSE", "COMPUTE_WH"),
-    role      = os.getenv("SF_ROLE",      "ACCOUNTADMIN"),
-    database  = "BEE_CENTRAL",
-    schema    = "PUBLIC"
-)
-cur = conn.cursor()
-
-try:
-    # 2 ✨ Récupérer mapping SCHEMA → ID_CLIENT
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Ensure project root is on sys.path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Flows.ETL.connections import params_pool
+from Flows.Creation.introspection import SchemaCache
+from Tables.Queries.queries import DATE_COLS
+
+SOURCE_DB = "BEE_CENTRAL"
+TARGET_DB = "BEE_MERGE"
+TARGET_SCHEMA = "PUBLIC"
+MERGE_LOG = f"{TARGET_DB}.{TARGET_SCHEMA}.MERGE_LOG"
+
+# Modes de fusion :
+#   new         : seuls les clients absents de la cible sont ajoutés
+#   incremental : les clients dont la table source a changé depuis la dernière
+#                 fusion (LAST_ALTERED / ROW_COUNT) sont remplacés
+#   full        : tous les clients sont remplacés
+MODES = ("new", "incremental", "full")
+
+# Tables concernées par la fusion
+TABLES = [
+    'BUDGET','COMPTES_ANALYTIQUES','COMPTES_BUDGETAIRES',
+    'COMPTES_PL','COUTS_BEEONE','PRODUCTION_BEEONE',
+    'PROFIL_DE_PRODUCTION','VERSIONS_BUDGET','DIM_CALENDAR'
+]
+
+# Nombre de tables fusionnées en parallèle
+MERGE_WORKERS = int(os.getenv("MERGE_WORKERS", "4"))
+
+
+def load_mapping(cur) -> dict:
+    """SCHEMA → ID_CLIENT, en ignorant les ID_CLIENT en double."""
     cur.execute("""
         SELECT SCHEMA_NAME, ID_CLIENT
           FROM BEE_MASTER.PUBLIC.CLIENT_DATABASES
     """)
-    raw_mapping = cur.fetchall()
     mapping = {}
     id_client_seen = set()
-    for schema, id_client in raw_mapping:
+    for schema, id_client in cur.fetchall():
         if id_client in id_client_seen:
             print(f"⚠️  Duplicate ID_CLIENT {id_client} for schema {schema}, skipping this schema.")
             continue
         mapping[schema] = id_client
         id_client_seen.add(id_client)
+    return mapping
 
-    # 3 ✨ Lister les schémas réels dans BEE_CENTRAL
-    cur.execute("""
+
+def list_schemas(cur) -> set:
+    cur.execute(f"""
         SELECT SCHEMA_NAME
-          FROM BEE_CENTRAL.INFORMATION_SCHEMA.SCHEMATA
+          FROM {SOURCE_DB}.INFORMATION_SCHEMA.SCHEMATA
          WHERE SCHEMA_NAME LIKE 'BEE_TEST%'
     """)
-    actual_schemas = {r[0] for r in cur.fetchall()}
-    print("Schemas trouvés :", actual_schemas)
-
-    # 4 ✨ Filtrer mapping par schémas existants
-    schemas_to_merge = [s for s in mapping if s in actual_schemas]
-    if not schemas_to_merge:
-        print("🚫 No schemas to merge. Exiting.")
-        exit()
-    print("Schemas à fusionner :", schemas_to_merge)
-
-    # 5 ✨ Tables concernées par la fusion
-    tables = [
-        'BUDGET','COMPTES_ANALYTIQUES','COMPTES_BUDGETAIRES',
-        'COMPTES_PL','COUTS_BEEONE','PRODUCTION_BEEONE',
-        'PROFIL_DE_PRODUCTION','VERSIONS_BUDGET','DIM_CALENDAR'
-    ]
-
-    # 6 ✨ Fusion incrémentale
+    return {r[0] for r in cur.fetchall()}
+
+
+def load_merge_log(cur) -> dict:
+    """(SCHEMA, TABLE) → (LAST_ALTERED, ROW_COUNT) des sources lors de leur dernière fusion."""
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MERGE_LOG} (
+            TABLE_NAME    STRING,
+            SCHEMA_NAME   STRING,
+            ID_CLIENT     NUMBER,
+            LAST_ALTERED  TIMESTAMP_LTZ,
+            ROW_COUNT     NUMBER,
+            MERGED_AT     TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP()
+        )
+    """)
+    cur.execute(f"SELECT SCHEMA_NAME, TABLE_NAME, LAST_ALTERED, ROW_COUNT FROM {MERGE_LOG}")
+    return {(schema, table): (altered, rows) for schema, table, altered, rows in cur.fetchall()}
+
+
+def record_merge(cur, tbl: str, sources: list, fingerprints: dict):
+    """Enregistre dans MERGE_LOG l'état des sources qui viennent d'être fusionnées."""
+    rows, params = [], []
+    for schema, id_client, _ in sources:
+        altered, row_count = fingerprints.get((schema, tbl), (None, None))
+        rows.append("(%s, %s, %s, %s, %s)")
+        params += [tbl, schema, id_client, altered.isoformat() if altered else None, row_count]
+    cur.execute(f"""
+        MERGE INTO {MERGE_LOG} l
+        USING (
+            SELECT $1 AS TABLE_NAME, $2 AS SCHEMA_NAME, $3 AS ID_CLIENT,
+                   $4::TIMESTAMP_LTZ AS LAST_ALTERED, $5 AS ROW_COUNT
+              FROM VALUES {", ".join(rows)}
+        ) s
+        ON l.TABLE_NAME = s.TABLE_NAME AND l.SCHEMA_NAME = s.SCHEMA_NAME
+        WHEN MATCHED THEN UPDATE SET
+            ID_CLIENT = s.ID_CLIENT, LAST_ALTERED = s.LAST_ALTERED,
+            ROW_COUNT = s.ROW_COUNT, MERGED_AT = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT (TABLE_NAME, SCHEMA_NAME, ID_CLIENT, LAST_ALTERED, ROW_COUNT)
+            VALUES (s.TABLE_NAME, s.SCHEMA_NAME, s.ID_CLIENT, s.LAST_ALTERED, s.ROW_COUNT)
+    """, params)
+
+
+def cluster_keys(tbl: str, target_cols: list) -> list:
+    """
+    Clés de clustering d'une table fusionnée : ID_CLIENT (filtre tenant de
+    Metabase) puis la colonne date de DATE_COLS si la cible la possède.
+    """
+    keys = ["ID_CLIENT"]
+    date_col = DATE_COLS.get(tbl)
+    if isinstance(date_col, (list, tuple)):
+        date_col = date_col[0] if date_col else None
+    if date_col:
+        match = next((c for c in target_cols if c.upper() == date_col.upper()), None)
+        if match:
+            keys.append(match)
+    return keys
+
+
+def _cluster_by(keys) -> str:
+    return ", ".join(f'"{k}"' for k in keys)
+
+
+def ensure_clustering(cur, tbl: str, keys: list, current):
+    """ALTER TABLE … CLUSTER BY uniquement si la clé actuelle diffère."""
+    wanted = f"LINEAR({_cluster_by(keys)})"
+    normalize = lambda key: (key or "").replace(" ", "").replace('"', "").upper()
+    if normalize(current) == normalize(wanted):
+        return
+    cur.execute(f"ALTER TABLE {TARGET_DB}.{TARGET_SCHEMA}.{tbl} CLUSTER BY ({_cluster_by(keys)})")
+    print(f"🧩 {tbl} clustered by {keys}")
+
+
+def clustering_report(cur, tables):
+    """
+    Efficacité du pruning des micro-partitions par table fusionnée : une
+    profondeur moyenne proche de 1 signifie qu'un filtre ID_CLIENT ne lit que
+    les partitions du tenant.
+    """
+    print("\n📊 Clustering (micro-partitions) :")
+    print(f"   {'TABLE':<22} {'partitions':>10} {'constant':>9} {'overlaps':>9} {'depth':>7}  keys")
     for tbl in tables:
-        target = f"BEE_MERGE.PUBLIC.{tbl}"
+        cur.execute(f"SELECT SYSTEM$CLUSTERING_INFORMATION('{TARGET_DB}.{TARGET_SCHEMA}.{tbl}')")
+        info = json.loads(cur.fetchall()[0][0])
+        print(f"   {tbl:<22} {info.get('total_partition_count', 0):>10} "
+              f"{info.get('total_constant_partition_count', 0):>9} "
+              f"{info.get('average_overlaps', 0):>9} {info.get('average_depth', 0):>7}  "
+              f"{info.get('cluster_by_keys', '')}")
+
+
+def merged_clients(cur, existing_tables) -> dict:
+    """TABLE → ID_CLIENT déjà fusionnés, en une seule requête pour toutes les cibles."""
+    done = {tbl: set() for tbl in TABLES}
+    if not existing_tables:
+        return done
+    cur.execute(" UNION ALL ".join(
+        f"SELECT '{tbl}', ID_CLIENT FROM {TARGET_DB}.{TARGET_SCHEMA}.{tbl} GROUP BY ID_CLIENT"
+        for tbl in existing_tables
+    ))
+    for tbl, id_client in cur.fetchall():
+        done[tbl].add(id_client)
+    return done
+
+
+def build_insert(tbl: str, target_cols: list, sources: list, order_by=None) -> str:
+    """
+    Un seul INSERT … SELECT … UNION ALL … pour tous les schémas à fusionner.
+    `sources` : liste de (schema, id_client, colonnes source). Les colonnes
+    absentes d'un schéma sont sélectionnées à NULL. ID_CLIENT vient toujours
+    du mapping, jamais de la source : les lignes insérées sont exactement celles
+    que le DELETE … WHERE ID_CLIENT IN (…) de la fusion suivante supprime.
+    Les lignes sont triées sur `order_by` (les clés de clustering) pour arriver
+    déjà regroupées.
+    """
+    cols = [c for c in target_cols if c != "ID_CLIENT"]
+    selects = []
+    for schema, id_client, src_cols in sources:
+        present = set(src_cols)
+        exprs = [f'"{c}"' if c in present else f'NULL AS "{c}"' for c in cols]
+        exprs.append(f'{int(id_client)} AS "ID_CLIENT"')
+        selects.append(f"SELECT {', '.join(exprs)} FROM {SOURCE_DB}.{schema}.{tbl}")
+    cols_str = ", ".join(f'"{c}"' for c in cols + ["ID_CLIENT"])
+    union = "\nUNION ALL\n".join(selects)
+    if order_by:
+        union = f"SELECT * FROM (\n{union}\n) ORDER BY {_cluster_by(order_by)}"
+    return f"INSERT INTO {TARGET_DB}.{TARGET_SCHEMA}.{tbl} ({cols_str})\n{union}"
+
 
-        # Création de la table cible si absente
-        cur.execute(f"""
-            CREATE TABLE IF NOT EXISTS {target}
-            LIKE BEE_CENTRAL.{schemas_to_merge[0]}.{tbl}
-        """)
+def merge_table(pool, tbl: str, target_cols, sources: list, replace_ids, fingerprints: dict,
+                clustering=None) -> int:
+    """
+    Crée la cible si besoin puis insère tous les schémas en une requête.
+    Les partitions des clients de `replace_ids` sont supprimées dans la même
+    transaction, les lecteurs ne voient jamais un client à moitié fusionné.
+    """
+    target = f"{TARGET_DB}.{TARGET_SCHEMA}.{tbl}"
+    first_schema, _, first_cols = sources[0]
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        try:
+            if target_cols is None:
+                # Création de la table cible si absente
+                cur.execute(f"CREATE TABLE IF NOT EXISTS {target} LIKE {SOURCE_DB}.{first_schema}.{tbl}")
+                target_cols = list(first_cols)
+            # S'assurer que la colonne ID_CLIENT existe
+            if "ID_CLIENT" not in target_cols:
+                cur.execute(f"ALTER TABLE {target} ADD COLUMN ID_CLIENT NUMBER")
+                target_cols = target_cols + ["ID_CLIENT"]
+            keys = cluster_keys(tbl, target_cols)
+            ensure_clustering(cur, tbl, keys, clustering)
 
-        # S'assurer que la colonne ID_CLIENT existe
-        cur.execute(f"DESC TABLE {target}")
-        target_cols = [r[0] for r in cur.fetchall()]
-        if "ID_CLIENT" not in target_cols:
-            cur.execute(f"ALTER TABLE {target} ADD COLUMN ID_CLIENT NUMBER")
+            for schema, _, src_cols in sources:
+                extra = [c for c in src_cols if c not in target_cols]
+                if extra:
+                    print(f"⚠️  {schema}.{tbl}: colonnes ignorées (absentes de la cible) {extra}")
 
-        # Récupérer les ID_CLIENT déjà fusionnés
-        cur.execute(f"SELECT DISTINCT ID_CLIENT FROM {target}")
-        done = {r[0] for r in cur.fetchall()}
+            cur.execute("BEGIN")
+            try:
+                if replace_ids:
+                    cur.execute(f"DELETE FROM {target} WHERE ID_CLIENT IN ({', '.join(str(int(i)) for i in replace_ids)})")
+                cur.execute(build_insert(tbl, target_cols, sources, order_by=keys))
+                rows = cur.rowcount or 0
+                record_merge(cur, tbl, sources, fingerprints)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            return rows
+        finally:
+            cur.close()
 
-        # Fusionner les clients non encore traités
+
+def plan_merge(mode: str, mapping: dict, schemas_to_merge: list, source_cols: dict,
+               done: dict, fingerprints: dict, merge_log: dict) -> dict:
+    """TABLE → (sources à insérer, ID_CLIENT dont la partition est remplacée)."""
+    plan = {}
+    for tbl in TABLES:
+        sources, replace_ids = [], []
         for schema in schemas_to_merge:
             id_client = mapping[schema]
-            if id_client in done:
-                print(f"→ Skipping {schema} (ID_CLIENT={id_client})")
+            if (schema, tbl) not in source_cols:
+                print(f"• Table introuvable : {SOURCE_DB}.{schema}.{tbl} → skip")
+                continue
+            present = id_client in done[tbl]
+            if mode == "new" and present:
+                print(f"→ Skipping {schema}.{tbl} (ID_CLIENT={id_client})")
+                continue
+            if mode == "incremental" and present and merge_log.get((schema, tbl)) == fingerprints.get((schema, tbl)):
+                print(f"→ Unchanged {schema}.{tbl} (ID_CLIENT={id_client})")
                 continue
+            sources.append((schema, id_client, source_cols[(schema, tbl)]))
+            if present:
+                replace_ids.append(id_client)
+        if sources:
+            plan[tbl] = (sources, replace_ids)
+    return plan
+
+
+def main(mode: str = "new", report: bool = False):
+    # Connexion (pool partagé avec le reste du projet, une connexion par table en cours)
+    pool = params_pool(dict(
+        account   = os.getenv("SF_ACCOUNT",   "your_snowflake_account"),
+        user      = os.getenv("SF_USER",      "USER"),
+        password  = os.getenv("SF_PASSWORD",  "your_password_account"),
+        warehouse = os.getenv("SF_WAREHOUSE", "COMPUTE_WH"),
+        role      = os.getenv("SF_ROLE",      "ACCOUNTADMIN"),
+        database  = SOURCE_DB,
+        schema    = "PUBLIC"
+    ), max_size=MERGE_WORKERS, name="BEE_MERGE")
+
+    try:
+        with pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                # 1 ✨ Mapping SCHEMA → ID_CLIENT, filtré par les schémas réels de BEE_CENTRAL
+                mapping = load_mapping(cur)
+                actual_schemas = list_schemas(cur)
+                print("Schemas trouvés :", actual_schemas)
+                schemas_to_merge = [s for s in mapping if s in actual_schemas]
+                if not schemas_to_merge:
+                    print("🚫 No schemas to merge. Exiting.")
+                    return
+                print("Schemas à fusionner :", schemas_to_merge)
+
+                # 2 ✨ Métadonnées des sources et des cibles (une requête INFORMATION_SCHEMA chacune)
+                source = SchemaCache(conn, SOURCE_DB).load(schemas_to_merge, TABLES)
+                target = SchemaCache(conn, TARGET_DB).load([TARGET_SCHEMA], TABLES)
+                source_cols, fingerprints = {}, {}
+                for schema in schemas_to_merge:
+                    for tbl in source.tables(schema):
+                        info = source.table_info(schema, tbl)
+                        source_cols[(schema, tbl)] = source.columns(schema, tbl)
+                        fingerprints[(schema, tbl)] = (info.last_altered, info.row_count)
+                target_cols = {t: target.columns(TARGET_SCHEMA, t) for t in target.tables(TARGET_SCHEMA)}
+                clustering = {t: target.table_info(TARGET_SCHEMA, t).clustering_key for t in target_cols}
+                done = merged_clients(cur, [t for t, c in target_cols.items() if "ID_CLIENT" in c])
+                merge_log = load_merge_log(cur)
+
+                # Tables existantes non fusionnées cette fois : clustering tout de même à jour
+                for tbl, cols in target_cols.items():
+                    if "ID_CLIENT" in cols:
+                        ensure_clustering(cur, tbl, cluster_keys(tbl, cols), clustering.get(tbl))
+                        clustering[tbl] = f"LINEAR({_cluster_by(cluster_keys(tbl, cols))})"
+            finally:
+                cur.close()
+
+        # 3 ✨ Schémas à (re)fusionner par table selon le mode
+        print(f"Mode de fusion : {mode}")
+        plan = plan_merge(mode, mapping, schemas_to_merge, source_cols, done, fingerprints, merge_log)
 
-            # Décrire colonnes source
-            cur.execute(f"DESC TABLE BEE_CENTRAL.{schema}.{tbl}")
-            cols = [row[0] for row in cur.fetchall()]
-            quoted_cols = [f'"{col}"' for col in cols]
+        # 4 ✨ Fusion des tables en parallèle
+        failed = []
+        with ThreadPoolExecutor(max_workers=MERGE_WORKERS, thread_name_prefix='merge') as executor:
+            futures = {
+                executor.submit(merge_table, pool, tbl, target_cols.get(tbl), sources, replace_ids,
+                                fingerprints, clustering.get(tbl)): tbl
+                for tbl, (sources, replace_ids) in plan.items()
+            }
+            for future in as_completed(futures):
+                tbl = futures[future]
+                try:
+                    rows = future.result()
+                    schemas = [s for s, _, _ in plan[tbl][0]]
+                    replaced = plan[tbl][1]
+                    print(f"✔ Merged {tbl}: {rows} rows from {len(schemas)} schema(s) {schemas}"
+                          + (f", replaced ID_CLIENT {replaced}" if replaced else ""))
+                except Exception as e:
+                    failed.append(tbl)
+                    print(f"❌ Merge failed for {tbl}: {e}")
 
-            # Préparer insertion
-            cols_str = ", ".join(quoted_cols) + ("" if "ID_CLIENT" in cols else ', "ID_CLIENT"')
-            select_cols = ", ".join(quoted_cols) + ("" if "ID_CLIENT" in cols else ", %s AS ID_CLIENT")
-            params = () if "ID_CLIENT" in cols else (id_client,)
+        if failed:
+            print(f"\n⚠️ Fusion terminée avec des erreurs : {failed}")
+        else:
+            print(f"\n✨ Fusion terminée ({mode}) : {len(plan)} table(s) mises à jour.")
 
-            cur.execute(f"""
-                INSERT INTO {target} ({cols_str})
-                SELECT {select_cols}
-                  FROM BEE_CENTRAL.{schema}.{tbl}
-            """, params)
+        if report:
+            merged = [t for t in TABLES if t in target_cols or (t in plan and t not in failed)]
+            with pool.connection() as conn:
+                cur = conn.cursor()
+                try:
+                    clustering_report(cur, merged)
+                finally:
+                    cur.close()
 
-            print(f"✔ Merged {schema}.{tbl} as ID_CLIENT={id_client}")
+    finally:
+        pool.log_stats()
+        pool.close()
 
-    print("\n✨ Fusion terminée. Seuls les nouveaux clients ont été ajoutés.")
 
-finally:
-    cur.close()
-    conn.close()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fusion des schémas clients de BEE_CENTRAL dans BEE_MERGE")
+    parser.add_argument("--mode", choices=MODES, default="new",
+                        help="new: nouveaux clients seulement, incremental: clients modifiés, full: tous")
+    parser.add_argument("--clustering-report", action="store_true",
+                        help="affiche l'efficacité du clustering (SYSTEM$CLUSTERING_INFORMATION) après la fusion")
+    args = parser.parse_args()
+    main(args.mode, args.clustering_report)
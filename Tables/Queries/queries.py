@@ -32,7 +32,7 @@ QUERIES = {
             LEFT JOIN Unite_Operation uo on uo.IDUnite_Operation = recp_c_p.IDUnite_Operation
             LEFT JOIN bdg_codes_analytiques ca on ca.id_referentiel = pc.idproduit_rendement 
                 and table_nom = 'produit_rendement' and rubrique_5 = 'Marché local'
-            where recp_c.DATE >= '20230101' and v.type not in (4)
+            where recp_c.DATE >= '{start_date}' and v.type not in (4)
             UNION
             --BLOC VENTE EXPORT
             SELECT 
@@ -53,7 +53,7 @@ QUERIES = {
             LEFT JOIN parcelleculturale pc on rdt_q_p.idparcelle = pc.id
             LEFT JOIN bdg_codes_analytiques ca on ca.id_referentiel = pc.idproduit_rendement 
                 and table_nom = 'produit_rendement' and rubrique_5 = 'Export'
-            where rdt_q.Date_Rapport >= '20230101'
+            where rdt_q.Date_Rapport >= '{start_date}'
         """,
         "PROFIL_DE_PRODUCTION": """
             SELECT DISTINCT 
@@ -108,7 +108,7 @@ QUERIES = {
             LEFT JOIN Sous_categorie_depensce scd on p.IDSous_categorie_depensce = scd.id
             LEFT JOIN ParcelleCulturale_Depence pcd on pcd.id_depence = d.id_depence
             LEFT JOIN ParcelleCulturale on pcd.ID_parcelle = parcelleculturale.id  
-            where d.date_depense >= '20240101'
+            where d.date_depense >= '{start_date}'
             UNION ALL
             --MO--
             SELECT 
@@ -128,7 +128,7 @@ QUERIES = {
                     LEFT JOIN Pointage_ParcelleCulturale ppc on ppc.IDPointage = p.IDPointage
                     LEFT JOIN ParcelleCulturale on ppc.ParcCul_ID = parcelleculturale.id 
                     and p.date >= parcelleculturale.Date_Previsionnelle 
-            where p.date >= '20240101'
+            where p.date >= '{start_date}'
             UNION ALL
             SELECT 
                 CAST(ms.date AS DATETIME) AS date, 'Intrants'  as Charge_niv1, p.Categorie as Charge_niv2, p.Sous_Categorie as Charge_niv3, p.Designation as Charge_Article, 
@@ -139,7 +139,7 @@ QUERIES = {
             LEFT JOIN Produit p on p.id = ms.produit
             LEFT JOIN ParcelleCulturale on  msp.ParcelleCulturale = parcelleculturale.id 
                     and ms.date >= parcelleculturale.Date_Previsionnelle 
-            Where ms.date >= '20240101' 
+            Where ms.date >= '{start_date}' 
             GROUP BY ms.date, ms.produit, ms.IDMouvement_stock, msp.ParcelleCulturale,p.Categorie, p.Sous_Categorie,p.Designation
                     ) as t 
                 LEFT JOIN parcelleculturale pc on pc.id = t.idparcelleculturale 
@@ -420,5 +420,18 @@ DATE_COLS = {
     "FACT_POINTAGE"     : "date_pointage",
 }
 
+# Lower bound substituted for {start_date} when no watermark applies (full mode)
+DEFAULT_START_DATES = {
+    "PRODUCTION_BEEONE" : "20230101",
+    "COUTS_BEEONE"      : "20240101",
+}
+
+# Output column whose max is the high-watermark of an incremental extraction.
+# It must be the column filtered by {start_date} in the query.
+WATERMARK_COLS = {
+    "PRODUCTION_BEEONE" : "date_recolte",
+    "COUTS_BEEONE"      : "date",
+}
+
 # Simplified: Each query automatically uses its own table name
 # Query name = Table name (no explicit mapping needed)
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Tokenizer-based SQL statement splitter and parser.
+
+A single pass of one compiled tokenizer walks the script; comments, quoted
+identifiers, string literals and $$ blocks are tokens of their own, so a `;`
+inside any of them never ends a statement. Every statement becomes a
+Statement:
+
+    >>> [s.kind for s in parse_statements("CREATE TABLE t (a NUMBER); INSERT INTO t VALUES (1);")]
+    ['CREATE TABLE', 'INSERT']
+
+* kind: 'CREATE TABLE', 'ALTER TABLE', 'DROP VIEW'... for CREATE/ALTER/DROP,
+  otherwise the first keyword ('INSERT', 'USE', 'GRANT'...)
+* table: object name (quotes removed, parts joined with '.'), None if none
+* columns: {COLUMN: TYPE} of a CREATE TABLE column list, names as written,
+  types upper-cased without spaces ('NUMBER(4,0)')
+* references: tables named after REFERENCES
+* text: the statement without its trailing ';'
+* quoted: the names of `columns` written as quoted identifiers, whose case
+  Snowflake keeps (unquoted names are folded to upper case)
+"""
+import re
+from collections import namedtuple
+
+Statement = namedtuple('Statement', 'kind table columns references text quoted')
+
+TOKEN = re.compile(r'''
+      (?P<ws>\s+)
+    | (?P<comment>--[^\n]*|//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<dollar>\$\$.*?(?:\$\$|\Z))
+    | (?P<string>'(?:[^'\\]|\\.|'')*(?:'|\Z))
+    | (?P<quoted>"(?:[^"]|"")*(?:"|\Z))
+    | (?P<number>\d+(?:\.\d*)?)
+    | (?P<word>[A-Za-z_][\w$]*)
+    | (?P<punct>.)
+''', re.VERBOSE | re.DOTALL)
+
+OBJECT_MODIFIERS = {'OR', 'REPLACE', 'TEMPORARY', 'TEMP', 'TRANSIENT', 'LOCAL', 'GLOBAL',
+                    'VOLATILE', 'SECURE', 'RECURSIVE', 'EXTERNAL', 'MATERIALIZED'}
+CONSTRAINT_WORDS = {'PRIMARY', 'FOREIGN', 'UNIQUE', 'CONSTRAINT', 'CHECK'}
+NAME_PREFIX = {
+    'INSERT': ('INTO',),
+    'MERGE': ('INTO',),
+    'COPY': ('INTO',),
+    'DELETE': ('FROM',),
+    'UPDATE': (),
+    'TRUNCATE': ('TABLE',),
+}
+
+
+def tokenize(sql_text: str):
+    """Yield (type, value, start, end) for every significant token."""
+    for m in TOKEN.finditer(sql_text):
+        kind = m.lastgroup
+        if kind in ('ws', 'comment'):
+            continue
+        yield kind, m.group(), m.start(), m.end()
+
+
+def _ident(token) -> str:
+    kind, value = token[0], token[1]
+    return value[1:-1].replace('""', '"') if kind == 'quoted' else value
+
+
+def _is_word(tokens, i, *words) -> bool:
+    return i < len(tokens) and tokens[i][0] == 'word' and tokens[i][1].upper() in words
+
+
+def _qualified_name(tokens, i):
+    """(name, next index) of a possibly dotted identifier starting at tokens[i]."""
+    parts = []
+    while i < len(tokens) and tokens[i][0] in ('word', 'quoted'):
+        parts.append(_ident(tokens[i]))
+        i += 1
+        if i < len(tokens) and tokens[i][1] == '.':
+            i += 1
+        else:
+            break
+    return ('.'.join(parts) or None), i
+
+
+def _column_list(tokens, i) -> tuple:
+    """
+    ({COLUMN: TYPE}, quoted COLUMN names) of the parenthesized definitions
+    starting at tokens[i] == '('.
+    """
+    definitions, current, depth = [], [], 0
+    for token in tokens[i:]:
+        value = token[1]
+        if value == '(':
+            depth += 1
+            if depth == 1:
+                continue
+        elif value == ')':
+            depth -= 1
+            if depth == 0:
+                break
+        if value == ',' and depth == 1:
+            definitions.append(current)
+            current = []
+        else:
+            current.append(token)
+    definitions.append(current)
+
+    columns, quoted = {}, set()
+    for definition in definitions:
+        if len(definition) < 2 or definition[0][0] not in ('word', 'quoted'):
+            continue
+        if definition[0][0] == 'word' and definition[0][1].upper() in CONSTRAINT_WORDS:
+            continue
+        if definition[1][0] != 'word':
+            continue
+        sql_type = definition[1][1].upper()
+        if len(definition) > 2 and definition[2][1] == '(':
+            args = []
+            for token in definition[3:]:
+                if token[1] == ')':
+                    break
+                args.append(token[1])
+            sql_type += f"({''.join(args)})"
+        columns[_ident(definition[0])] = sql_type
+        if definition[0][0] == 'quoted':
+            quoted.add(_ident(definition[0]))
+    return columns, quoted
+
+
+def _statement(tokens, sql_text: str) -> Statement:
+    text = sql_text[tokens[0][2]:tokens[-1][3]]
+    first = tokens[0][1].upper() if tokens[0][0] == 'word' else tokens[0][1]
+    kind, table, columns, quoted = first, None, {}, set()
+
+    if first in ('CREATE', 'ALTER', 'DROP'):
+        i = 1
+        while _is_word(tokens, i, *OBJECT_MODIFIERS):
+            i += 1
+        if i < len(tokens) and tokens[i][0] == 'word':
+            kind = f"{first} {tokens[i][1].upper()}"
+            i += 1
+            if _is_word(tokens, i, 'IF'):
+                i += 1
+                while _is_word(tokens, i, 'NOT', 'EXISTS'):
+                    i += 1
+            table, i = _qualified_name(tokens, i)
+            if kind == 'CREATE TABLE' and i < len(tokens) and tokens[i][1] == '(':
+                columns, quoted = _column_list(tokens, i)
+    elif first in NAME_PREFIX:
+        i = 1
+        while _is_word(tokens, i, 'OVERWRITE', *NAME_PREFIX[first]):
+            i += 1
+        table, _ = _qualified_name(tokens, i)
+
+    references = []
+    for i, token in enumerate(tokens):
+        if token[0] == 'word' and token[1].upper() == 'REFERENCES':
+            name, _ = _qualified_name(tokens, i + 1)
+            if name and name not in references:
+                references.append(name)
+    return Statement(kind, table, columns, references, text, quoted)
+
+
+def parse_statements(sql_text: str) -> list:
+    """Split `sql_text` on top-level `;` and parse each statement."""
+    statements, current = [], []
+    for token in tokenize(sql_text):
+        if token[0] == 'punct' and token[1] == ';':
+            if current:
+                statements.append(_statement(current, sql_text))
+            current = []
+        else:
+            current.append(token)
+    if current:
+        statements.append(_statement(current, sql_text))
+    return statements
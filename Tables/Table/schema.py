@@ -0,0 +1,47 @@
+"""
+Column model of the Snowflake tables declared in create_tables.sql.
+
+    >>> column_types('DIM_CAMPAGNE')['DATE_DEBUT']
+    'DATE'
+
+Table and column names are upper-cased (Snowflake folds unquoted identifiers),
+types are kept as declared, e.g. 'NUMBER(4,0)' or 'VARCHAR(100)'.
+"""
+import os
+from functools import lru_cache
+
+from Tables.Table.ddl_parser import parse_statements
+
+DDL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "create_tables.sql")
+
+DATE_TYPES = {'DATE', 'DATETIME', 'TIMESTAMP', 'TIMESTAMP_NTZ', 'TIMESTAMP_LTZ', 'TIMESTAMP_TZ'}
+
+
+def parse_ddl(sql_text: str) -> dict:
+    """Map TABLE -> {COLUMN: TYPE} for every CREATE TABLE of `sql_text`."""
+    return {
+        st.table.upper(): {name.upper(): sql_type for name, sql_type in st.columns.items()}
+        for st in parse_statements(sql_text)
+        if st.kind == 'CREATE TABLE' and st.table
+    }
+
+
+@lru_cache(maxsize=None)
+def load_schema(path: str = DDL_PATH) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_ddl(f.read())
+
+
+def base_type(sql_type: str) -> str:
+    """'NUMBER(4,0)' -> 'NUMBER'."""
+    return sql_type.split('(', 1)[0].upper()
+
+
+def column_types(table: str) -> dict:
+    """Declared {COLUMN: TYPE} of `table`, empty if the table is not in the DDL."""
+    return load_schema().get(table.upper(), {})
+
+
+def date_columns(table: str) -> list:
+    """Columns of `table` declared as DATE or TIMESTAMP."""
+    return [col for col, sql_type in column_types(table).items() if base_type(sql_type) in DATE_TYPES]
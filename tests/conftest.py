@@ -0,0 +1,19 @@
+import pytest
+
+from Flows.Creation.introspection import SchemaCache
+from tests.fakes import FakeConnection
+
+
+@pytest.fixture
+def make_cache():
+    """Build a SchemaCache loaded for CLIENT1 from INFORMATION_SCHEMA rows."""
+    def make(rows, schemas=('CLIENT1',)):
+        return SchemaCache(FakeConnection(rows)).load(list(schemas))
+    return make
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    """ETL state files (Flows/ETL/state.py) written under a temporary directory."""
+    monkeypatch.setenv('ETL_STATE_DIR', str(tmp_path))
+    return tmp_path
@@ -0,0 +1,33 @@
+"""Stand-ins for the Snowflake connection used by the tests."""
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        self.conn.params.append(params)
+
+    def fetchall(self):
+        return list(self.conn.rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Snowflake connection answering every query with `rows` (INFORMATION_SCHEMA shape)."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+        self.params = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def column_row(schema, table, name, data_type, length=None, precision=None, scale=None):
+    """One TABLES x COLUMNS row as loaded by SchemaCache.load()."""
+    return (schema, table, 0, None, None, name, data_type, length, precision, scale, 'YES', None)
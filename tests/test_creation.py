@@ -0,0 +1,52 @@
+from Flows.Creation.creation import statement_waves
+from Tables.Table.ddl_parser import parse_statements
+
+
+def waves_of(sql):
+    return [[i for i, _ in wave] for wave in statement_waves(parse_statements(sql))]
+
+
+def test_independent_tables_share_a_wave():
+    sql = "CREATE TABLE dim_a (id INT); CREATE TABLE dim_b (id INT);"
+
+    assert waves_of(sql) == [[1, 2]]
+
+
+def test_table_waits_for_the_tables_it_references():
+    sql = """
+        CREATE TABLE fact_vente (id INT, id_a INT REFERENCES dim_a (id), id_c INT REFERENCES dim_c (id));
+        CREATE TABLE dim_a (id INT);
+        CREATE TABLE dim_c (id INT, id_a INT REFERENCES dim_a (id));
+    """
+
+    # References to tables not created yet do not hold a statement back
+    assert waves_of(sql) == [[1, 2], [3]]
+
+
+def test_self_reference_is_ignored():
+    sql = "CREATE TABLE dim_a (id INT, parent INT REFERENCES dim_a (id));"
+
+    assert waves_of(sql) == [[1]]
+
+
+def test_statements_on_a_table_follow_it_in_order():
+    sql = """
+        CREATE TABLE dim_a (id INT);
+        CREATE TABLE dim_b (id INT);
+        ALTER TABLE dim_a ADD COLUMN nom TEXT;
+        INSERT INTO dim_a VALUES (1, 'x');
+        CREATE TABLE fact_vente (id INT, id_a INT REFERENCES dim_a (id));
+    """
+
+    # A referencing table also waits for the statements run on its reference
+    assert waves_of(sql) == [[1, 2], [3], [4], [5]]
+
+
+def test_skipped_statements_keep_their_index():
+    statements = parse_statements("CREATE TABLE dim_a (id INT); CREATE TABLE dim_b (id INT);")
+    statements[0] = None
+
+    waves = statement_waves(statements)
+
+    assert [[i for i, _ in wave] for wave in waves] == [[2]]
+    assert waves[0][0][1].table.upper() == 'DIM_B'
@@ -0,0 +1,74 @@
+import os
+import re
+
+import pytest
+
+from Tables.Table.ddl_parser import parse_statements
+from Tables.Table.schema import DDL_PATH
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'Benchmarks', 'ddl_corpus.sql')
+
+RE_EXPECT = re.compile(r'^--\s*expect:\s*(.+?)\s*\|\s*(.+?)\s*\|\s*(\d+)\s*$', re.MULTILINE)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_corpus_matches_its_expectations():
+    sql_text = read(CORPUS_PATH)
+    expected = [(kind, None if table == 'None' else table, int(n))
+                for kind, table, n in RE_EXPECT.findall(sql_text)]
+
+    parsed = [(st.kind, st.table, len(st.columns)) for st in parse_statements(sql_text)]
+
+    assert len(expected) == 12
+    assert parsed == expected
+
+
+def test_semicolons_inside_literals_comments_and_dollar_blocks():
+    sql = """
+        INSERT INTO t VALUES ('a;b', "c;d"); -- e;f
+        /* g; */ CREATE FUNCTION f() RETURNS INT AS $$ 1; $$;
+    """
+
+    assert [st.kind for st in parse_statements(sql)] == ['INSERT', 'CREATE FUNCTION']
+
+
+def test_create_table_columns_and_references():
+    st, = parse_statements("""
+        CREATE OR REPLACE TABLE IF NOT EXISTS sales.fact_vente (
+            id_vente NUMBER(38, 0) PRIMARY KEY,
+            "Day Name" varchar(20),
+            id_ferme NUMBER REFERENCES dim_ferme (id_ferme),
+            FOREIGN KEY (id_centre) REFERENCES dim_centre (id_centre)
+        );
+    """)
+
+    assert st.kind == 'CREATE TABLE'
+    assert st.table == 'sales.fact_vente'
+    assert st.columns == {'id_vente': 'NUMBER(38,0)', 'Day Name': 'VARCHAR(20)', 'id_ferme': 'NUMBER'}
+    assert st.references == ['dim_ferme', 'dim_centre']
+    assert st.quoted == {'Day Name'}
+    assert st.text.endswith(')')
+
+
+@pytest.mark.parametrize('sql, kind, table', [
+    ("ALTER TABLE dim_a ADD COLUMN x INT", 'ALTER TABLE', 'dim_a'),
+    ("DROP VIEW IF EXISTS v", 'DROP VIEW', 'v'),
+    ("INSERT OVERWRITE INTO dim_a SELECT 1", 'INSERT', 'dim_a'),
+    ("USE SCHEMA client1", 'USE', None),
+])
+def test_kind_and_table(sql, kind, table):
+    st, = parse_statements(sql)
+
+    assert (st.kind, st.table) == (kind, table)
+
+
+def test_every_table_of_the_ddl_is_parsed():
+    tables = [st.table.upper() for st in parse_statements(read(DDL_PATH)) if st.kind == 'CREATE TABLE']
+
+    assert 'DIM_CALENDAR' in tables
+    assert len(tables) == len(set(tables))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from Flows.ETL.dtypes import apply_read_dtypes, compact_frame, compact_series
+
+
+def test_whole_floats_read_into_varchar_columns_lose_the_trailing_zero():
+    df = pd.DataFrame({'MATRICULE_PERSONNEL': [1234.0, np.nan], 'NOM_PERSONNEL': [2.5, 'Ali']})
+
+    assert apply_read_dtypes(df, 'DIM_PERSONNEL') == []
+
+    assert df['MATRICULE_PERSONNEL'].dtype == 'string'
+    assert df['MATRICULE_PERSONNEL'].tolist() == ['1234', pd.NA]
+    assert df['NOM_PERSONNEL'].tolist() == ['2.5', 'Ali']
+
+
+def test_floats_become_float32_only_when_lossless():
+    exact = pd.Series([0.5, 1.25, np.nan, np.inf])
+    inexact = pd.Series([0.1, 2.0])
+
+    assert compact_series(exact).dtype == np.float32
+    assert compact_series(inexact).dtype == np.float64
+    assert compact_series(pd.Series([0.5, None], dtype='Float64')).dtype == 'Float32'
+
+
+def test_integers_are_downcast_to_the_smallest_type():
+    assert compact_series(pd.Series([1, 100])).dtype == np.int8
+    assert compact_series(pd.Series([1, 40000])).dtype == np.int32
+    assert compact_series(pd.Series([1, None, 300], dtype='Int64')).dtype == 'Int16'
+
+
+def test_category_threshold():
+    repeated = pd.Series(['a', 'b', 'a', 'b', None], dtype='string')
+    distinct = pd.Series(['a', 'b', 'c', 'a'], dtype='string')
+
+    assert isinstance(compact_series(repeated).dtype, pd.CategoricalDtype)
+    # 3 distinct values for 4 rows is above the default 0.5 ratio
+    assert compact_series(distinct).dtype == 'string'
+    assert isinstance(compact_series(distinct, max_category_ratio=0.75).dtype, pd.CategoricalDtype)
+
+
+def test_other_columns_are_left_alone():
+    for series in (pd.Series([True, False]), pd.Series(['a', 1], dtype=object),
+                   pd.Series(['a', 'a'], dtype='category')):
+        assert compact_series(series) is series
+
+
+def test_compact_frame_keeps_date_and_watermark_columns():
+    df = pd.DataFrame({
+        'DATE_RECOLTE': pd.Series(['x', 'x', 'x'], dtype='string'),
+        'QUANTITE': [1, 2, 3],
+        'PARCELLE': pd.Series(['p', 'p', 'p'], dtype='string'),
+    })
+
+    before, after = compact_frame(df, 'PRODUCTION_BEEONE')
+
+    assert df['DATE_RECOLTE'].dtype == 'string'
+    assert df['QUANTITE'].dtype == np.int8
+    assert isinstance(df['PARCELLE'].dtype, pd.CategoricalDtype)
+    assert after < before
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from Flows.ETL.fingerprints import (
+    clear_fingerprint, compute_fingerprint, get_fingerprints, is_unchanged, save_fingerprint
+)
+
+
+def frame():
+    return pd.DataFrame({'id_ferme': [1, 2, 3], 'nom_ferme': ['a', 'b', None]})
+
+
+def test_identical_re_extract_is_skipped(state_dir):
+    save_fingerprint('Client1', 'dim_ferme', compute_fingerprint(frame()), loaded_rows=3)
+
+    assert is_unchanged('Client1', 'DIM_FERME', compute_fingerprint(frame()), target_rows=3)
+    assert (state_dir / 'Client1' / 'fingerprints.json').is_file()
+
+
+def test_row_order_does_not_matter():
+    shuffled = frame().iloc[[2, 0, 1]]
+
+    assert compute_fingerprint(shuffled) == compute_fingerprint(frame())
+
+
+def test_changes_flip_the_fingerprint(state_dir):
+    save_fingerprint('Client1', 'DIM_FERME', compute_fingerprint(frame()), loaded_rows=3)
+
+    changed_value = frame()
+    changed_value.loc[1, 'nom_ferme'] = 'B'
+    added_row = pd.concat([frame(), frame().iloc[:1]], ignore_index=True)
+    renamed = frame().rename(columns={'nom_ferme': 'libelle'})
+
+    for df in (changed_value, added_row, renamed):
+        assert compute_fingerprint(df) != compute_fingerprint(frame())
+        assert not is_unchanged('Client1', 'DIM_FERME', compute_fingerprint(df), target_rows=3)
+
+
+def test_column_names_are_compared_normalized():
+    df = frame().rename(columns={'id_ferme': ' ID_FERME '})
+
+    assert compute_fingerprint(df) == compute_fingerprint(frame())
+
+
+def test_target_must_still_hold_the_loaded_rows(state_dir):
+    fingerprint = compute_fingerprint(frame())
+    save_fingerprint('Client1', 'DIM_FERME', fingerprint, loaded_rows=3)
+
+    assert not is_unchanged('Client1', 'DIM_FERME', fingerprint, target_rows=0)
+    assert is_unchanged('Client1', 'DIM_FERME', fingerprint)
+
+
+def test_unknown_or_cleared_tables_are_loaded(state_dir):
+    fingerprint = compute_fingerprint(frame())
+    assert not is_unchanged('Client1', 'DIM_FERME', fingerprint)
+
+    save_fingerprint('Client1', 'DIM_FERME', fingerprint, loaded_rows=3)
+    clear_fingerprint('Client1', 'dim_ferme')
+
+    assert get_fingerprints('Client1') == {}
+    assert not is_unchanged('Client1', 'DIM_FERME', fingerprint)
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from Flows.ETL.instrumentation import NULL_RUN, Run, frame_bytes
+
+
+def frame():
+    return pd.DataFrame({'ID': [1, 2], 'NOM': pd.Series(['a' * 1000, 'b'], dtype=object)})
+
+
+def test_frame_bytes_are_shallow_unless_deep():
+    shallow, deep = frame_bytes(frame()), frame_bytes(frame(), deep=True)
+
+    assert shallow == frame().memory_usage(index=False).sum()
+    assert deep > shallow + 1000
+
+
+def test_strings_are_scanned_only_for_profiled_tables(monkeypatch):
+    monkeypatch.setenv('ETL_PROFILE', 'DIM_FERME')
+    run = Run('Client1')
+
+    assert run.frame_bytes('dim_ferme', frame()) == frame_bytes(frame(), deep=True)
+    assert run.frame_bytes('DIM_CENTRE', frame()) == frame_bytes(frame())
+    assert NULL_RUN.frame_bytes('DIM_FERME', frame()) is None
+
+
+def test_timed_iter_records_rows_and_bytes(monkeypatch):
+    monkeypatch.delenv('ETL_PROFILE', raising=False)
+    run = Run('Client1')
+
+    frames = list(run.timed_iter([frame(), frame()], 'DIM_FERME', 'extract'))
+
+    entry = run.steps[('DIM_FERME', 'extract')]
+    assert len(frames) == 2
+    assert (entry['calls'], entry['rows'], entry['bytes']) == (2, 4, 2 * frame_bytes(frame()))
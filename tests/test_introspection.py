@@ -0,0 +1,72 @@
+from Flows.Creation.introspection import SchemaCache
+from tests.fakes import FakeConnection, column_row
+
+
+ROWS = [
+    column_row('CLIENT1', 'DIM_FERME', 'ID_FERME', 'NUMBER', precision=38, scale=0),
+    column_row('CLIENT1', 'DIM_FERME', 'nom_ferme', 'TEXT', length=200),
+    ('CLIENT1', 'EMPTY_TABLE', 0, None, None, None, None, None, None, None, None, None),
+]
+
+
+def test_load_runs_one_query_and_matches_names_upper_cased():
+    conn = FakeConnection(ROWS)
+    cache = SchemaCache(conn, 'BEE_CENTRAL').load(['client1'])
+
+    assert cache.queries == 1
+    assert len(conn.executed) == 1
+    assert 'BEE_CENTRAL.INFORMATION_SCHEMA.TABLES' in conn.executed[0]
+    assert "t.TABLE_SCHEMA IN ('CLIENT1')" in conn.executed[0]
+    assert cache.table_exists('client1', 'dim_ferme')
+    assert cache.columns('CLIENT1', 'DIM_FERME') == ['ID_FERME', 'nom_ferme']
+    assert cache.has_column('client1', 'dim_ferme', 'NOM_FERME')
+    assert cache.column('CLIENT1', 'DIM_FERME', 'nom_ferme').char_length == 200
+
+
+def test_table_without_columns_exists():
+    cache = SchemaCache(FakeConnection(ROWS)).load(['CLIENT1'])
+
+    assert cache.table_exists('CLIENT1', 'EMPTY_TABLE')
+    assert cache.columns('CLIENT1', 'EMPTY_TABLE') == []
+    assert sorted(cache.tables('CLIENT1')) == ['DIM_FERME', 'EMPTY_TABLE']
+
+
+def test_tables_filter_is_part_of_the_query():
+    conn = FakeConnection(ROWS)
+    SchemaCache(conn).load(['CLIENT1'], tables=['dim_ferme'])
+
+    assert "t.TABLE_NAME IN ('DIM_FERME')" in conn.executed[0]
+
+
+def test_column_diff():
+    cache = SchemaCache(FakeConnection(ROWS)).load(['CLIENT1'])
+
+    missing, extra = cache.column_diff('CLIENT1', 'DIM_FERME', ['id_ferme', 'zone'])
+    assert missing == ['ZONE']
+    assert extra == ['NOM_FERME']
+
+
+def test_reload_forgets_dropped_tables_of_its_scope_only():
+    conn = FakeConnection(ROWS + [column_row('CLIENT2', 'DIM_FERME', 'ID_FERME', 'NUMBER')])
+    cache = SchemaCache(conn).load(['CLIENT1', 'CLIENT2'])
+
+    conn.rows = [column_row('CLIENT1', 'DIM_FERME', 'ID_FERME', 'NUMBER')]
+    cache.load(['CLIENT1'])
+
+    assert cache.queries == 2
+    assert not cache.table_exists('CLIENT1', 'EMPTY_TABLE')
+    assert cache.columns('CLIENT1', 'DIM_FERME') == ['ID_FERME']
+    assert cache.table_exists('CLIENT2', 'DIM_FERME')
+
+
+def test_mark_created_and_mark_column_need_no_query():
+    cache = SchemaCache(FakeConnection()).load(['CLIENT1'])
+
+    cache.mark_created('client1', 'fact_vente', ['id_vente'])
+    cache.mark_column('CLIENT1', 'FACT_VENTE', 'id_client', 'NUMBER')
+
+    assert cache.queries == 1
+    assert cache.table_exists('CLIENT1', 'FACT_VENTE')
+    assert cache.columns('CLIENT1', 'FACT_VENTE') == ['ID_VENTE', 'ID_CLIENT']
+    assert cache.column('CLIENT1', 'FACT_VENTE', 'ID_VENTE').data_type is None
+    assert cache.column('CLIENT1', 'FACT_VENTE', 'ID_CLIENT').data_type == 'NUMBER'
@@ -0,0 +1,41 @@
+import pytest
+
+from Flows.Creation.introspection import SchemaCache
+from Flows.ETL.load import TargetSchema, _client_tag, client_id
+from tests.fakes import FakeConnection, column_row
+
+CFG = {'id_client': None, 'snowflake': {'schema': 'client1'}}
+
+
+def test_client_id_from_the_config_needs_no_query():
+    conn = FakeConnection()
+
+    assert client_id(conn, dict(CFG, id_client='7')) == 7
+    assert conn.executed == []
+
+
+def test_client_id_falls_back_to_client_databases():
+    conn = FakeConnection([(3,)])
+
+    assert client_id(conn, CFG) == 3
+    assert 'BEE_MASTER.PUBLIC.CLIENT_DATABASES' in conn.executed[0]
+    assert conn.params == [('CLIENT1',)]
+
+
+@pytest.mark.parametrize('rows', [[], [(None,)], [(3,), (4,)]])
+def test_client_id_is_required(rows):
+    with pytest.raises(ValueError, match='id_client'):
+        client_id(FakeConnection(rows), CFG)
+
+
+def test_client_tag_only_for_tables_with_the_column():
+    cache = SchemaCache(FakeConnection([
+        column_row('CLIENT1', 'DIM_FERME', 'ID_FERME', 'NUMBER'),
+        column_row('CLIENT1', 'DIM_FERME', 'ID_CLIENT', 'NUMBER'),
+        column_row('CLIENT1', 'DIM_CENTRE', 'ID_CENTRE', 'NUMBER'),
+    ])).load(['CLIENT1'])
+    targets = TargetSchema('CLIENT1', cache, 3)
+
+    assert _client_tag(targets, 'dim_ferme') == 3
+    assert _client_tag(targets, 'dim_centre') is None
+    assert cache.queries == 1
@@ -0,0 +1,18 @@
+from Merge.Merge import build_insert
+
+
+def test_id_client_always_comes_from_the_mapping():
+    sql = build_insert('DIM_FERME', ['ID_FERME', 'ID_CLIENT'], [
+        ('CLIENT1', 1, ['ID_FERME', 'ID_CLIENT']),
+        ('CLIENT2', 2, ['ID_FERME']),
+    ])
+
+    assert 'SELECT "ID_FERME", 1 AS "ID_CLIENT" FROM BEE_CENTRAL.CLIENT1.DIM_FERME' in sql
+    assert 'SELECT "ID_FERME", 2 AS "ID_CLIENT" FROM BEE_CENTRAL.CLIENT2.DIM_FERME' in sql
+    assert sql.startswith('INSERT INTO BEE_MERGE.PUBLIC.DIM_FERME ("ID_FERME", "ID_CLIENT")')
+
+
+def test_columns_missing_from_a_schema_are_null():
+    sql = build_insert('DIM_FERME', ['ID_FERME', 'ZONE'], [('CLIENT1', 1, ['ID_FERME'])])
+
+    assert 'SELECT "ID_FERME", NULL AS "ZONE", 1 AS "ID_CLIENT" FROM BEE_CENTRAL.CLIENT1.DIM_FERME' in sql
@@ -0,0 +1,171 @@
+import pytest
+
+from Flows.Creation.introspection import Column
+from Flows.Creation.migration import (
+    MAX_VARCHAR, declared_columns, diff_table, normalize_declared, normalize_live
+)
+from Tables.Table.ddl_parser import parse_statements
+from Tables.Table.schema import DDL_PATH
+from tests.fakes import column_row
+
+
+@pytest.mark.parametrize('sql_type, expected', [
+    ('NUMBER', ('NUMBER', 38, 0)),
+    ('NUMBER(10)', ('NUMBER', 10, 0)),
+    ('NUMBER(10, 2)', ('NUMBER', 10, 2)),
+    ('DECIMAL(12,4)', ('NUMBER', 12, 4)),
+    ('INT', ('NUMBER', 38, 0)),
+    ('BIGINT', ('NUMBER', 38, 0)),
+    ('VARCHAR', ('TEXT', MAX_VARCHAR)),
+    ('VARCHAR(50)', ('TEXT', 50)),
+    ('TEXT', ('TEXT', MAX_VARCHAR)),
+    ('STRING', ('TEXT', MAX_VARCHAR)),
+    ('CHAR', ('TEXT', 1)),
+    ('CHAR(3)', ('TEXT', 3)),
+    ('FLOAT', ('FLOAT',)),
+    ('DOUBLE', ('FLOAT',)),
+    ('TIMESTAMP', ('TIMESTAMP_NTZ',)),
+    ('DATETIME', ('TIMESTAMP_NTZ',)),
+    ('TIMESTAMP_NTZ', ('TIMESTAMP_NTZ',)),
+    ('DATE', ('DATE',)),
+])
+def test_normalize_declared(sql_type, expected):
+    assert normalize_declared(sql_type) == expected
+
+
+def live(data_type, char_length=None, precision=None, scale=None):
+    return Column('C', data_type, char_length, precision, scale, True, None)
+
+
+def test_normalize_live_matches_declared_shape():
+    # INFORMATION_SCHEMA reports VARCHAR as TEXT and NUMBER(38,0) as NUMBER
+    assert normalize_live(live('TEXT', 200)) == normalize_declared('VARCHAR(200)')
+    assert normalize_live(live('TEXT')) == normalize_declared('VARCHAR')
+    assert normalize_live(live('NUMBER', None, 38, 0)) == normalize_declared('INT')
+    assert normalize_live(live('TIMESTAMP_NTZ')) == normalize_declared('DATETIME')
+
+
+ROWS = [
+    column_row('CLIENT1', 'DIM_FERME', 'ID_FERME', 'NUMBER', precision=38, scale=0),
+    column_row('CLIENT1', 'DIM_FERME', 'NOM_FERME', 'TEXT', length=100),
+    column_row('CLIENT1', 'DIM_FERME', 'SURFACE', 'NUMBER', precision=10, scale=2),
+    column_row('CLIENT1', 'DIM_FERME', 'CREE_LE', 'TIMESTAMP_NTZ'),
+    column_row('CLIENT1', 'DIM_FERME', 'NOTES', 'TEXT', length=MAX_VARCHAR),
+]
+
+
+def test_matching_table_is_a_no_op(make_cache):
+    cache = make_cache(ROWS)
+    declared = {
+        'ID_FERME': 'INT',
+        'NOM_FERME': 'VARCHAR(100)',
+        'SURFACE': 'NUMBER(10,2)',
+        'CREE_LE': 'TIMESTAMP',
+        'NOTES': 'TEXT',
+    }
+
+    assert diff_table(cache, 'CLIENT1', 'DIM_FERME', declared) == ([], [])
+
+
+def test_narrowed_columns_are_left_alone(make_cache):
+    cache = make_cache(ROWS)
+    declared = {'NOM_FERME': 'VARCHAR(20)', 'SURFACE': 'NUMBER(6,2)'}
+
+    assert diff_table(cache, 'CLIENT1', 'DIM_FERME', declared) == ([], [])
+
+
+def test_missing_columns_are_added_in_one_statement(make_cache):
+    cache = make_cache(ROWS)
+    declared = {'ID_FERME': 'INT', 'ZONE': 'VARCHAR(50)', 'ID_REGION': 'NUMBER'}
+
+    statements, warnings = diff_table(cache, 'CLIENT1', 'DIM_FERME', declared)
+
+    assert statements == ['ALTER TABLE DIM_FERME ADD COLUMN "ZONE" VARCHAR(50), "ID_REGION" NUMBER']
+    assert warnings == []
+
+
+def test_widened_columns_are_altered_in_one_statement(make_cache):
+    cache = make_cache(ROWS)
+    declared = {'NOM_FERME': 'VARCHAR(255)', 'SURFACE': 'NUMBER(18, 2)'}
+
+    statements, warnings = diff_table(cache, 'CLIENT1', 'DIM_FERME', declared)
+
+    assert statements == [
+        'ALTER TABLE DIM_FERME ALTER COLUMN "NOM_FERME" SET DATA TYPE VARCHAR(255), '
+        'COLUMN "SURFACE" SET DATA TYPE NUMBER(18,2)'
+    ]
+    assert warnings == []
+
+
+def test_add_and_alter_together(make_cache):
+    cache = make_cache(ROWS)
+    declared = {'NOM_FERME': 'TEXT', 'ZONE': 'TEXT'}
+
+    statements, _ = diff_table(cache, 'CLIENT1', 'DIM_FERME', declared)
+
+    assert statements == [
+        'ALTER TABLE DIM_FERME ADD COLUMN "ZONE" TEXT',
+        f'ALTER TABLE DIM_FERME ALTER COLUMN "NOM_FERME" SET DATA TYPE VARCHAR({MAX_VARCHAR})',
+    ]
+
+
+def test_changes_needing_a_reload_are_only_reported(make_cache):
+    cache = make_cache(ROWS)
+    declared = {'ID_FERME': 'VARCHAR(10)', 'SURFACE': 'NUMBER(10,4)', 'CREE_LE': 'DATE'}
+
+    statements, warnings = diff_table(cache, 'CLIENT1', 'DIM_FERME', declared)
+
+    assert statements == []
+    assert warnings == [
+        "DIM_FERME.ID_FERME: NUMBER(38,0) -> VARCHAR(10) needs a reload",
+        "DIM_FERME.SURFACE: NUMBER(10,2) -> NUMBER(10,4) needs a reload",
+        "DIM_FERME.CREE_LE: TIMESTAMP_NTZ -> DATE needs a reload",
+    ]
+
+
+def test_columns_of_unknown_type_are_skipped(make_cache):
+    cache = make_cache([])
+    cache.mark_created('CLIENT1', 'FACT_VENTE', ['ID_VENTE'])
+
+    assert diff_table(cache, 'CLIENT1', 'FACT_VENTE', {'ID_VENTE': 'VARCHAR(10)'}) == ([], [])
+
+
+def dim_calendar():
+    with open(DDL_PATH, 'r', encoding='utf-8') as f:
+        statements = parse_statements(f.read())
+    return next(st for st in statements if st.kind == 'CREATE TABLE' and st.table.upper() == 'DIM_CALENDAR')
+
+
+def test_declared_columns_keep_the_case_of_quoted_names():
+    declared = declared_columns(dim_calendar())
+
+    assert list(declared)[:3] == ['DATE_CAL', 'Year', 'Quarter']
+    assert declared['Week of Year'] == 'NUMBER'
+
+
+def test_quoted_columns_are_emitted_quoted(make_cache):
+    cache = make_cache([
+        column_row('CLIENT1', 'DIM_CALENDAR', 'DATE_CAL', 'DATE'),
+        column_row('CLIENT1', 'DIM_CALENDAR', 'Year', 'NUMBER', precision=38, scale=0),
+        column_row('CLIENT1', 'DIM_CALENDAR', 'Quarter', 'TEXT', length=2),
+        column_row('CLIENT1', 'DIM_CALENDAR', 'Month Number', 'NUMBER', precision=38, scale=0),
+        column_row('CLIENT1', 'DIM_CALENDAR', 'Month', 'TEXT', length=20),
+        column_row('CLIENT1', 'DIM_CALENDAR', 'Day', 'NUMBER', precision=38, scale=0),
+        column_row('CLIENT1', 'DIM_CALENDAR', 'Day of Week', 'NUMBER', precision=38, scale=0),
+    ])
+
+    statements, warnings = diff_table(cache, 'CLIENT1', 'DIM_CALENDAR', declared_columns(dim_calendar()))
+
+    assert statements == [
+        'ALTER TABLE DIM_CALENDAR ADD COLUMN "Week of Year" NUMBER, "Day Name" VARCHAR(20)',
+        'ALTER TABLE DIM_CALENDAR ALTER COLUMN "Quarter" SET DATA TYPE VARCHAR(10)',
+    ]
+    assert warnings == []
+    # Both statements parse back as ALTER TABLE, as creation.py re-parses them
+    assert [st.kind for st in parse_statements('; '.join(statements))] == ['ALTER TABLE'] * 2
+
+
+def test_quotes_inside_names_are_doubled(make_cache):
+    statements, _ = diff_table(make_cache([]), 'CLIENT1', 'T', {'say "hi"': 'TEXT'})
+
+    assert statements == ['ALTER TABLE T ADD COLUMN "say ""hi""" TEXT']
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Flows.ETL.nulls import NULL_TOKENS, normalize_nulls, null_mask
+
+
+@pytest.mark.parametrize('token', ['nan', 'NULL', 'Null', 'nUlL', 'N/A', 'n/A', 'NaT', '<NA>', '', '   ', '-inf'])
+def test_sentinels_are_null_tokens(token):
+    assert token in NULL_TOKENS
+
+
+def test_object_column_sentinels_and_non_finite_numbers():
+    series = pd.Series(['a', 'NULL', None, ' ', 'None', float('inf'), 3, 'nullable'], dtype=object)
+
+    assert null_mask(series).tolist() == [False, True, True, True, True, True, False, False]
+
+
+def test_string_column():
+    series = pd.Series(['x', 'N/A', pd.NA, 'nan', 'NaN value'], dtype='string')
+
+    assert null_mask(series).tolist() == [False, True, True, True, False]
+
+
+def test_categorical_column():
+    series = pd.Series(['x', 'NULL', 'x', None, 'na'], dtype='category')
+
+    assert null_mask(series).tolist() == [False, True, False, True, True]
+
+
+def test_float_column_non_finite_values():
+    series = pd.Series([1.0, np.nan, np.inf, -np.inf, 0.0])
+
+    assert null_mask(series).tolist() == [False, True, True, True, False]
+
+
+def test_int64_column_only_masks_real_nulls():
+    series = pd.Series([1, None, 0], dtype='Int64')
+
+    assert null_mask(series).tolist() == [False, True, False]
+
+
+def test_normalize_nulls_in_place_and_keeps_dtypes():
+    df = pd.DataFrame({
+        'TEXT': pd.Series(['a', 'NULL', ''], dtype=object),
+        'STR': pd.Series(['b', 'nan', 'c'], dtype='string'),
+        'CAT': pd.Series(['x', 'N/A', 'x'], dtype='category'),
+        'INT': pd.Series([1, 2, None], dtype='Int64'),
+        'FLOAT': [1.5, np.inf, 2.0],
+    })
+
+    result = normalize_nulls(df)
+
+    assert result is df
+    assert df['TEXT'].tolist() == ['a', None, None]
+    assert df['STR'].isna().tolist() == [False, True, False]
+    assert df['STR'].dtype == 'string'
+    assert df['CAT'].isna().tolist() == [False, True, False]
+    assert isinstance(df['CAT'].dtype, pd.CategoricalDtype)
+    assert df['INT'].dtype == 'Int64'
+    assert df['INT'].isna().tolist() == [False, False, True]
+    assert df['FLOAT'].isna().tolist() == [False, True, False]
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from Flows.ETL.staging import _to_arrow, to_text
+
+
+def test_whole_floats_are_staged_as_integers_in_text_columns():
+    array = _to_arrow(pd.Series([1234.0, np.nan, -5.0]), pa.string())
+
+    assert array.type == pa.string()
+    assert array.to_pylist() == ['1234', None, '-5']
+
+
+def test_fractional_floats_keep_their_decimals():
+    assert _to_arrow(pd.Series([1.5, np.nan]), pa.string()).to_pylist() == ['1.5', None]
+
+
+def test_to_text_leaves_other_columns_alone():
+    assert list(to_text(pd.Series(['a', None], dtype=object)).fillna('<NA>')) == ['a', '<NA>']
+    assert list(to_text(pd.Series([7, 8]))) == ['7', '8']
+    assert list(to_text(pd.Series([np.nan, np.nan])).isna()) == [True, True]
+
+
+def test_declared_types_are_used_when_values_fit():
+    assert _to_arrow(pd.Series([1, None], dtype='Int64'), pa.int64()).to_pylist() == [1, None]
+    assert _to_arrow(pd.Series(['x', None], dtype='string'), pa.string()).to_pylist() == ['x', None]
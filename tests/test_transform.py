@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Flows.ETL.instrumentation import Run
+from Flows.ETL.transform import duplicate_positions, transform_data, transform_frame
+
+
+def expected(df):
+    return np.flatnonzero(df.duplicated().to_numpy())
+
+
+FRAMES = {
+    'empty': pd.DataFrame({'A': []}),
+    'one row': pd.DataFrame({'A': [1]}),
+    'no duplicates': pd.DataFrame({'A': [1, 2, 3], 'B': ['x', 'y', 'z']}),
+    'duplicates': pd.DataFrame({'A': [1, 2, 1, 1], 'B': ['x', 'y', 'x', 'z']}),
+    'nulls': pd.DataFrame({'A': [None, None, 1.0], 'B': [None, None, None]}),
+    'duplicate column names': pd.DataFrame([[1, 1], [1, 1], [1, 2]], columns=['A', 'A']),
+}
+
+
+@pytest.mark.parametrize('df', FRAMES.values(), ids=FRAMES.keys())
+def test_matches_duplicated_without_table_keys(df):
+    result = duplicate_positions('unknown_table', df)
+
+    np.testing.assert_array_equal(result, expected(df))
+    assert result.dtype == np.intp
+
+
+def test_key_repeated_with_other_values_is_kept():
+    # TABLE_KEYS['COMPTES_BUDGETAIRES'] is id_code_budgetaire
+    df = pd.DataFrame({
+        'ID_CODE_BUDGETAIRE': [1, 1, 2, 1, 2],
+        'LIBELLE': ['a', 'b', 'c', 'a', 'c'],
+    })
+
+    result = duplicate_positions('comptes_budgetaires', df)
+
+    np.testing.assert_array_equal(result, [3, 4])
+    np.testing.assert_array_equal(result, expected(df))
+
+
+def test_falls_back_to_all_columns_when_keys_are_missing():
+    df = pd.DataFrame({'LIBELLE': ['a', 'a', 'b'], 'MONTANT': [1, 1, 1]})
+
+    np.testing.assert_array_equal(duplicate_positions('COMPTES_BUDGETAIRES', df), [1])
+
+
+def test_transform_frame_drops_duplicates_and_upper_cases_columns():
+    df = pd.DataFrame({' id_code_budgetaire ': [1, 1, 2], 'libelle': ['a', 'a', 'b']})
+
+    result = transform_frame('COMPTES_BUDGETAIRES', df)
+
+    assert list(result.columns) == ['ID_CODE_BUDGETAIRE', 'LIBELLE']
+    assert result.to_dict('list') == {'ID_CODE_BUDGETAIRE': [1, 2], 'LIBELLE': ['a', 'b']}
+    assert list(result.index) == [0, 1]
+
+
+def test_transform_data_pops_raw_frames_and_counts_dropped_rows():
+    raw = {'COMPTES_BUDGETAIRES': pd.DataFrame({'id_code_budgetaire': [1, 1], 'libelle': ['a', 'a']})}
+    run = Run('Client1')
+
+    cleaned = transform_data(raw, run)
+
+    assert raw == {}
+    assert len(cleaned['COMPTES_BUDGETAIRES']) == 1
+    assert run.counters == {('COMPTES_BUDGETAIRES', 'duplicates_dropped'): 1}
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from Flows.ETL.watermarks import (
+    compute_watermark, get_watermarks, is_incremental, save_watermark, start_date_for
+)
+
+
+def test_first_run_has_no_lower_bound(state_dir):
+    assert start_date_for('Client1', 'PRODUCTION_BEEONE') is None
+
+
+def test_window_starts_at_the_watermark_minus_the_lookback(state_dir):
+    save_watermark('Client1', 'production_beeone', '2024-03-10T08:30:00')
+
+    assert start_date_for('Client1', 'PRODUCTION_BEEONE', lookback_days=3) == '20240307'
+    assert start_date_for('Client1', 'PRODUCTION_BEEONE', lookback_days=0) == '20240310'
+    assert start_date_for('Client1', 'COUTS_BEEONE') is None
+
+
+def test_watermark_only_moves_forward(state_dir):
+    save_watermark('Client1', 'PRODUCTION_BEEONE', '2024-03-10T00:00:00')
+    save_watermark('Client1', 'PRODUCTION_BEEONE', '2024-03-01T00:00:00')
+    save_watermark('Client1', 'PRODUCTION_BEEONE', None)
+
+    assert get_watermarks('Client1')['PRODUCTION_BEEONE']['watermark'] == '2024-03-10T00:00:00'
+
+    save_watermark('Client1', 'PRODUCTION_BEEONE', '2024-04-01T00:00:00')
+
+    assert start_date_for('Client1', 'PRODUCTION_BEEONE', lookback_days=1) == '20240331'
+
+
+def test_watermarks_are_stored_per_client(state_dir):
+    save_watermark('Client1', 'PRODUCTION_BEEONE', '2024-03-10T00:00:00')
+
+    assert start_date_for('Client2', 'PRODUCTION_BEEONE') is None
+    assert (state_dir / 'Client1' / 'watermarks.json').is_file()
+
+
+def test_compute_watermark_is_the_max_of_the_watermark_column():
+    df = pd.DataFrame({'DATE_RECOLTE': ['2024-03-01', None, '2024-03-09', 'not a date']})
+
+    assert compute_watermark(df, 'production_beeone') == '2024-03-09T00:00:00'
+
+
+def test_no_watermark_without_column_or_values():
+    assert compute_watermark(pd.DataFrame({'DATE_RECOLTE': [None]}), 'PRODUCTION_BEEONE') is None
+    assert compute_watermark(pd.DataFrame({'OTHER': ['2024-03-01']}), 'PRODUCTION_BEEONE') is None
+    assert compute_watermark(pd.DataFrame({'DATE': ['2024-03-01']}), 'DIM_FERME') is None
+
+
+def test_only_watermarked_tables_are_incremental():
+    assert is_incremental('production_beeone')
+    assert not is_incremental('DIM_FERME')